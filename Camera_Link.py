@@ -0,0 +1,102 @@
+'''
+Linked cameras for multi-viewport plotters.
+
+Every viewport keeps a fixed rotation offset to the others, taken from the camera poses at
+link time (e.g. top/front/side/iso). Interacting with one viewport makes it the master; the
+others follow with their offset applied, as if the neuron itself had been rotated. Updates
+we make ourselves are not fed back, and all changes within one frame interval are
+coalesced into a single render.
+'''
+import time
+import numpy as np
+from PyQt5.QtCore import QTimer
+
+
+def camera_frame(camera):
+    '''
+    Orthonormal frame (columns: view direction, view up, right) of a camera.
+    '''
+    d = np.subtract(camera.GetPosition(), camera.GetFocalPoint())
+    d = d / np.linalg.norm(d)
+    u = np.asarray(camera.GetViewUp(), dtype=float)
+    u = u - d * np.dot(u, d)
+    u = u / np.linalg.norm(u)
+    return np.column_stack((d, u, np.cross(d, u)))
+
+
+def camera_pose(camera):
+    return (camera.GetPosition(), camera.GetFocalPoint(), camera.GetViewUp(),
+            camera.GetViewAngle(), camera.GetParallelScale())
+
+
+class CameraLink:
+    def __init__(self, renderers, render, frame_interval=1 / 60):
+        '''
+        renderers: renderers (viewports) whose cameras are linked.
+        render: callable that renders the whole window once, e.g. plotter.render.
+        '''
+        self.renderers = list(renderers)
+        self.render = render
+        self.frame_interval = frame_interval
+        self.master = 0
+        self.last_render = 0.0
+        self.n_renders = 0
+        self._updating = False
+        self._pending = False
+        self._observers = []
+
+        # Rotation of each view relative to the first one, expressed in camera coordinates
+        ref = camera_frame(self.renderers[0].GetActiveCamera())
+        self.offsets = [ref.T @ camera_frame(r.GetActiveCamera()) for r in self.renderers]
+        self._poses = [camera_pose(r.GetActiveCamera()) for r in self.renderers]
+
+        for k, renderer in enumerate(self.renderers):
+            camera = renderer.GetActiveCamera()
+            tag = camera.AddObserver("ModifiedEvent", lambda caller, event, k=k: self.on_modified(k))
+            self._observers.append((camera, tag))
+
+    def unlink(self):
+        for camera, tag in self._observers:
+            camera.RemoveObserver(tag)
+        self._observers = []
+
+    def on_modified(self, k):
+        if self._updating:      # our own update of a follower camera
+            return
+        if camera_pose(self.renderers[k].GetActiveCamera()) == self._poses[k]:
+            return              # e.g. only the clipping range was reset by a render
+        self.master = k
+        if not self._pending:
+            self._pending = True
+            wait = self.frame_interval - (time.perf_counter() - self.last_render)
+            QTimer.singleShot(max(0, int(wait * 1000)), self.flush)
+
+    def flush(self):
+        '''
+        Move every follower to the master pose with its own rotation offset, then render once.
+        '''
+        self._pending = False
+        master_cam = self.renderers[self.master].GetActiveCamera()
+        focal = np.asarray(master_cam.GetFocalPoint())
+        distance = master_cam.GetDistance()
+        base = camera_frame(master_cam) @ self.offsets[self.master].T
+
+        self._updating = True
+        try:
+            for k, renderer in enumerate(self.renderers):
+                if k == self.master:
+                    continue
+                frame = base @ self.offsets[k]
+                cam = renderer.GetActiveCamera()
+                cam.SetFocalPoint(*focal)
+                cam.SetPosition(*(focal + distance * frame[:, 0]))
+                cam.SetViewUp(*frame[:, 1])
+                cam.SetViewAngle(master_cam.GetViewAngle())
+                cam.SetParallelScale(master_cam.GetParallelScale())
+                renderer.ResetCameraClippingRange()
+            self._poses = [camera_pose(r.GetActiveCamera()) for r in self.renderers]
+            self.render()
+        finally:
+            self._updating = False
+        self.last_render = time.perf_counter()
+        self.n_renders += 1
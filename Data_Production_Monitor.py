@@ -1,89 +1,27 @@
 import sys
+import time
 # from PyQt5 import QtGui
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, 
-                             QWidget, QTableWidget, QTableWidgetItem, QHeaderView)
+                             QWidget, QTableWidget, QTableWidgetItem, QTableView, QHeaderView)
 from PyQt5.QtGui import QPainter, QFont
 from PyQt5.QtCore import Qt
 from PyQt5.QtChart import QPieSeries, QChart, QChartView, QBarSet, QBarSeries, QBarCategoryAxis, QValueAxis
 # import pyvista as pv
 from pyvistaqt import QtInteractor
-import numpy as np
 import os
+from SWC_Render import add_neuron
+from Monitor_Collector import MonitorCollector
+from Monitor_Preview import PreviewLoader
+from Monitor_Tables import ColumnFilterBar, ColumnFilterProxy, ColumnTableModel
 
 # class CustomQtInteractor(QtInteractor):
 #     def keyPressEvent(self, event):
 #         # QMainWindow.keyPressEvent(self.parent(), event) # 这里假设MainWindow是QtInteractor的parent。
 #         super().keyPressEvent(event)
 
-def readSWC(swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-    with open(swc_path, "r") as f:
-        for line in f.readlines():
-            line = line.strip()
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
-    names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6]
-    if mode == 'simple':
-        pass
-    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def get_degree(tswc):   # Degree of node: the number of nodes connected to it
-    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
-    # print(tswc['degree'])
-    n_child = tswc.parent.value_counts()
-    n_child = n_child[n_child.index.isin(tswc.index)]
-    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
-    return tswc
-
-def get_rid(swc):
-    '''
-    Find root node.
-    '''
-    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
-    if rnode.shape[0]<1:
-        return -1
-    return rnode.index[0]
-
-def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
-    if rid is None:
-        rid = get_rid(swc)
-    # print(swc.shape)
-    swc=get_degree(swc)
-    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
-    return idlist
-
-def swc2branches(swc):
-    '''
-    reture branch list of a swc
-    '''
-    keyids=get_keypoint(swc)
-    branches=[]
-    for key in keyids:
-        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
-            continue
-        branch=[]
-        branch.append(key)
-        pkey=swc.loc[key,'parent']
-        while True:
-            branch.append(pkey)
-            if pkey in keyids:
-                break
-            key=pkey
-            pkey=swc.loc[key,'parent']
-        branches.append(branch)
-    return branches
-
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, refresh_interval=600, preview_cache_mb=256):
         super().__init__()
 
         self.setWindowTitle("Neuron Data Reconstruction Monitor")
@@ -129,6 +67,11 @@ class MainWindow(QMainWindow):
 
         self.plotter = QtInteractor(self)
         h_layout_2.addWidget(self.plotter)
+
+        # 预览的解析与网格构建在后台线程中进行，新的双击会取消尚未完成的加载；构建好的网格按路径和修改时间缓存
+        self.preview = PreviewLoader(preview_cache_mb << 20)
+        self.preview.mesh_ready.connect(self.show_preview)
+        self.preview.load_failed.connect(self.show_preview_error)
         
         # 柱状图与表格2的水平布局
         title_label_3 = QLabel("Neuron Reconstruction in 2023")
@@ -149,6 +92,15 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
 
+        # 统计数据由后台线程定时采集（Monitor_Collector.py），结果通过信号回到界面线程，原地更新图表和表格
+        self.collector = MonitorCollector(refresh_interval)
+        self.collector.statistics_ready.connect(self.update_statistics)
+        self.collector.attribution_ready.connect(self.update_neurons24h_table)
+        self.collector.refresh_failed.connect(self.show_refresh_error)
+        self.collector.refresh_finished.connect(self.show_refresh_time)
+        self.statusBar().showMessage("Collecting statistics ...")
+        self.collector.start()
+
         # self.setFocusPolicy(Qt.StrongFocus)  # 设置焦点策略
 
     # def keyPressEvent(self, event):
@@ -237,6 +189,7 @@ class MainWindow(QMainWindow):
     def create_neurons24h_table(self):
         # 24小时内重建的神经元信息表格
         table0 = QTableWidget(7, 3)
+        self.table0 = table0
         table0.setHorizontalHeaderLabels(["Reconstructed within 24 hours", "Reconstructor ID", "Reviewer ID"])
         
         table0.verticalHeader().setVisible(False)
@@ -265,18 +218,16 @@ class MainWindow(QMainWindow):
         #  'AverageDiameter', 'Length', 'Surface', 'Volume', 'MaxEuclideanDistance', 'MaxPathDistance', 'MaxBranchOrder', 'AverageContraction', 
         #  'AverageFragmentation', 'AverageParent-daughterRatio', 'AverageBifurcationAngleLocal', 'AverageBifurcationAngleRemote', 'HausdorffDimension']
         columns_to_display = ['Name', 'Nodes', 'SomaSurface', 'Stems', 'OverallWidth']
-        df = df[columns_to_display]
 
-        self.table1 = QTableWidget(df.shape[0], df.shape[1])
-        self.table1.setHorizontalHeaderLabels(df.columns)
+        # 表格只保存各列的数组（ColumnTableModel），单元格在滚动到可见区域时才格式化
+        self.gf_model = ColumnTableModel(df, columns_to_display)
+        self.table1 = QTableView()
+        self.table1.setModel(self.gf_model)
         self.table1.verticalHeader().setVisible(False)
         self.table1.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # self.table1.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents) # 'name'一列显示完整
-        for row in range(df.shape[0]):
-            for col in range(df.shape[1]):
-                self.table1.setItem(row, col, QTableWidgetItem(str(df.iloc[row,col])))
 
-        self.table1.itemDoubleClicked.connect(self.loadSWC)  # 双击事件
+        self.table1.doubleClicked.connect(self.loadSWC)  # 双击事件
 
         return self.table1
     
@@ -291,23 +242,30 @@ class MainWindow(QMainWindow):
                               'number_of_dendritic_trees_steaming_from_the_soma',
                               'number_of_axons', 'max_branch_order', 
                               'total_section_length', 'max_section_length']
-        df = df[columns_to_display]
 
-        self.table2 = QTableWidget(df.shape[0], df.shape[1])
-        self.table2.setHorizontalHeaderLabels(df.columns)
+        # 排序、筛选（名称、数值范围、任一检查未通过）与超阈值单元格高亮均由 ColumnFilterProxy 按整列计算
+        self.qc_model = ColumnTableModel(df, columns_to_display)
+        self.qc_proxy = ColumnFilterProxy(self.qc_model)
+        self.table2 = QTableView()
+        self.table2.setModel(self.qc_proxy)
+        self.table2.setSortingEnabled(True)
+        self.table2.sortByColumn(-1, Qt.AscendingOrder)     # 初始保持文件中的顺序
         self.table2.verticalHeader().setVisible(False)
         self.table2.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # self.table1.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents) # 'name'一列显示完整
-        for row in range(df.shape[0]):
-            for col in range(df.shape[1]):
-                self.table2.setItem(row, col, QTableWidgetItem(str(df.iloc[row,col])))
 
-        return self.table2    
+        qc_panel = QWidget()
+        qc_layout = QVBoxLayout()
+        qc_layout.setContentsMargins(0, 0, 0, 0)
+        qc_layout.addWidget(ColumnFilterBar(self.qc_proxy))
+        qc_layout.addWidget(self.table2)
+        qc_panel.setLayout(qc_layout)
+        return qc_panel
 
-    def loadSWC(self, item):
+    def loadSWC(self, index):
         print("loadSWC function called.")
-        if item.column() == 0:      # 如果双击的是'name'列
-            swc_name = item.text()
+        if index.column() == 0:      # 如果双击的是'name'列
+            swc_name = index.data()
             print(swc_name)
             swc_path = "test/" + swc_name
 
@@ -316,40 +274,29 @@ class MainWindow(QMainWindow):
                 return
 
             print(f"Loading SWC from {swc_path}")
-            swc = readSWC(swc_path, mode='simple')
-            swc_brs = swc2branches(swc)
-            colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
-
-            self.plotter.clear()   # 清除当前的3D视图内容
-
-            for br in swc_brs:
-                type_idx = int(swc.loc[br[0], 'type'])
-                if type_idx < 0 or type_idx >= len(colors):
-                    print(f"Invalid type index {type_idx} found!")
-                    continue
-
-                br_color = colors[int(swc.loc[br[0], 'type'])]
-                br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-
-                # Ensure data is valid before plotting
-                if br_coords.isnull().any().any():
-                    print("Null coordinates detected!")
-                    continue
-
-                Xe = br_coords['x'].to_list()
-                Ye = br_coords['y'].to_list()
-                Ze = br_coords['z'].to_list()
-
-                lines = []
-                for k in range(len(Xe) - 1):
-                    lines.append([Xe[k], Ye[k], Ze[k]])
-                    lines.append([Xe[k+1], Ye[k+1], Ze[k+1]])
-                
-                self.plotter.add_lines(np.array(lines), color=br_color)
-                self.plotter.reset_camera()
-            
-            # self.plotter.show_axes()
-            self.plotter.update()    # 更新plotter的显示
+            mesh = self.preview.request(swc_path)     # 整个神经元合并为一个 PolyData，按分支类型着色
+            if mesh is not None:
+                self.render_neuron(mesh)
+            else:
+                self.statusBar().showMessage(f"Loading {swc_name} ...")
+
+    def show_preview(self, request_id, swc_path, mesh):
+        if request_id == self.preview.latest:      # 只显示最近一次双击的神经元
+            self.statusBar().clearMessage()
+            self.render_neuron(mesh)
+
+    def show_preview_error(self, request_id, swc_path, message):
+        print(f"Error: cannot load {swc_path}: {message}")
+        if request_id == self.preview.latest:
+            self.statusBar().showMessage(f"Cannot load {os.path.basename(swc_path)}: {message}")
+
+    def render_neuron(self, mesh):
+        self.plotter.clear()   # 清除当前的3D视图内容
+        add_neuron(self.plotter, mesh)
+        self.plotter.reset_camera()
+
+        # self.plotter.show_axes()
+        self.plotter.update()    # 更新plotter的显示
 
     def create_bar_chart(self):
         # 柱状图展示
@@ -357,6 +304,7 @@ class MainWindow(QMainWindow):
         set1 = QBarSet('Before 2023')
         set0 << 199 << 414
         set1 << 70 << 0
+        self.bar_sets = (set0, set1)
 
         # set0.setLabel(str(199))
         # set1.setLabel(str(70))
@@ -396,12 +344,48 @@ class MainWindow(QMainWindow):
         axisY = QValueAxis()
         chart.addAxis(axisY, Qt.AlignLeft)
         series.attachAxis(axisY)
+        self.bar_axis = axisY
                 
         chart_view = QChartView(chart)
         chart_view.setRenderHint(QPainter.Antialiasing)
         return chart_view
 
 
+    def update_statistics(self, summary):
+        # 两个饼图不在实时刷新范围内（完成状态与检查状态无法由文件清单得到），只更新柱状图：
+        # 2023 年与 2023 年以前的鼠脑/人脑神经元数量
+        values = [(summary['mouse_2023'], summary['mouse_total'] - summary['mouse_2023']),
+                  (summary['human_2023'], summary['human_total'] - summary['human_2023'])]
+        for col, (in_2023, before) in enumerate(values):
+            self.bar_sets[0].replace(col, in_2023)
+            self.bar_sets[1].replace(col, before)
+        self.bar_axis.setRange(0, max(max(v) for v in values) or 1)
+        self.bar_axis.applyNiceNumbers()
+
+    def update_neurons24h_table(self, rows):
+        # 24 小时内修改的神经元及其标注者/检查者编号，复用已有的单元格
+        self.table0.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, text in enumerate(values):
+                item = self.table0.item(row, col)
+                if item is None:
+                    self.table0.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+
+    def show_refresh_time(self, seconds):
+        self.statusBar().showMessage("Last refresh: {} ({:.1f} s)".format(
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.collector.last_refresh_time)), seconds))
+
+    def show_refresh_error(self, message):
+        self.statusBar().showMessage("Refresh failed, showing previous data: " + message)
+
+    def closeEvent(self, event):
+        self.collector.stop()
+        self.preview.stop()
+        super().closeEvent(event)
+
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MainWindow()
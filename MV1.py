@@ -6,76 +6,10 @@ from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtCore import QUrl, Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
-import pandas as pd
+from SWC_LOD import loadLOD, plot3D_lod
 import sys
 import os
 
-def readSWC(swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-    with open(swc_path, "r") as f:
-        for line in f.readlines():
-            line = line.strip()
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
-    names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6]
-    if mode == 'simple':
-        pass
-    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def get_degree(tswc):   # Degree of node: the number of nodes connected to it
-    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
-    # print(tswc['degree'])
-    n_child = tswc.parent.value_counts()
-    n_child = n_child[n_child.index.isin(tswc.index)]
-    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
-    return tswc
-
-def get_rid(swc):
-    '''
-    Find root node.
-    '''
-    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
-    if rnode.shape[0]<1:
-        return -1
-    return rnode.index[0]
-
-def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
-    if rid is None:
-        rid = get_rid(swc)
-    # print(swc.shape)
-    swc=get_degree(swc)
-    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
-    return idlist
-
-def swc2branches(swc):
-    '''
-    reture branch list of a swc
-    '''
-    keyids=get_keypoint(swc)
-    branches=[]
-    for key in keyids:
-        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
-            continue
-        branch=[]
-        branch.append(key)
-        pkey=swc.loc[key,'parent']
-        while True:
-            branch.append(pkey)
-            if pkey in keyids:
-                break
-            key=pkey
-            pkey=swc.loc[key,'parent']
-        branches.append(branch)
-    return branches
-
 class SettingsDialog(QDialog):
     def __init__(self):
         super(SettingsDialog, self).__init__()
@@ -255,26 +189,30 @@ class MyWindow(QWidget):
         # ax.set_facecolor('black')
         # fig.patch.set_facecolor('black')
 
-        swc = readSWC(fname, mode='simple')
-        swc_brs = swc2branches(swc)
-        colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
-        for br in swc_brs:
-            br_color = colors[int(swc.loc[br[0], 'type'])]
-            br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-            Xe = br_coords['x'].to_list()
-            Ye = br_coords['y'].to_list()
-            Ze = br_coords['z'].to_list()
-            ax.plot3D(Xe, Ye, Ze, color=br_color, linewidth=1)
+        # Draw at the level of detail that fits the tile; double-click to inspect at full resolution
+        lod = loadLOD(fname)
+        self.drawSWC(ax, lod, lod.pick(min(self.screen_width, self.screen_height)))
+        canvas = FigureCanvas(fig)
+        canvas.setFixedSize(self.screen_width, self.screen_height)
+        canvas.mpl_connect('button_press_event', lambda event: event.dblclick and self.inspectSWC(ax, lod))
+        self.grid.addWidget(canvas, *pos)
+        plt.tight_layout()
+
+    def drawSWC(self, ax, lod, level):
+        plot3D_lod(ax, lod, level, linewidth=1)
         ax.axis('off')
         ax.grid(False)
         # ax.set_xlabel('x')
         # ax.set_ylabel('y')
         # ax.set_zlabel('z')
-        canvas = FigureCanvas(fig)
-        canvas.setFixedSize(self.screen_width, self.screen_height)
-        self.grid.addWidget(canvas, *pos)
-        plt.tight_layout()
 
+    def inspectSWC(self, ax, lod):
+        # Redraw the tile from the full-resolution tree, keeping the current view
+        elev, azim = ax.elev, ax.azim
+        ax.cla()
+        self.drawSWC(ax, lod, 0)
+        ax.view_init(elev, azim)
+        ax.figure.canvas.draw_idle()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv + ['--no-sandbox'])
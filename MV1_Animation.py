@@ -5,79 +5,13 @@ from PyQt5.QtGui import QPixmap
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtCore import QUrl, Qt
 import numpy as np
-import pandas as pd
+from SWC_LOD import loadLOD
 import sys
 import os
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 
-def readSWC(swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-    with open(swc_path, "r") as f:
-        for line in f.readlines():
-            line = line.strip()
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
-    names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6]
-    if mode == 'simple':
-        pass
-    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def get_degree(tswc):   # Degree of node: the number of nodes connected to it
-    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
-    # print(tswc['degree'])
-    n_child = tswc.parent.value_counts()
-    n_child = n_child[n_child.index.isin(tswc.index)]
-    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
-    return tswc
-
-def get_rid(swc):
-    '''
-    Find root node.
-    '''
-    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
-    if rnode.shape[0]<1:
-        return -1
-    return rnode.index[0]
-
-def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
-    if rid is None:
-        rid = get_rid(swc)
-    # print(swc.shape)
-    swc=get_degree(swc)
-    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
-    return idlist
-
-def swc2branches(swc):
-    '''
-    reture branch list of a swc
-    '''
-    keyids=get_keypoint(swc)
-    branches=[]
-    for key in keyids:
-        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
-            continue
-        branch=[]
-        branch.append(key)
-        pkey=swc.loc[key,'parent']
-        while True:
-            branch.append(pkey)
-            if pkey in keyids:
-                break
-            key=pkey
-            pkey=swc.loc[key,'parent']
-        branches.append(branch)
-    return branches
-
 class SettingsDialog(QDialog):
     def __init__(self):
         super(SettingsDialog, self).__init__()
@@ -321,8 +255,7 @@ class MyWindow(QWidget):
     #     self.grid.addWidget(web_view, *pos)
 
     def showSWC(self, fname, pos):
-        swc = readSWC(fname, mode='simple')
-        swc_brs = swc2branches(swc)
+        lod = loadLOD(fname)
 
         # 创建plotly图形
         # fig = make_subplots(rows=1, cols=1, specs=[[{'type': 'scatter3d'}]], subplot_titles=[fname])
@@ -331,13 +264,8 @@ class MyWindow(QWidget):
         fig.update_layout(margin=dict(l=0, r=0, b=0, t=0))
         colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
 
-        for br in swc_brs:
-            br_color = colors[int(swc.loc[br[0], 'type'])]
-            br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-            Xe = br_coords['x'].to_list()
-            Ye = br_coords['y'].to_list()
-            Ze = br_coords['z'].to_list()
-            trace = go.Scatter3d(x=Xe, y=Ye, z=Ze, mode='lines', line=dict(color=br_color, width=3))
+        for br_type, xyz in lod.branches(lod.pick(min(self.screen_width, self.screen_height))):
+            trace = go.Scatter3d(x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2], mode='lines', line=dict(color=colors[br_type], width=3))
             fig.add_trace(trace)
         
         fig.update_scenes(xaxis_visible=False, yaxis_visible=False, zaxis_visible=False)     # 隐藏坐标轴
@@ -2,81 +2,15 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QGridLayout, QFileDialog, QL
                              QMessageBox, QProgressDialog, QHBoxLayout, QVBoxLayout, 
                              QDialog, QLineEdit, QPushButton)
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtGui import QColor, QPainter, QPixmap, QPolygon
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtCore import QTimer, QUrl, Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt5.QtCore import QEventLoop, QPoint, QTimer, QUrl, Qt
+from PyQt5 import sip
 import sys
-import matplotlib.pyplot as plt
-import pandas as pd
+from SWC_Cache import MemoryLRU, ThumbnailCache
+from SWC_Tiles import RenderPool, pixmap_nbytes, render_swc_images, render_swc_tile, rgba_pixmap
+from Video_Thumbnails import VideoThumbnailer
 import os
-import subprocess
-
-def readSWC(swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-    with open(swc_path, "r") as f:
-        for line in f.readlines():
-            line = line.strip()
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
-    names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6]
-    if mode == 'simple':
-        pass
-    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def get_degree(tswc):   # Degree of node: the number of nodes connected to it
-    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
-    # print(tswc['degree'])
-    n_child = tswc.parent.value_counts()
-    n_child = n_child[n_child.index.isin(tswc.index)]
-    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
-    return tswc
-
-def get_rid(swc):
-    '''
-    Find root node.
-    '''
-    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
-    if rnode.shape[0]<1:
-        return -1
-    return rnode.index[0]
-
-def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
-    if rid is None:
-        rid = get_rid(swc)
-    # print(swc.shape)
-    swc=get_degree(swc)
-    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
-    return idlist
-
-def swc2branches(swc):
-    '''
-    reture branch list of a swc
-    '''
-    keyids=get_keypoint(swc)
-    branches=[]
-    for key in keyids:
-        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
-            continue
-        branch=[]
-        branch.append(key)
-        pkey=swc.loc[key,'parent']
-        while True:
-            branch.append(pkey)
-            if pkey in keyids:
-                break
-            key=pkey
-            pkey=swc.loc[key,'parent']
-        branches.append(branch)
-    return branches
 
 class SettingsDialog(QDialog):
     def __init__(self):
@@ -112,9 +46,13 @@ class SettingsDialog(QDialog):
 
         # Video playback speed
         self.speedInput = QLineEdit('0.75')
+        # Memory budget of the rendered SWC tiles
+        self.cacheInput = QLineEdit('96')
         hLayout3 = QHBoxLayout()
         hLayout3.addWidget(QLabel('Video Playback Speed:'))
         hLayout3.addWidget(self.speedInput)
+        hLayout3.addWidget(QLabel('SWC Cache (MB):'))
+        hLayout3.addWidget(self.cacheInput)
         layout.addLayout(hLayout3)
         
         # Submit button
@@ -127,7 +65,7 @@ class SettingsDialog(QDialog):
     def getValues(self):
         return (int(self.widthInput.text()), int(self.heightInput1.text()), 
                 int(self.heightInput2.text()), int(self.xPosInput.text()), 
-                int(self.yPosInput.text()), float(self.speedInput.text()))
+                int(self.yPosInput.text()), float(self.speedInput.text()), int(self.cacheInput.text()))
 
 class MyWindow(QWidget):
     def __init__(self):
@@ -135,7 +73,7 @@ class MyWindow(QWidget):
         super(MyWindow, self).__init__()
         self.mediaPlayers = []         # Used to store all media players
         self.current_index = 0         # The index of the currently displayed file 
-        self.swcCache = {}             # A dictionary to store pre-drawn SWC images       
+        self.swcCache = None           # Pre-drawn SWC tiles (QPixmap), least recently used dropped beyond the budget
         
         # Set a timer to change the displayed files 
         self.timer = QTimer(self)
@@ -145,6 +83,17 @@ class MyWindow(QWidget):
         self.is_dragging = False      # Used to track whether the window is being dragged
         self.old_pos = None           # Used to store the position where the mouse was pressed
 
+        # SWC icons and tiles are drawn in worker processes, results arrive through swcRendered
+        self.renderPool = RenderPool()
+        self.renderPool.finished.connect(self.swcRendered)
+        self.loadingLoop = None
+        self.tilesInFlight = {}       # tileKey -> [future, labels waiting for the tile]
+        # Video frames extracted by ffmpeg processes, results arrive through videoExtracted
+        self.videoThumbnailer = VideoThumbnailer()
+        self.videoThumbnailer.finished.connect(self.videoExtracted)
+        # Icons of the waiting list, kept across sessions in the user's cache directory
+        self.thumbnails = ThumbnailCache()
+
         self.initSettings()
         self.initUI()
 
@@ -169,7 +118,9 @@ class MyWindow(QWidget):
         result = settingsDialog.exec_()
 
         if result == QDialog.Accepted:
-            self.file_width, self.file_height, self.list_height, self.start_x, self.start_y, self.playback_speed = settingsDialog.getValues()
+            (self.file_width, self.file_height, self.list_height, self.start_x, self.start_y,
+             self.playback_speed, self.swc_cache_mb) = settingsDialog.getValues()
+            self.swcCache = MemoryLRU(self.swc_cache_mb << 20, pixmap_nbytes)
         else:
             sys.exit(0)       # Exit the app if the dialog was closed or cancelled
 
@@ -229,72 +180,127 @@ class MyWindow(QWidget):
                 if ret == QMessageBox.Ok:
                     continue       # Let the loop prompt the user again
             else:
+                # One icon per file in the waiting list, filled in as the files are loaded
+                for file in self.supported_files:
+                    iconLabel = QLabel()
+                    iconLabel.setMargin(0)
+                    self.allFilesLayout.addWidget(iconLabel)
+
+                # SWC files: icon and tile drawn together in the process pool (one load per file);
+                # tiles only for the first page (as far as they fit in the cache), the others are
+                # drawn when shown
+                self.progress = progress
+                self.n_loaded = 0
+                icon_size = int((3 * self.file_width) / len(self.supported_files))
+                n_tiles = min(3, self.swcCache.budget // (4 * self.file_width * self.file_height))
                 for i, file in enumerate(self.supported_files):
-                    if progress.wasCanceled():
-                        break      # Exit the loop if user cliked cancel
-
                     file_path = os.path.join(self.dir_name, file)
-                    iconLabel = QLabel()
+                    if file.endswith(('.swc', '.eswc')):
+                        key = ThumbnailCache.key(file_path, kind="swc", icon=icon_size,
+                                                 tile=[self.file_width, self.file_height])
+                        cached = self.thumbnails.get(key)
+                        tile_key = self.tileKey(file_path) if i < n_tiles else None
+                        if tile_key in self.swcCache or tile_key in self.tilesInFlight:
+                            tile_key = None
+                        if cached is None:
+                            future = self.renderPool.submit(("icon", i, file_path, key, tile_key), render_swc_images,
+                                                            file_path, (self.file_width, self.file_height),
+                                                            icon_size, tile_key is not None)
+                            if tile_key is not None:
+                                self.tilesInFlight[tile_key] = [future, []]
+                            continue
+                        self.setIcon(i, QPixmap(cached))
+                        if tile_key is not None:
+                            self.submitTile(file_path)
+                        self.fileLoaded()
+                        continue
                     if file.endswith(('.mp4', '.avi')):
-                        thumbnail_path = self.extractVideoThumbnail(file_path)
-                        pixmap = QPixmap(thumbnail_path)
+                        # Placeholder until ffmpeg has written the frame (kept if it cannot)
+                        key = ThumbnailCache.key(file_path, kind="video", icon=icon_size)
+                        cached = self.thumbnails.get(key, ".jpg")
+                        if cached is None:
+                            self.setIcon(i, self.videoPlaceholder(icon_size))
+                            self.videoThumbnailer.submit((i, file_path, key), file_path,
+                                                         self.thumbnails.temp_path(".jpg"), icon_size)
+                            continue
+                        self.setIcon(i, QPixmap(cached))
                     elif file.endswith(('.jpg', '.png')):
-                        pixmap = QPixmap(file_path)
-                    elif file.endswith(('.swc', '.eswc')):
-                        thumbnail_path = self.generateSWCThumbnail(file_path)
-                        pixmap = QPixmap(thumbnail_path)
-
-                        canvas = self.generateSWCCache(file_path)
-                        self.swcCache[file_path] = canvas
-                    
-                    # Check if pixmap is empty
-                    if pixmap.isNull():
-                        print(f"Error loading image: {file}")
-                    else:
-                        size = int((3 * self.file_width) / len(self.supported_files))
-                        # pixmap = pixmap.scaled(100, 100, Qt.KeepAspectRatio)    # 小图标的大小为100x100
-                        pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio)   
-                        iconLabel.setPixmap(pixmap)
-                        iconLabel.setMargin(0)
-                        self.allFilesLayout.addWidget(iconLabel) 
-                    
-                    progress.setValue(i+1)        # Update progress bar
+                        self.setIcon(i, QPixmap(file_path))
+                    self.fileLoaded()
                     QApplication.processEvents()  # Ensure GUI stays responsive
 
+                # Wait for the pool while the event loop keeps running
+                if self.n_loaded < len(self.supported_files) and not progress.wasCanceled():
+                    self.loadingLoop = QEventLoop()
+                    progress.canceled.connect(self.loadingLoop.quit)
+                    self.loadingLoop.exec_()
+                    self.loadingLoop = None
+                if progress.wasCanceled():
+                    self.renderPool.cancel_pending()
+                    self.videoThumbnailer.cancel_pending()
+
                 progress.close()       # Close prpgress bar when done
                 break                  # Exit the loop once files are loaded
 
-    def extractVideoThumbnail(self, video_path):
-        output_image_path = video_path + ".thumbnail.jpg"
-        cmd = ["ffmpeg", "-i", video_path, "-vframes", "1", output_image_path]
-        subprocess.run(cmd)
-        return output_image_path
-    
-    def generateSWCThumbnail(self, swc_path):
-        output_image_path = swc_path + ".thumbnail.jpg"
-
-        fig = plt.figure(figsize=(self.file_width/80, self.file_height/80))
-        ax = fig.add_subplot(111, projection='3d')
-        # ax.set_facecolor('black')
-        # fig.patch.set_facecolor('black')
-
-        swc = readSWC(swc_path, mode='simple')
-        swc_brs = swc2branches(swc)
-        colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
-        for br in swc_brs:
-            br_color = colors[int(swc.loc[br[0], 'type'])]
-            br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-            Xe = br_coords['x'].to_list()
-            Ye = br_coords['y'].to_list()
-            Ze = br_coords['z'].to_list()
-            ax.plot3D(Xe, Ye, Ze, color=br_color, linewidth=1)
-        ax.axis('off')
-        ax.grid(False)
-        plt.tight_layout()
-        plt.savefig(output_image_path, dpi=80, bbox_inches='tight', pad_inches=0)
-        plt.close(fig)
-        
-        return output_image_path
+    def setIcon(self, index, pixmap):
+        if pixmap.isNull():
+            print(f"Error loading image: {self.supported_files[index]}")
+            return
+        size = int((3 * self.file_width) / len(self.supported_files))
+        # pixmap = pixmap.scaled(100, 100, Qt.KeepAspectRatio)    # 小图标的大小为100x100
+        iconLabel = self.allFilesLayout.itemAt(index).widget()
+        iconLabel.setPixmap(pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def fileLoaded(self):
+        self.n_loaded += 1
+        self.progress.setValue(self.n_loaded)        # Update progress bar
+        if self.n_loaded == len(self.supported_files) and self.loadingLoop is not None:
+            self.loadingLoop.quit()
+
+    def swcRendered(self, tag, result, error):
+        # A job of the render pool is done: an icon (with the tile if requested) or a tile to show
+        kind, index, file_path = tag[:3]
+        if error is not None:
+            print(f"Error drawing {file_path}: {error}")
+        elif kind == "icon":
+            icon, tile = result
+            pixmap = rgba_pixmap(icon)
+            self.setIcon(index, pixmap)
+            temp_path = self.thumbnails.temp_path()
+            if pixmap.save(temp_path, "PNG"):
+                self.thumbnails.put_file(tag[3], temp_path)
+            if tile is not None:
+                self.tileReady(tag[4], rgba_pixmap(tile))
+        else:
+            self.tileReady(tag[3], rgba_pixmap(result))
+        if error is not None:
+            self.tilesInFlight.pop(tag[3] if kind == "tile" else tag[4], None)
+        if kind == "icon":
+            self.fileLoaded()
+
+    def videoExtracted(self, tag, image_path, error):
+        # ffmpeg is done with a video: its frame replaces the placeholder
+        index, file_path, key = tag
+        if error:
+            print(f"Error extracting a frame of {file_path}: {error}")
+        else:
+            self.setIcon(index, QPixmap(self.thumbnails.put_file(key, image_path, ".jpg")))
+        self.fileLoaded()
+
+    @staticmethod
+    def videoPlaceholder(size):
+        # Grey square with a play sign, for videos without a frame (yet)
+        pixmap = QPixmap(size, size)
+        pixmap.fill(QColor(48, 48, 48))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(200, 200, 200))
+        r = size // 6
+        painter.drawPolygon(QPolygon([QPoint(size // 2 - r, size // 2 - r), QPoint(size // 2 - r, size // 2 + r),
+                                      QPoint(size // 2 + r, size // 2)]))
+        painter.end()
+        return pixmap
     
     # # Create pre-drawn images for each SWC file and store them in swcCache
     # def preloadSWCImages(self):
@@ -359,12 +365,9 @@ class MyWindow(QWidget):
         self.current_index += 3
 
     def closeEvent(self, event):
-        # Delete all generated thumbnail file when app was closed
-        for file in self.supported_files:        
-            thumbnail_path = os.path.join(self.dir_name, file + ".thumbnail.jpg")
-            if os.path.exists(thumbnail_path):
-                os.remove(thumbnail_path)
-        
+        # Thumbnails stay in the user's cache (ThumbnailCache) for the next session
+        self.renderPool.shutdown()
+        self.videoThumbnailer.shutdown()
         super().closeEvent(event)
         
     def showVideo(self, fname, pos):
@@ -406,38 +409,38 @@ class MyWindow(QWidget):
         label.setScaledContents(True)        # Ensure the image always fills the QLabel
         self.grid.addWidget(label, *pos)
 
-    def generateSWCCache(self, swc_path):
-        # Draw the SWC files and return a canvas
-        fig = plt.figure(figsize=(self.file_width, self.file_height))  # Adjust figure size if necessary
-        ax = fig.add_subplot(111, projection='3d')
-
-        swc = readSWC(swc_path, mode='simple')
-        swc_brs = swc2branches(swc)
-        colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
-        for br in swc_brs:
-            br_color = colors[int(swc.loc[br[0], 'type'])]
-            br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-            Xe = br_coords['x'].to_list()
-            Ye = br_coords['y'].to_list()
-            Ze = br_coords['z'].to_list()
-            ax.plot3D(Xe, Ye, Ze, color=br_color, linewidth=0.5)  # Reduce line width to improve performance
-        ax.axis('off')
-        ax.grid(False)
-
-        canvas = FigureCanvas(fig)
-        # canvas.setFixedSize(self.file_width, self.file_height)
-        # plt.tight_layout()
-        plt.close(fig)
-
-        return canvas
-    
+    @staticmethod
+    def tileKey(swc_path):
+        # Tiles are drawn again when the file changes
+        return os.path.abspath(swc_path), os.stat(swc_path).st_mtime_ns
+
+    def submitTile(self, fname, label=None):
+        # Draw the tile of `fname` in the pool unless it is already being drawn; `label` gets it when done
+        key = self.tileKey(fname)
+        job = self.tilesInFlight.get(key)
+        if job is None or job[0].cancelled():
+            future = self.renderPool.submit(("tile", None, fname, key), render_swc_tile, fname,
+                                            self.file_width, self.file_height)
+            job = self.tilesInFlight[key] = [future, job[1] if job else []]
+        if label is not None:
+            job[1].append(label)
+
+    def tileReady(self, key, pixmap):
+        self.swcCache.put(key, pixmap)
+        for label in self.tilesInFlight.pop(key, [None, []])[1]:
+            if not sip.isdeleted(label):        # still on screen
+                label.setPixmap(pixmap)
+
     def showSWC(self, fname, pos):
-        canvas = self.swcCache.get(fname)  # Retrieve the pre-generated canvas
-        if canvas:
-            self.grid.addWidget(canvas, *pos)
+        label = QLabel()
+        label.setFixedSize(self.file_width, self.file_height)
+        self.grid.addWidget(label, *pos)
+        pixmap = self.swcCache.get(self.tileKey(fname))
+        if pixmap is not None:
+            label.setPixmap(pixmap)
         else:
-            # Handle the error if the canvas does not exist
-            print(f"Error: Canvas for {fname} not found")
+            # Not drawn yet or evicted from the cache: drawn in the pool, shown when done
+            self.submitTile(fname, label)
     
     # def showSWC(self, fname, pos):
     #     fig = plt.figure(figsize=(self.file_width, self.file_height))
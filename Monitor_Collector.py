@@ -0,0 +1,127 @@
+'''
+Background collector of the production monitor statistics for Data_Production_Monitor.py.
+
+The extraction (manifest refresh, summary counts, annotators of the neurons changed within
+24 hours) runs in a QThread on a QTimer schedule; results are posted back to the GUI thread
+through queued signals, so the window never blocks on the server:
+
+    statistics_ready(dict)    summarize() counts plus batch_24h / batch_unchanged path lists
+    attribution_ready(list)   [(file name, reconstructor ids, checker ids)] of batch_24h
+    refresh_failed(str)       error message of a failed refresh (previous values are kept)
+    refresh_finished(float)   duration of the refresh in seconds, also in last_refresh_seconds
+'''
+import os
+import time
+import traceback
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from Monitor_Information_Extraction import collect_statistics, connect as connect_default
+from Monitor_Manifest import DATA_ROOT, ManifestIndex
+from Monitor_Remote import SFTPPool, project_annotators
+
+
+def _ids(values):
+    return "  ".join(f"{v:g}" if isinstance(v, float) else str(v) for v in values)
+
+
+class MonitorCollector(QObject):
+    statistics_ready = pyqtSignal(dict)
+    attribution_ready = pyqtSignal(list)
+    refresh_failed = pyqtSignal(str)
+    refresh_finished = pyqtSignal(float)
+    _refresh_requested = pyqtSignal()
+    _stop_requested = pyqtSignal()
+
+    def __init__(self, interval=600, connect=None, db_path=None):
+        '''
+        interval: seconds between refreshes. connect: callable returning a Transport
+        (default: Monitor_Information_Extraction.connect, i.e. $MONITOR_DATA_SOURCE or the
+        storage server). The connection and the SQLite index are opened in the worker thread.
+        '''
+        super().__init__()
+        self.interval = interval
+        self.db_path = db_path
+        self._connect = connect or connect_default
+        self._transport = self._index = self._pool = self._timer = None
+        self.last_refresh_seconds = None
+        self.last_refresh_time = None
+
+        self._thread = QThread()
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self._setup)
+        self._refresh_requested.connect(self.refresh)
+        self._stop_requested.connect(self._teardown)
+
+    def start(self):
+        '''
+        Start the worker thread; the first refresh runs immediately.
+        '''
+        self._thread.start()
+
+    def request_refresh(self):
+        '''
+        Refresh now (from any thread) without waiting for the timer.
+        '''
+        self._refresh_requested.emit()
+
+    def stop(self, timeout=10000):
+        '''
+        Stop the timer, close the connection and end the worker thread. A refresh in progress
+        is finished first; after `timeout` ms its connection is closed under it, so that it
+        fails at once, and the thread is waited for until it has ended.
+        '''
+        if self._thread.isRunning():
+            self._stop_requested.emit()
+            if not self._thread.wait(timeout):
+                transport = self._transport
+                if transport is not None:
+                    transport.close()
+                self._thread.wait()
+
+    @pyqtSlot()
+    def _setup(self):
+        self._timer = QTimer()
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(int(self.interval * 1000))
+        self.refresh()
+
+    @pyqtSlot()
+    def _teardown(self):
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None      # deleted here, in the thread that owns it
+        self._close()
+        self._thread.quit()
+
+    def _open(self):
+        if self._transport is None:
+            self._transport = self._connect()
+            self._pool = SFTPPool(self._transport.open_session, size=8)
+            self._index = ManifestIndex(self.db_path, root=self._transport.root or DATA_ROOT)
+
+    def _close(self):
+        for resource in (self._index, self._pool, self._transport):
+            if resource is not None:
+                resource.close()
+        self._transport = self._index = self._pool = None
+
+    @pyqtSlot()
+    def refresh(self):
+        '''
+        One collection pass, in the worker thread.
+        '''
+        start = time.perf_counter()
+        try:
+            self._open()
+            summary = collect_statistics(self._transport, self._index)
+            self.statistics_ready.emit(summary)
+            attribution = project_annotators(self._transport, summary['batch_24h'], self._pool)
+            self.attribution_ready.emit([(os.path.basename(path), _ids(reconstruction), _ids(checker))
+                                         for path, (reconstruction, checker) in attribution.items()])
+        except Exception as e:
+            traceback.print_exc()
+            self._close()   # reconnect on the next refresh
+            self.refresh_failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.last_refresh_seconds = time.perf_counter() - start
+            self.last_refresh_time = time.time()
+            self.refresh_finished.emit(self.last_refresh_seconds)
@@ -1,214 +1,99 @@
-import paramiko
-import pandas as pd
-import io
 import os
-
-# 从服务器读取SWC文件
-def readSWC(sftp, swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-
-    #  使用DFTP读取远程文件的内容
-    with sftp.file(swc_path, "r") as f:
-        lines = (f.read().decode('utf-8')).splitlines()
-        for line in lines:
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-
-    content = '\n'.join(lines[n_skip:])
-    buffer = io.StringIO(content)
-
-    names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode"]
-    # names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
-    if mode == 'simple':
-        pass
-
-    df = pd.read_csv(buffer, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def sftp_exists(sftp, path):
-    """Check if a path exists on the remote server."""
-    try:
-        sftp.stat(path)
-        return True
-    except IOError as e:
-        # errno 2 means file not found
-        if e.errno == 2:
-            return False
-        raise
-
-
-# 设置服务器的信息
+import shutil
+import subprocess
+import sys
+import tempfile
+from Monitor_Manifest import DATA_ROOT, ManifestIndex, RANGES, summarize
+from Monitor_Remote import SFTPPool, clear_folder, project_annotators, stage_files
+from Monitor_Transport import SSHTransport, open_transport
+
+# 设置服务器的信息（可用环境变量 MONITOR_DATA_SOURCE 改为其他服务器或本地目录，见 Monitor_Transport.py）
 hostname = '114.117.165.134'
 port = 22        # 默认SSH端口是22
 username = 'shengdianjiang'
 password = 'jiang@tcloud'
 
-# 创建SSH客户端
-client = paramiko.SSHClient()
-client.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # 自动添加主机密钥
-client.connect(hostname, port, username, password)
-
-# 创建SFTP客户端
-sftp = client.open_sftp()
-
-# # 检查每个子目录的读取权限并输出结果
-# check_permission_cmd = """
-# for dir in /TeraConvertedBrain/data/{17298..201586}/*/*; do
-#     if [ -d "$dir" ]; then  # 检查是否是目录
-#         if [ -r "$dir" ]; then
-#             echo "$dir: Permission granted"
-#         else
-#             echo "$dir: Permission denied"
-#         fi
-#     fi
-# done
-# """
-
-# stdin, stdout, stderr = client.exec_command(check_permission_cmd)
-# permission_output = stdout.read().decode().strip()
-# print(permission_output)
-
-# cmd = 'ls -R /TeraConvertedBrain/data/'
-# stdin, stdout, stderr = client.exec_command(cmd)
-# output = stdout.read().decode().strip()
-# print(output)
-
-# 执行命令来获取数据数量
-# cmd = 'find /TeraConvertedBrain/data/{17298..201586}/*/* -type f -name "*.eswc" | wc -l'
-cmd = """
-for dir in /TeraConvertedBrain/data/{17298..201586}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc"
-    fi
-done | wc -l
-"""
-
-cmd_24h = """
-for dir in /TeraConvertedBrain/data/{17298..201586}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc" -mtime 0
-    fi
-done
-"""
-cmd_unchanged = """
-for dir in /TeraConvertedBrain/data/{17298..201586}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc" -mtime +30
-    fi
-done
-"""
-
-cmd_mb = """
-for dir in /TeraConvertedBrain/data/{00011..02327}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc"
-    fi
-done | wc -l
-"""
-
-cmd_mb_2023 = """
-for dir in /TeraConvertedBrain/data/{00011..02327}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc" -newermt 2023-01-01 ! -newermt 2024-01-01
-    fi
-done | wc -l
-"""
-
-cmd_hb = """
-for dir in /TeraConvertedBrain/data/{15257..201598}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc"
-    fi
-done | wc -l
-"""
-
-cmd_hb_2023 = """
-for dir in /TeraConvertedBrain/data/{15257..201598}; do
-    if [ -d "$dir" ]; then
-        find "$dir" -type f -name "*.eswc" -newermt 2023-01-01 ! -newermt 2024-01-01
-    fi
-done | wc -l
-"""
-
-stdin, stdout, stderr = client.exec_command(cmd)
-data = int(stdout.read().decode().strip())
-print(f"Reconstruction neurons (this batch): {data}")
-
-stdin, stdout, stderr = client.exec_command(cmd_24h)
-data_24h = stdout.read().decode().strip().split('\n')
-print(f"Reconstruction neurons within 24h (this batch): {len(data_24h)}")
-for path in data_24h:
-    swc = readSWC(sftp, path, mode='simple')
-    reconstruction = swc[swc['r']>1000]['r'].drop_duplicates().tolist()
-    checker = swc[swc['mode']>1000]['mode'].drop_duplicates().tolist()
-    print(path, reconstruction, checker)
-
-stdin, stdout, stderr = client.exec_command(cmd_unchanged)
-unchanged = stdout.read().decode().strip().split('\n')
-print(f"Reconstruction neurons unchanged within 30 days (this batch): {len(unchanged)}")
-
-# 创建临时目录
 temp_folder = "/tmp/eswc_temp_folder"
-if sftp_exists(sftp, temp_folder):
-    # 删除临时文件夹中的内容
-    for file in sftp.listdir(temp_folder):
-        sftp.remove(os.path.join(temp_folder, file))
-else:
-    sftp.mkdir(temp_folder)
-
-# 将一个月内未修改的数据复制到临时文件夹中
-for file in unchanged:
-    remote_source_path = file
-    remote_dest_path = os.path.join(temp_folder, os.path.basename(file)).replace("\\", "/")
-    copy_cmd = f"cp {remote_source_path} {remote_dest_path}"
-    stdin, stdout, stderr = client.exec_command(copy_cmd)
-
-    error = stderr.read().decode().strip()
-    if error:
-        print(f"Error copying file: {error}")
-    # else:
-    #     print(f"File copied succussfully from {remote_source_path} to {remote_dest_path}")
-
-# 调用v3d的globa_neuron_feature插件
-v3d = "/tmp/Vaa3D_x.1.1.2_Ubuntu/Vaa3D-x.sh"
-output_csv = "/tmp/features.csv"
-cmd_v3d = f"{v3d} -x global_neuron_feature -f compute_feature_in_folder -i {temp_folder} -o {output_csv}"
-stdin, stdout, stderr = client.exec_command(cmd_v3d)
-# print(f"Reconstruction neurons unchanged within 30 days (this batch): {len(unchanged)}")
-
-## 处理csv文件
-
-# 删除临时文件夹中的内容
-# for file in sftp.listdir(temp_folder):
-#     sftp.remove(os.path.join(temp_folder, file))
-
-stdin, stdout, stderr = client.exec_command(cmd_mb)
-mb = int(stdout.read().decode().strip())
-print(f"Total mouse brain neurons: {mb}")
-
-stdin, stdout, stderr = client.exec_command(cmd_mb_2023)
-mb_2023 = int(stdout.read().decode().strip())
-print(f"Mouse brain neurons in 2023: {mb_2023}")
-
-stdin, stdout, stderr = client.exec_command(cmd_hb)
-hb = int(stdout.read().decode().strip())
-print(f"Total human brain neurons: {hb}")
-
-stdin, stdout, stderr = client.exec_command(cmd_hb_2023)
-hb_2023 = int(stdout.read().decode().strip())
-print(f"Human brain neurons in 2023: {hb_2023}")
-
-# 关闭连接
-client.close()
-
-
-
-
 
 
+def connect():
+    '''
+    Transport to the data source: $MONITOR_DATA_SOURCE if set, otherwise the storage server.
+    '''
+    return open_transport() or SSHTransport(hostname, port, username, password)
+
+
+def collect_statistics(transport, index):
+    '''
+    Refresh the manifest index and return the monitor statistics: the summarize() counts plus
+    the batch_24h / batch_unchanged path lists from the index.
+    '''
+    # 服务器数据目录中所有 ESWC 文件的清单（脑编号、路径、大小、修改时间）保存在本地 SQLite 索引中，
+    # 每次只向服务器查询上次同步后修改过的文件和目录；各项统计在本地由清单计算
+    stats = index.refresh(transport)
+    print(f"Manifest refresh: {stats['updated']} updated, {stats['deleted']} deleted, {stats['seconds']:.1f} s")
+    summary = summarize(index.manifest())
+    summary['batch_24h'] = index.changed_within(brain_range=RANGES['batch'])
+    summary['batch_unchanged'] = index.unchanged_for(30, brain_range=RANGES['batch'])
+    return summary
+
+
+def extract_features(transport, pool, paths, output_csv="features.csv", qc_csv="qc_report.csv"):
+    '''
+    Stage `paths` on the server, download them and compute the feature and QC reports.
+    '''
+    # 清空（或创建）服务器上的临时文件夹，并将数据一次性复制（或硬链接）到其中
+    clear_folder(transport, temp_folder)
+    staged, failed = stage_files(transport, paths, temp_folder)
+    print(f"Staged {len(staged)} file(s) in {temp_folder}")
+    for path, error in failed.items():
+        print(f"Error copying file {path}: {error}")
+
+    # 计算全局形态特征（SWC_Features.py，替代服务器上因 Qt 版本问题无法运行的 Vaa3D global_neuron_feature 插件）
+    # 以子进程运行，进程池不会重新执行本脚本
+    local_temp_folder = tempfile.mkdtemp(prefix="eswc_temp_folder_")
+    remote = list(dict.fromkeys(f"{temp_folder}/{os.path.basename(path)}" for path in staged))
+    for path, local, error in pool.download(remote, local_temp_folder):
+        if error is not None:
+            print(f"Error downloading {path}: {error}")
+    feature_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SWC_Features.py")
+    subprocess.run([sys.executable, feature_script, local_temp_folder, output_csv], check=True)
+
+    # 质量检查报告（SWC_QC.py，与 report_data_forBBP_1891.csv 格式相同，替代无法编译的 neuronQC 插件）
+    qc_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SWC_QC.py")
+    subprocess.run([sys.executable, qc_script, local_temp_folder, qc_csv], check=True)
+    shutil.rmtree(local_temp_folder, ignore_errors=True)
+
+
+def main():
+    transport = connect()
+    index = ManifestIndex(root=transport.root or DATA_ROOT)
+    pool = SFTPPool(transport.open_session, size=8)
+    try:
+        summary = collect_statistics(transport, index)
+        print(f"Reconstruction neurons (this batch): {summary['batch_total']}")
+        data_24h = summary['batch_24h']
+        print(f"Reconstruction neurons within 24h (this batch): {len(data_24h)}")
+
+        # 标注者/检查者编号在服务器端提取（每批文件一条命令），读取失败的文件回退到 readSWC 下载整个文件
+        attribution = project_annotators(transport, data_24h, pool)
+        for path, (reconstruction, checker) in attribution.items():
+            print(path, reconstruction, checker)
+
+        unchanged = summary['batch_unchanged']
+        print(f"Reconstruction neurons unchanged within 30 days (this batch): {len(unchanged)}")
+        extract_features(transport, pool, unchanged)
+
+        print(f"Total mouse brain neurons: {summary['mouse_total']}")
+        print(f"Mouse brain neurons in 2023: {summary['mouse_2023']}")
+        print(f"Total human brain neurons: {summary['human_total']}")
+        print(f"Human brain neurons in 2023: {summary['human_2023']}")
+    finally:
+        # 关闭连接
+        index.close()
+        pool.close()
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+'''
+Manifest of the ESWC files on the storage server, from a single traversal of the data tree.
+
+One `find` prints (size, mtime, path) for every .eswc under DATA_ROOT; the brain id is the
+first directory below the root. All the statistics of the production monitor (counts per
+brain range, files changed within 24 hours, files unchanged for 30 days, 2023 splits) are
+then computed locally from that table, with the same semantics as the former per-range
+`find` loops (`-mtime 0`, `-mtime +30`, `-newermt 2023-01-01 ! -newermt 2024-01-01`).
+
+ManifestIndex keeps the manifest in a local SQLite database and refreshes it incrementally:
+only files and directories modified since the last refresh are transferred.
+'''
+import io
+import os
+import shlex
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from SWC_Cache import CACHE_DIR
+
+DATA_ROOT = "/TeraConvertedBrain/data"
+
+# Brain id ranges of the monitor, as the bash brace expansions {lo..hi} they replace
+RANGES = {
+    "batch": ("17298", "201586"),       # reconstruction batch being monitored
+    "mouse": ("00011", "02327"),
+    "human": ("15257", "201598"),
+}
+
+MANIFEST_COLUMNS = ["brain_id", "path", "size", "mtime"]
+DAY = 86400
+
+
+def manifest_command(root=DATA_ROOT):
+    '''
+    Shell command listing "size<TAB>mtime<TAB>relative path" for every ESWC file under `root`.
+    '''
+    return f"find {shlex.quote(root)} -mindepth 2 -type f -name '*.eswc' -printf '%s\\t%T@\\t%P\\n'"
+
+
+def parse_manifest(data, root=DATA_ROOT):
+    '''
+    Manifest DataFrame (brain_id, path, size, mtime) from the output of manifest_command.
+    '''
+    if not data.strip():
+        return pd.DataFrame({"brain_id": pd.Series(dtype=str), "path": pd.Series(dtype=str),
+                             "size": pd.Series(dtype=np.int64), "mtime": pd.Series(dtype=np.float64)})
+    df = pd.read_csv(io.BytesIO(data), sep="\t", header=None, names=["size", "mtime", "rel"],
+                     dtype={"size": np.int64, "mtime": np.float64, "rel": str}, quoting=3)
+    rel = df.pop("rel")
+    df.insert(0, "path", root.rstrip("/") + "/" + rel)
+    df.insert(0, "brain_id", rel.str.split("/", n=1).str[0].astype(str))
+    return df
+
+
+def scan_manifest(transport, root=DATA_ROOT):
+    '''
+    Manifest of the data source (a Monitor_Transport transport), with one command.
+    '''
+    return parse_manifest(transport.output(manifest_command(root)), root)
+
+
+def in_range(brain_ids, lo, hi):
+    '''
+    Mask of the brain ids produced by the bash brace expansion {lo..hi}: plain integers,
+    or zero-padded to a common width when either bound starts with 0.
+    '''
+    ids = pd.Series(brain_ids, dtype=str)
+    value = pd.to_numeric(ids, errors="coerce")
+    mask = value.between(int(lo), int(hi)) & ids.str.fullmatch(r"\d+")
+    if lo.startswith("0") or hi.startswith("0"):
+        width = max(len(lo), len(hi))
+        mask &= ids.str.len() == width
+    else:
+        mask &= ~ids.str.startswith("0") | (ids == "0")
+    return mask.to_numpy()
+
+
+def _year_start(year):
+    return time.mktime((year, 1, 1, 0, 0, 0, 0, 0, -1))    # local time, as find -newermt
+
+
+def brain_table(manifest, now=None):
+    '''
+    Per-brain counts: files, bytes, files changed within 24 hours, unchanged for 30 days,
+    modified in 2023, and the latest modification time.
+    '''
+    now = time.time() if now is None else now
+    age = now - manifest["mtime"]
+    flags = pd.DataFrame({
+        "brain_id": manifest["brain_id"],
+        "files": 1,
+        "bytes": manifest["size"],
+        "changed_24h": (age >= 0) & (age < DAY),                   # find -mtime 0
+        "unchanged_30d": age >= 31 * DAY,                          # find -mtime +30
+        "in_2023": (manifest["mtime"] > _year_start(2023)) & (manifest["mtime"] <= _year_start(2024)),
+        "last_mtime": manifest["mtime"],
+    })
+    return flags.groupby("brain_id", sort=True).agg(
+        files=("files", "sum"), bytes=("bytes", "sum"), changed_24h=("changed_24h", "sum"),
+        unchanged_30d=("unchanged_30d", "sum"), in_2023=("in_2023", "sum"), last_mtime=("last_mtime", "max"))
+
+
+def summarize(manifest, now=None):
+    '''
+    The monitor statistics from a manifest: {range}_total and {range}_2023 counts for every
+    entry of RANGES, and the batch_24h / batch_unchanged path lists.
+    '''
+    now = time.time() if now is None else now
+    table = brain_table(manifest, now)
+    summary = {}
+    for name, (lo, hi) in RANGES.items():
+        rows = table[in_range(table.index, lo, hi)]
+        summary[f"{name}_total"] = int(rows["files"].sum())
+        summary[f"{name}_2023"] = int(rows["in_2023"].sum())
+
+    batch = manifest[in_range(manifest["brain_id"], *RANGES["batch"])]
+    age = now - batch["mtime"]
+    summary["batch_24h"] = batch.loc[(age >= 0) & (age < DAY), "path"].tolist()
+    summary["batch_unchanged"] = batch.loc[age >= 31 * DAY, "path"].tolist()
+    return summary
+
+
+_FILE_FORMAT = "'F\\t%s\\t%T@\\t%p\\n'"
+_DIR_FORMAT = "'D\\t%p\\n'"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT NOT NULL, brain_id TEXT NOT NULL,
+                                  size INTEGER NOT NULL, mtime REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime);
+CREATE INDEX IF NOT EXISTS files_brain ON files (brain_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class ManifestIndex:
+    '''
+    Manifest of the server persisted in SQLite, one row per ESWC file (path, brain id, size,
+    mtime). The first refresh scans the whole tree; later ones ask the server only for the
+    files and directories modified since the previous refresh started (the watermark, taken
+    from the server clock), so the transfer and the local work scale with the number of
+    changes. Deletions are found by listing the changed directories: removing or renaming an
+    entry updates the mtime of its directory. A directory moved in from elsewhere keeps its
+    old file mtimes and is scanned whole.
+    '''
+    def __init__(self, db_path=None, root=DATA_ROOT):
+        self.root = root.rstrip("/")
+        self.db_path = db_path or os.path.join(CACHE_DIR, "manifest.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.executescript(_SCHEMA)
+        self.last_refresh = None
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    @property
+    def watermark(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        root = self.db.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        return float(row[0]) if row and root and root[0] == self.root else None
+
+    def refresh(self, transport, full=False):
+        '''
+        Bring the index up to date with the data source (a Monitor_Transport transport).
+        Returns, and keeps in `last_refresh`, a summary of what was done.
+        '''
+        start = time.perf_counter()
+        watermark = None if full else self.watermark
+        if watermark is None:
+            stats = self._full_scan(transport)
+        else:
+            stats = self._incremental(transport, watermark)
+        stats["seconds"] = time.perf_counter() - start
+        stats["files"] = len(self)
+        self.last_refresh = stats
+        return stats
+
+    def _full_scan(self, transport):
+        data = transport.output("date +%s.%N; " + manifest_command(self.root))
+        now, _, data = data.partition(b"\n")
+        df = parse_manifest(data, self.root)
+        with self.db:
+            self.db.execute("DELETE FROM files")
+            self.db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", zip(
+                df["path"], df["path"].str.rsplit("/", n=1).str[0], df["brain_id"],
+                df["size"].tolist(), df["mtime"].tolist()))
+            self._set_meta(float(now))
+        return {"full": True, "updated": len(df), "deleted": 0, "changed_dirs": 0}
+
+    def _incremental(self, transport, watermark):
+        root = shlex.quote(self.root)
+        newer = f"-newermt @{watermark:.9f}"
+        data = transport.output(f"date +%s.%N; find {root} \\( -type d {newer} -printf {_DIR_FORMAT} \\) "
+                             f"-o \\( -type f -name '*.eswc' {newer} -printf {_FILE_FORMAT} \\)")
+        now, _, data = data.partition(b"\n")
+        files, dirs = self._parse(data)
+
+        # Current content of every changed directory: its files replace the indexed ones,
+        # indexed subtrees that are gone are deleted, unknown subdirectories are scanned whole
+        deleted = 0
+        new_dirs = []
+        changed = set(dirs)
+        for i in range(0, len(dirs), 500):
+            batch = dirs[i:i + 500]
+            listing = transport.output("find " + " ".join(shlex.quote(d) for d in batch) +
+                            f" -mindepth 1 -maxdepth 1 \\( -type d -printf {_DIR_FORMAT} \\) "
+                            f"-o \\( -type f -name '*.eswc' -printf {_FILE_FORMAT} \\)")
+            current_files, current_dirs = self._parse(listing)
+            files.extend(current_files)
+            present = {f[0] for f in current_files}
+            subdirs = set(current_dirs)
+            for d in batch:
+                for (path,) in self.db.execute("SELECT path FROM files WHERE dir = ?", (d,)).fetchall():
+                    if path not in present:
+                        deleted += self._delete(path)
+                if d == self.root:
+                    children = self.db.execute("SELECT DISTINCT brain_id FROM files")
+                else:
+                    children = self.db.execute("SELECT DISTINCT substr(dir, ?) FROM files WHERE dir > ? AND dir < ?",
+                                               (len(d) + 2, d + "/", d + "0"))
+                known = {d + "/" + sub.split("/", 1)[0] for (sub,) in children}
+                for sub in known - subdirs:
+                    deleted += self._delete_tree(sub)
+                new_dirs.extend(sub for sub in subdirs - known
+                                if sub.rpartition("/")[0] == d and sub not in changed)
+        for i in range(0, len(new_dirs), 500):
+            data = transport.output("find " + " ".join(shlex.quote(d) for d in new_dirs[i:i + 500]) +
+                         f" -type f -name '*.eswc' -printf {_FILE_FORMAT}")
+            files.extend(self._parse(data)[0])
+
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", files)
+            self._set_meta(float(now))
+        return {"full": False, "updated": len({f[0] for f in files}), "deleted": deleted,
+                "changed_dirs": len(dirs)}
+
+    def _parse(self, data):
+        '''
+        File rows (path, dir, brain_id, size, mtime) of brain folders, and directory paths.
+        '''
+        files, dirs = [], []
+        for line in data.decode().splitlines():
+            kind, _, rest = line.partition("\t")
+            if kind == "D":
+                dirs.append(rest.rstrip("/"))
+            elif kind == "F":
+                size, mtime, path = rest.split("\t", 2)
+                rel = path[len(self.root) + 1:]
+                if "/" in rel:
+                    files.append((path, path.rpartition("/")[0], rel.split("/", 1)[0], int(size), float(mtime)))
+        return files, dirs
+
+    def _delete(self, path):
+        return self.db.execute("DELETE FROM files WHERE path = ?", (path,)).rowcount
+
+    def _delete_tree(self, d):
+        return self.db.execute("DELETE FROM files WHERE dir = ? OR (dir > ? AND dir < ?)",
+                               (d, d + "/", d + "0")).rowcount
+
+    def _set_meta(self, watermark):
+        self.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                            [("watermark", repr(watermark)), ("root", self.root)])
+
+    def manifest(self):
+        '''
+        The whole index as a manifest DataFrame, e.g. for summarize().
+        '''
+        return pd.read_sql_query("SELECT brain_id, path, size, mtime FROM files ORDER BY path", self.db)
+
+    def _query(self, where, args, brain_range):
+        df = pd.read_sql_query(f"SELECT brain_id, path FROM files WHERE {where} ORDER BY path", self.db, params=args)
+        if brain_range is not None:
+            df = df[in_range(df["brain_id"], *brain_range)]
+        return df["path"].tolist()
+
+    def changed_within(self, seconds=DAY, brain_range=None, now=None):
+        '''
+        Paths modified within the last `seconds` (find -mtime 0 for one day), optionally only
+        for the brain ids of `brain_range`, e.g. RANGES["batch"].
+        '''
+        now = time.time() if now is None else now
+        return self._query("mtime > ? AND mtime <= ?", (now - seconds, now), brain_range)
+
+    def unchanged_for(self, days=30, brain_range=None, now=None):
+        '''
+        Paths not modified for more than `days` whole days (find -mtime +days).
+        '''
+        now = time.time() if now is None else now
+        return self._query("mtime <= ?", (now - (days + 1) * DAY,), brain_range)
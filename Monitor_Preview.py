@@ -0,0 +1,87 @@
+'''
+Background loading of the monitor's 3D neuron preview.
+
+PreviewLoader parses a neuron and builds its PolyData (SWC_Render.neuron_polydata) in a
+QThread; the GUI thread only renders the finished mesh. Every request supersedes the earlier
+ones: a request still queued is skipped, and one in progress stops at the next stage (load,
+branches, mesh) and posts nothing. Finished meshes are kept in a MemoryLRU keyed by the
+absolute path and mtime of the file, so a recently viewed neuron is shown without reloading.
+
+    mesh_ready(int, str, object)   request id, path, pyvista.PolyData
+    load_failed(int, str, str)     request id, path, error message
+'''
+import os
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from SWC_Cache import MemoryLRU
+from SWC_Render import neuron_polydata
+from SWC_Tree import NeuronTree
+
+
+def mesh_key(swc_path):
+    return os.path.abspath(swc_path), os.stat(swc_path).st_mtime_ns
+
+
+def mesh_nbytes(mesh):
+    return mesh.actual_memory_size * 1024       # reported in KiB
+
+
+class PreviewLoader(QObject):
+    mesh_ready = pyqtSignal(int, str, object)
+    load_failed = pyqtSignal(int, str, str)
+    _load_requested = pyqtSignal(int, str)
+
+    def __init__(self, cache_bytes=256 << 20):
+        '''
+        cache_bytes: memory budget of the mesh cache.
+        '''
+        super().__init__()
+        self.cache = MemoryLRU(cache_bytes, mesh_nbytes)
+        self.latest = 0
+        self.n_built = 0
+        self._thread = QThread()
+        self.moveToThread(self._thread)
+        self._load_requested.connect(self._load)
+        self._thread.start()
+
+    def request(self, swc_path):
+        '''
+        Show `swc_path`: returns the cached mesh when the file has not changed since it was
+        built, otherwise None and the mesh follows through mesh_ready with request id
+        `latest`. Either way, earlier requests are cancelled.
+        '''
+        self.latest += 1
+        mesh = self.cache.get(mesh_key(swc_path))
+        if mesh is None:
+            self._load_requested.emit(self.latest, swc_path)
+        return mesh
+
+    def cancel(self):
+        self.latest += 1
+
+    def stop(self, timeout=10000):
+        self.cancel()
+        self._thread.quit()
+        self._thread.wait(timeout)
+
+    @pyqtSlot(int, str)
+    def _load(self, request_id, swc_path):
+        try:
+            if request_id != self.latest:
+                return
+            key = mesh_key(swc_path)
+            mesh = self.cache.get(key)
+            if mesh is None:
+                tree = NeuronTree.load(swc_path)
+                if request_id != self.latest:
+                    return
+                tree.branches
+                if request_id != self.latest:
+                    return
+                mesh = neuron_polydata(tree)
+                self.n_built += 1
+                self.cache.put(key, mesh)
+        except (OSError, ValueError) as e:
+            self.load_failed.emit(request_id, swc_path, f"{type(e).__name__}: {e}")
+            return
+        if request_id == self.latest:
+            self.mesh_ready.emit(request_id, swc_path, mesh)
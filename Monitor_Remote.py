@@ -0,0 +1,270 @@
+'''
+Helpers of the data production monitor that talk to the storage server, kept apart from
+Monitor_Information_Extraction.py (which connects on import) so that they can be reused.
+'''
+import json
+import os
+import shlex
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import paramiko
+import pandas as pd
+from SWC_IO import ESWC_COLUMNS, readSWCStream
+
+
+# 从服务器读取SWC文件
+def readSWC(sftp, swc_path, mode='simple', chunk_size=1 << 20):  # pandas DataFrame
+    '''
+    Stream a remote SWC/ESWC file into a DataFrame indexed by node id ("##n") with the columns
+    type, x, y, z, r, parent, seg_id, level, mode. The file is read in large prefetched SFTP
+    chunks and parsed straight into typed columns, without decoding it into a string first.
+    '''
+    with sftp.open(swc_path, "rb") as f:
+        if hasattr(f, "prefetch"):      # SFTP file: pipeline the reads of the whole file
+            f.prefetch()
+        cols = readSWCStream(f, ESWC_COLUMNS[:10], chunk_size)
+    df = pd.DataFrame({name: col for name, col in cols.items() if name != "n"},
+                      index=pd.Index(cols["n"], name="##n"))
+    return df.reindex(columns=list(ESWC_COLUMNS[1:10]))      # plain SWC: ESWC extras are NaN
+
+
+
+class SFTPPool:
+    '''
+    Bounded pool of SFTP sessions for bulk reads and downloads. Each worker thread keeps its
+    own session (from `open_sftp`, e.g. a transport's open_session: one SFTP channel each),
+    so up to `size` files are in flight at once and every transfer pipelines its reads with
+    prefetch. Transient failures (broken channel, timeout) are retried on a fresh session;
+    missing files and permission errors are not.
+    '''
+    def __init__(self, open_sftp, size=8, retries=2, backoff=0.5):
+        self.open_sftp = open_sftp
+        self.size = size
+        self.retries = retries
+        self.backoff = backoff
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(size, thread_name_prefix="sftp")
+
+    def _session(self, reopen=False):
+        sftp = getattr(self._local, "sftp", None)
+        if sftp is None or reopen:
+            if sftp is not None:
+                try:
+                    sftp.close()
+                except (OSError, EOFError, paramiko.SSHException):
+                    pass
+            sftp = self._local.sftp = self.open_sftp()
+            with self._lock:
+                self._sessions.append(sftp)
+        return sftp
+
+    def _call(self, func, path):
+        for attempt in range(self.retries + 1):
+            try:
+                return func(self._session(reopen=attempt > 0), path), None
+            except (FileNotFoundError, PermissionError) as e:
+                return None, e
+            except (OSError, EOFError, paramiko.SSHException) as e:
+                if attempt == self.retries:
+                    return None, e
+                time.sleep(self.backoff * 2 ** attempt)
+            except ValueError as e:         # e.g. a file that cannot be parsed
+                return None, e
+
+    def imap(self, func, paths):
+        '''
+        Apply func(sftp, path) to every path and yield (path, result, error) in the order of
+        `paths`, with at most 2 * size calls submitted ahead of the consumer.
+        '''
+        pending = deque()
+        for path in paths:
+            pending.append((path, self._executor.submit(self._call, func, path)))
+            if len(pending) >= 2 * self.size:
+                path, future = pending.popleft()
+                yield (path, *future.result())
+        while pending:
+            path, future = pending.popleft()
+            yield (path, *future.result())
+
+    def read(self, paths):
+        '''
+        readSWC of every remote path, as (path, DataFrame, error) in order.
+        '''
+        return self.imap(readSWC, paths)
+
+    def download(self, paths, local_dir):
+        '''
+        Download every remote path into `local_dir` (same file name), as (path, local path, error).
+        '''
+        def get(sftp, path):
+            local = os.path.join(local_dir, os.path.basename(path))
+            sftp.get(path, local)
+            return local
+        return self.imap(get, paths)
+
+    def close(self):
+        self._executor.shutdown()
+        for sftp in self._sessions:
+            try:
+                sftp.close()
+            except (OSError, EOFError, paramiko.SSHException):
+                pass
+        self._sessions = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Runs on the server: one JSON line per file with the unique r > 1000 (reconstructor) and
+# mode > 1000 (checker) ids, as integers in order of appearance, i.e. what the 24h loop
+# extracts with readSWC, without transferring the file
+_ANNOTATOR_AWK = r'''
+BEGIN { for (i = 1; i < 32; i++) esc[sprintf("%c", i)] = sprintf("\\u%04x", i); esc["\\"] = "\\\\"; esc["\""] = "\\\"" }
+function json_string(s,    i, c, out) {
+    for (i = 1; i <= length(s); i++) { c = substr(s, i, 1); out = out ((c in esc) ? esc[c] : c) }
+    return out
+}
+function flush() {
+    if (file == "") return
+    printf "{\"path\": \"%s\", \"reconstruction\": [%s], \"checker\": [%s]}\n", json_string(file), rec, chk
+}
+FNR == 1 { flush(); file = FILENAME; rec = chk = ""; split("", seen_r); split("", seen_m) }
+/^#/ || NF < 7 { next }
+$6 + 0 > 1000 && !(int($6) in seen_r) { seen_r[int($6)] = 1; rec = rec (rec == "" ? "" : ", ") int($6) }
+NF >= 10 && $10 + 0 > 1000 && !(int($10) in seen_m) { seen_m[int($10)] = 1; chk = chk (chk == "" ? "" : ", ") int($10) }
+END { flush() }
+'''
+
+
+def awk_operand(path):
+    '''
+    `path` as an awk file operand: awk takes "name=value" operands for variable assignments
+    and "-" for stdin, so relative paths are given as "./path".
+    '''
+    return path if path.startswith("/") else "./" + path
+
+
+def annotator_command(paths):
+    '''
+    Shell command printing the annotator JSON line of every file in `paths`; the "path" of
+    each line is awk_operand(path).
+    '''
+    return "awk " + shlex.quote(_ANNOTATOR_AWK) + " " + " ".join(shlex.quote(awk_operand(p)) for p in paths)
+
+
+def annotators(swc):
+    '''
+    Reconstructor (r > 1000) and checker (mode > 1000) ids of a neuron read with readSWC,
+    as integers like the server-side pass returns them.
+    '''
+    reconstruction = swc[swc['r'] > 1000]['r'].astype(int).drop_duplicates().tolist()
+    checker = swc[swc['mode'] > 1000]['mode'].astype(int).drop_duplicates().tolist()
+    return reconstruction, checker
+
+
+def project_annotators(transport, paths, pool=None, batch_size=500):
+    '''
+    Reconstructor and checker ids of remote ESWC files, {path: (reconstruction, checker)},
+    extracted on the server with one command per `batch_size` files so that only a few
+    bytes per neuron are transferred. Files the server-side pass did not report (unreadable,
+    empty, or awk failed) are read whole with readSWC through `pool` (an SFTPPool) when
+    given; files still missing are left out with a warning.
+    '''
+    paths = [p for p in paths if p]
+    result = {}
+    for i in range(0, len(paths), batch_size):
+        batch = paths[i:i + batch_size]
+        operands = {awk_operand(p): p for p in batch}
+        status, out, err = transport.run(annotator_command(batch))
+        for line in out.decode().splitlines():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                print(f"Warning: server-side annotator projection: unreadable line {line!r}")
+                continue
+            if row["path"] in operands:
+                result[operands[row["path"]]] = (row["reconstruction"], row["checker"])
+        error = err.decode(errors="replace").strip()
+        if error:
+            print(f"Warning: server-side annotator projection: {error}")
+
+    if pool is not None:
+        for path, swc, error in pool.read([p for p in paths if p not in result]):
+            if error is None:
+                result[path] = annotators(swc)
+            else:
+                print(f"Warning: {path}: {error}")
+    missing = [p for p in paths if p not in result]
+    if missing:
+        print(f"Warning: no annotators for {len(missing)} of {len(paths)} file(s): "
+              + ", ".join(repr(p) for p in missing[:5]) + (", ..." if len(missing) > 5 else ""))
+    return {path: result[path] for path in paths if path in result}
+
+
+# Runs on the server with the NUL-separated source paths on stdin: hard link (when $2 is set)
+# or copy each file into the folder $1, one "OK<TAB>path" or "ERR<TAB>path<TAB>message" line each
+_STAGE_SH = r'''
+dest=$1
+while IFS= read -r -d '' src; do
+    if [ -n "$2" ] && ln -f -- "$src" "$dest/" 2>/dev/null; then
+        printf 'OK\t%s\n' "$src"
+    elif msg=$(cp -- "$src" "$dest/" 2>&1); then
+        printf 'OK\t%s\n' "$src"
+    else
+        printf 'ERR\t%s\t%s\n' "$src" "$(printf '%s' "$msg" | tr '\t\n' '  ')"
+    fi
+done
+'''
+
+
+def clear_folder(transport, folder):
+    '''
+    Create `folder` on the server, or empty it if it exists, with one remote command.
+    '''
+    if folder.rstrip("/") in ("", "/", "/tmp"):
+        raise ValueError(f"Refusing to clear {folder!r}")
+    status, out, err = transport.run(f"mkdir -p {shlex.quote(folder)} && find {shlex.quote(folder)} -mindepth 1 -delete")
+    if status != 0:
+        raise OSError(f"Could not clear {folder}: {err.decode(errors='replace').strip()}")
+
+
+def stage_files(transport, paths, folder, link=True, batch_bytes=1 << 20):
+    '''
+    Copy the remote files `paths` into the remote `folder` (same file names), one command per
+    `batch_bytes` of file list: the list is sent on stdin, and each file is hard linked when
+    `link` and the folder is on the same file system, copied otherwise. Returns
+    (staged paths, {path: error}).
+    '''
+    paths = [p for p in paths if p]
+    command = f"bash -c {shlex.quote(_STAGE_SH)} stage {shlex.quote(folder)} {'1' if link else ''}"
+    staged, failed = [], {}
+    done = set()
+    start = 0
+    while start < len(paths):
+        end, size = start + 1, len(paths[start].encode()) + 1
+        while end < len(paths) and size + len(paths[end].encode()) + 1 <= batch_bytes:
+            size += len(paths[end].encode()) + 1
+            end += 1
+        batch = paths[start:end]
+        status, out, err = transport.run(command, "".join(p + "\0" for p in batch).encode())
+        for line in out.decode().splitlines():
+            line_status, _, rest = line.partition("\t")
+            if line_status == "OK":
+                staged.append(rest)
+                done.add(rest)
+            elif line_status == "ERR":
+                path, _, message = rest.partition("\t")
+                failed[path] = message
+        error = err.decode(errors="replace").strip()
+        for path in batch:
+            if path not in failed and path not in done:     # the command stopped early
+                failed[path] = error or f"not staged (exit status {status})"
+        start = end
+    return staged, failed
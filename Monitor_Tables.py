@@ -0,0 +1,285 @@
+'''
+Table models of the production monitor (GF features and QC report panels).
+
+The data stays columnar: one NumPy array per column, taken from the DataFrame once. A
+QTableView only asks for the cells it paints, so a value is formatted when its row scrolls
+into view instead of one QTableWidgetItem being created per cell up front. Sorting and
+filtering (ColumnFilterProxy) work on whole columns too: a filter is a boolean mask built
+with NumPy/pandas operations and the view order is an index array, never a Python call per row.
+'''
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QAbstractProxyModel, QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor, QDoubleValidator
+from PyQt5.QtWidgets import QCheckBox, QComboBox, QHBoxLayout, QLabel, QLineEdit, QPushButton, QWidget
+from SWC_QC import QC_COLUMNS
+
+# Highlight (and count as failing) values above these; the check columns of the QC report
+# are numbers of failing neurites/segments, so any non-zero value is a failure
+QC_THRESHOLDS = {name: 0 for name in QC_COLUMNS[:9]}
+
+HIGHLIGHT = QColor(255, 205, 205)
+
+
+class ColumnTableModel(QAbstractTableModel):
+    '''
+    Read-only model over the columns of a DataFrame. Cells display as str() of the value,
+    like the former QTableWidgetItem(str(df.iloc[row, col])) tables.
+    '''
+    def __init__(self, df=None, columns=None, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.arrays = []
+        if df is not None:
+            self.set_frame(df, columns)
+
+    def set_frame(self, df, columns=None):
+        '''
+        Replace the data with the `columns` of `df` (default: all).
+        '''
+        self.beginResetModel()
+        self.names = list(columns if columns is not None else df.columns)
+        self.arrays = [df[name].to_numpy() for name in self.names]
+        self.endResetModel()
+
+    def column(self, name):
+        return self.arrays[self.names.index(name)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or not self.arrays else len(self.arrays[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(self.arrays[index.column()][index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.names[section] if orientation == Qt.Horizontal else str(section + 1)
+        return None
+
+
+class ColumnFilterProxy(QAbstractProxyModel):
+    '''
+    Sorted, filtered view of a ColumnTableModel with threshold highlighting.
+
+    The view rows are `rows`, an array of source rows: the current sort order (one cached
+    argsort per column) restricted to the rows of the filter mask. Cells whose value is above
+    `thresholds[column]` get a highlighted background; a row with any such cell is failing.
+    '''
+    def __init__(self, source=None, thresholds=None, name_column=0, parent=None):
+        super().__init__(parent)
+        self.thresholds = dict(QC_THRESHOLDS if thresholds is None else thresholds)
+        self.name_column = name_column
+        self.ranges = {}
+        self.name = ""
+        self.failing_only = False
+        self.rows = np.zeros(0, dtype=np.int64)
+        self._position = np.zeros(0, dtype=np.int64)
+        self.failing = np.zeros(0, dtype=bool)
+        self._highlight = {}
+        self._orders = {}
+        self._names = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        if source is not None:
+            self.setSourceModel(source)
+
+    def setSourceModel(self, source):
+        self.beginResetModel()
+        if self.sourceModel() is not None:
+            self.sourceModel().modelAboutToBeReset.disconnect(self.beginResetModel)
+            self.sourceModel().modelReset.disconnect(self._source_reset)
+        super().setSourceModel(source)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._source_reset)
+        self._prepare()
+        self.endResetModel()
+
+    def _source_reset(self):
+        self._prepare()
+        self.endResetModel()
+
+    def _prepare(self):
+        # Per-source precomputation: highlight masks, failing rows, lower-case names
+        source = self.sourceModel()
+        n_rows = source.rowCount()
+        self._orders = {}
+        self._names = None
+        if source.names and n_rows:
+            self._names = pd.Series(source.arrays[self.name_column], dtype=str).str.lower()
+        self._highlight = {source.names.index(name): source.column(name) > threshold
+                           for name, threshold in self.thresholds.items() if name in source.names}
+        self.failing = np.zeros(n_rows, dtype=bool)
+        for mask in self._highlight.values():
+            self.failing |= mask
+        self._select()
+
+    def _order(self):
+        if self._sort_column < 0:
+            return np.arange(self.sourceModel().rowCount())
+        order = self._orders.get(self._sort_column)
+        if order is None:
+            order = self._orders[self._sort_column] = np.argsort(self.sourceModel().arrays[self._sort_column],
+                                                                 kind="stable")
+        return order if self._sort_order == Qt.AscendingOrder else order[::-1]
+
+    def _select(self):
+        source = self.sourceModel()
+        mask = np.ones(source.rowCount(), dtype=bool)
+        for name, (lo, hi) in self.ranges.items():
+            values = source.column(name)
+            if lo is not None:
+                mask &= values >= lo
+            if hi is not None:
+                mask &= values <= hi
+        if self.name and self._names is not None:
+            mask &= self._names.str.contains(self.name.lower(), regex=False).to_numpy()
+        if self.failing_only:
+            mask &= self.failing
+        order = self._order()
+        self.rows = order[mask[order]]
+        self._position = np.full(len(mask), -1, dtype=np.int64)
+        self._position[self.rows] = np.arange(len(self.rows))
+
+    def set_filter(self, ranges=None, name="", failing_only=False):
+        '''
+        Keep the rows with every `ranges` column within its (lo, hi) bounds (None: open), the
+        name column containing `name` (case-insensitive) and, with `failing_only`, a value
+        above its threshold.
+        '''
+        self.beginResetModel()
+        self.ranges = {name: bounds for name, bounds in (ranges or {}).items() if bounds != (None, None)}
+        self.name = name
+        self.failing_only = failing_only
+        self._select()
+        self.endResetModel()
+
+    def set_thresholds(self, thresholds):
+        self.beginResetModel()
+        self.thresholds = dict(thresholds)
+        self._prepare()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.beginResetModel()
+        self._sort_column = column
+        self._sort_order = order
+        self._select()
+        self.endResetModel()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows) and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.sourceModel() is None else self.sourceModel().columnCount()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[index.row()]), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid() or self._position[index.row()] < 0:
+            return QModelIndex()
+        return self.index(int(self._position[index.row()]), index.column())
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.BackgroundRole and index.isValid():
+            mask = self._highlight.get(index.column())
+            return HIGHLIGHT if mask is not None and mask[self.rows[index.row()]] else None
+        return super().data(index, role)
+
+
+class ColumnFilterBar(QWidget):
+    '''
+    Filter controls of a ColumnFilterProxy: name substring, a min/max range for any numeric
+    column (ranges of several columns combine) and "any failing check".
+    '''
+    def __init__(self, proxy, parent=None):
+        super().__init__(parent)
+        self.proxy = proxy
+        self.ranges = {}
+        source = proxy.sourceModel()
+
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("Name contains")
+        self.column_box = QComboBox()
+        self.column_box.addItems([name for name, values in zip(source.names, source.arrays)
+                                  if values.dtype.kind in "iuf"])
+        self.min_edit = QLineEdit()
+        self.max_edit = QLineEdit()
+        for edit, text in ((self.min_edit, "min"), (self.max_edit, "max")):
+            edit.setPlaceholderText(text)
+            edit.setValidator(QDoubleValidator())
+            edit.setMaximumWidth(90)
+        self.failing_box = QCheckBox("Any failing check")
+        clear_button = QPushButton("Clear")
+        self.count_label = QLabel()
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        for widget in (self.name_edit, self.column_box, self.min_edit, self.max_edit, self.failing_box,
+                       clear_button, self.count_label):
+            layout.addWidget(widget)
+        self.setLayout(layout)
+
+        self.name_edit.textChanged.connect(self.apply)
+        self.min_edit.textChanged.connect(self._range_edited)
+        self.max_edit.textChanged.connect(self._range_edited)
+        self.column_box.currentTextChanged.connect(self._column_selected)
+        self.failing_box.toggled.connect(self.apply)
+        clear_button.clicked.connect(self.clear)
+        self._show_count()
+
+    @staticmethod
+    def _number(text):
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+    def _range_edited(self):
+        self.ranges[self.column_box.currentText()] = (self._number(self.min_edit.text()),
+                                                      self._number(self.max_edit.text()))
+        self.apply()
+
+    def _column_selected(self, name):
+        # Show the range of the selected column without re-filtering
+        lo, hi = self.ranges.get(name, (None, None))
+        for edit, value in ((self.min_edit, lo), (self.max_edit, hi)):
+            edit.blockSignals(True)
+            edit.setText("" if value is None else f"{value:g}")
+            edit.blockSignals(False)
+
+    def apply(self):
+        self.proxy.set_filter(self.ranges, self.name_edit.text(), self.failing_box.isChecked())
+        self._show_count()
+
+    def clear(self):
+        self.ranges = {}
+        for widget in (self.name_edit, self.min_edit, self.max_edit, self.failing_box):
+            widget.blockSignals(True)
+        self.name_edit.clear()
+        self.min_edit.clear()
+        self.max_edit.clear()
+        self.failing_box.setChecked(False)
+        for widget in (self.name_edit, self.min_edit, self.max_edit, self.failing_box):
+            widget.blockSignals(False)
+        self.apply()
+
+    def _show_count(self):
+        self.count_label.setText(f"{self.proxy.rowCount()} / {self.proxy.sourceModel().rowCount()}")
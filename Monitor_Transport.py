@@ -0,0 +1,199 @@
+'''
+Access to the data source of the production monitor: shell commands and file reads.
+
+SSHTransport works on the storage server through one persistent SSH connection (keepalive,
+reconnected on demand); LocalTransport works directly on the local file system, for running
+on the storage host itself or for benchmarks. Both offer:
+
+    run(cmd, stdin=None)    -> (exit status, stdout bytes, stderr bytes), bash syntax
+    output(cmd, stdin=None) -> stdout bytes, stderr printed as a warning
+    open_session()          -> object with open(path, mode), get(path, local), listdir(path),
+                               stat(path) and close(), e.g. for SFTPPool
+
+`root` is the data tree of the source when it is not the default one. open_transport()
+picks the backend from the MONITOR_DATA_SOURCE environment variable: a local data tree, or
+ssh://user@host[:port][/data/root] (password in MONITOR_SSH_PASSWORD, otherwise key-based
+login).
+'''
+import os
+import shutil
+import subprocess
+import threading
+from urllib.parse import urlparse
+import paramiko
+
+
+class Transport:
+    root = None
+
+    def run(self, cmd, stdin=None):
+        raise NotImplementedError
+
+    def open_session(self):
+        raise NotImplementedError
+
+    def output(self, cmd, stdin=None):
+        status, out, err = self.run(cmd, stdin)
+        err = err.decode(errors="replace").strip()
+        if err:
+            print(f"Warning: {err}")
+        return out
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SSHTransport(Transport):
+    def __init__(self, hostname, port=22, username=None, password=None, root=None, keepalive=30, retries=1,
+                 connect_timeout=15, **connect_kwargs):
+        '''
+        connect_timeout: seconds allowed for the TCP connection, the SSH banner and the
+        authentication each (paramiko waits for the OS otherwise, minutes for a silent host).
+        connect_kwargs: passed on to paramiko.SSHClient.connect (key_filename, ...).
+        The connection is opened on first use and reopened when it has dropped, until close().
+        '''
+        self.root = root
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.retries = retries
+        self.connect_kwargs = {"timeout": connect_timeout, "banner_timeout": connect_timeout,
+                               "auth_timeout": connect_timeout, **connect_kwargs}
+        self.n_connects = 0
+        self._client = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"SSHTransport({self.username}@{self.hostname}:{self.port})"
+
+    @property
+    def client(self):
+        '''
+        The connected paramiko SSHClient, reconnecting if the connection is gone.
+        '''
+        with self._lock:
+            transport = self._client.get_transport() if self._client is not None else None
+            if transport is None or not transport.is_active():
+                if self._closed:
+                    raise OSError(f"{self!r} is closed")
+                if self._client is not None:
+                    self._client.close()
+                client = paramiko.SSHClient()
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # 自动添加主机密钥
+                client.connect(self.hostname, self.port, self.username, self.password, **self.connect_kwargs)
+                client.get_transport().set_keepalive(self.keepalive)
+                self._client = client
+                self.n_connects += 1
+            return self._client
+
+    def run(self, cmd, stdin=None):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._exec(cmd, stdin)
+            except (paramiko.SSHException, EOFError, OSError):
+                if attempt == self.retries:
+                    raise
+                self.drop()
+
+    def _exec(self, cmd, stdin):
+        # stdin is sent and stderr drained in helper threads while stdout is read here, as
+        # subprocess' communicate() does: a command writing output as it reads its input
+        # never waits on a full channel window
+        i, o, e = self.client.exec_command(cmd)
+        err = []
+
+        def feed():
+            try:
+                if stdin:
+                    i.write(stdin)
+                i.channel.shutdown_write()
+            except (paramiko.SSHException, EOFError, OSError):
+                pass                # the command exited without reading all of its input
+
+        helpers = [threading.Thread(target=feed, daemon=True),
+                   threading.Thread(target=lambda: err.append(e.read()), daemon=True)]
+        for thread in helpers:
+            thread.start()
+        out = o.read()
+        for thread in helpers:
+            thread.join()
+        return o.channel.recv_exit_status(), out, err[0] if err else b""
+
+    def open_session(self):
+        return self.client.open_sftp()
+
+    def drop(self):
+        '''
+        Forget the current connection; the next call reconnects.
+        '''
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+
+    def close(self):
+        '''
+        Close the connection for good. Safe to call from another thread: commands and file
+        reads in progress fail at once instead of reconnecting.
+        '''
+        self._closed = True
+        self.drop()
+
+
+class LocalSession:
+    '''
+    The subset of paramiko.SFTPClient used by the monitor, on the local file system.
+    '''
+    def open(self, path, mode="r"):
+        return open(path, mode if "b" in mode else mode + "b")
+
+    def get(self, path, local):
+        shutil.copyfile(path, local)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def close(self):
+        pass
+
+
+class LocalTransport(Transport):
+    def __init__(self, root=None):
+        self.root = root
+
+    def __repr__(self):
+        return f"LocalTransport({self.root!r})"
+
+    def run(self, cmd, stdin=None):
+        result = subprocess.run(["bash", "-c", cmd], input=stdin or b"", capture_output=True)
+        return result.returncode, result.stdout, result.stderr
+
+    def open_session(self):
+        return LocalSession()
+
+
+def open_transport(source=None, password=None, **connect_kwargs):
+    '''
+    Transport for `source` (default: $MONITOR_DATA_SOURCE): ssh://user@host[:port] or a local
+    path. Returns None when no source is configured.
+    '''
+    source = source or os.environ.get("MONITOR_DATA_SOURCE")
+    if not source:
+        return None
+    if source.startswith("ssh://"):
+        url = urlparse(source)
+        return SSHTransport(url.hostname, url.port or 22, url.username,
+                            password or os.environ.get("MONITOR_SSH_PASSWORD"), url.path or None, **connect_kwargs)
+    return LocalTransport(os.path.abspath(source))
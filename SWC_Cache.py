@@ -0,0 +1,314 @@
+'''
+Binary neuron cache: typed columns plus precomputed branch offsets, memory-mapped on load.
+
+Each source file gets one sidecar in the cache directory, named after its absolute path and
+stamped with the source size and mtime; a stamp mismatch means the sidecar is stale and the
+text file is parsed again. MemoryLRU is the in-memory counterpart for objects built from
+neurons (meshes, rendered tiles), bounded by their total size in bytes. ThumbnailCache keeps
+the viewers' thumbnails across sessions in the `thumbnails` folder of the cache directory.
+
+    python SWC_Cache.py test/ [--cache-dir DIR] [--force]
+'''
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from SWC_IO import readSWCArrays
+from SWC_Topology import swc2branches
+
+MAGIC = b"SWCBIN02"
+ALIGN = 64
+CACHE_DIR = os.environ.get("SWC_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "swc_cache"))
+
+
+def source_stamp(swc_path):
+    st = os.stat(swc_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def cache_path(swc_path, cache_dir=None, suffix=".swcbin"):
+    key = hashlib.sha1(os.path.abspath(swc_path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or CACHE_DIR, key + suffix)
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_sidecar(path, swc_path, arrays, stamp=None):
+    '''
+    Write named arrays to `path`, stamped with the size and mtime of `swc_path`. Pass the
+    `stamp` taken before the source was read: a file saved during the parse then leaves a
+    sidecar that is stale, instead of old data under the new stamp.
+    '''
+    size, mtime_ns = stamp or source_stamp(swc_path)
+    entries = []
+    pos = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        entries.append({"name": name, "dtype": arr.dtype.str, "shape": list(arr.shape), "offset": pos})
+        pos = _aligned(pos + arr.nbytes)
+    header = json.dumps({"source": os.path.abspath(swc_path), "size": size, "mtime_ns": mtime_ns,
+                         "arrays": entries}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A unique name per writer: threads of one process may write the same sidecar at once
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for entry, arr in zip(entries, arrays.values()):
+                f.seek(data_start + entry["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.truncate(data_start + pos)
+        os.replace(tmp_path, path)     # atomic, readers never see a half-written sidecar
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def map_sidecar(path, swc_path):
+    '''
+    Memory-map the arrays of a sidecar. Returns a dict of read-only arrays, or None if the
+    sidecar is missing or its stamp does not match `swc_path` any more.
+    '''
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_len))
+        if (header["size"], header["mtime_ns"]) != source_stamp(swc_path):
+            return None
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    arrays = {}
+    for entry in header["arrays"]:
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        start = data_start + entry["offset"]
+        arrays[entry["name"]] = mm[start:start + int(np.prod(shape)) * dtype.itemsize].view(dtype).reshape(shape)
+    return arrays
+
+
+def save_cache(swc_path, swc, offsets, index, cache_dir=None, stamp=None):
+    '''
+    Write the columns and branch arrays of `swc_path` to its sidecar and return the sidecar path.
+    `stamp`: source_stamp() of the file taken before it was parsed.
+    '''
+    arrays = dict(swc)
+    arrays["branch_offsets"] = np.asarray(offsets, dtype=np.int64)
+    arrays["branch_index"] = np.asarray(index, dtype=np.int32)
+    return write_sidecar(cache_path(swc_path, cache_dir), swc_path, arrays, stamp)
+
+
+def load_cache(swc_path, cache_dir=None):
+    '''
+    Memory-map the sidecar of `swc_path`. Returns (swc, offsets, index), or None if it is missing or stale.
+    '''
+    arrays = map_sidecar(cache_path(swc_path, cache_dir), swc_path)
+    if arrays is None:
+        return None
+    offsets = arrays.pop("branch_offsets")
+    index = arrays.pop("branch_index")
+    return arrays, offsets, index
+
+
+def loadNeuron(swc_path, cache_dir=None):
+    '''
+    Columns and branches of a SWC/ESWC file, from the binary cache when it is fresh,
+    otherwise parsed from text and written back to the cache.
+    '''
+    cached = load_cache(swc_path, cache_dir)
+    if cached is not None:
+        return cached
+    stamp = source_stamp(swc_path)
+    swc = readSWCArrays(swc_path)
+    offsets, index = swc2branches(swc)
+    try:
+        save_cache(swc_path, swc, offsets, index, cache_dir, stamp)
+    except OSError as e:
+        print(f"Warning: could not write cache for {swc_path}: {e}")
+    return swc, offsets, index
+
+
+class MemoryLRU:
+    '''
+    Least-recently-used cache holding at most `budget` bytes, as measured by `sizeof(value)`.
+    A value larger than the whole budget is not kept. Thread-safe.
+    '''
+    def __init__(self, budget, sizeof):
+        self.budget = budget
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()         # key -> (value, size), oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.budget:
+                return
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return default
+            self.nbytes -= item[1]
+            return item[0]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+
+class ThumbnailCache:
+    '''
+    Thumbnail images shared across sessions, one file per (source path, size, mtime, render
+    parameters) key, so a changed source or different parameters give a new entry. The
+    total size is capped: files are touched when used and the least recently used ones are
+    removed first. Entries are written atomically, several viewers can share the folder.
+    '''
+    def __init__(self, cache_dir=None, max_bytes=256 << 20):
+        self.dir = os.path.join(cache_dir or CACHE_DIR, "thumbnails")
+        self.max_bytes = max_bytes
+        os.makedirs(self.dir, exist_ok=True)
+        self.nbytes = sum(entry.stat().st_size for entry in os.scandir(self.dir) if entry.is_file())
+
+    @staticmethod
+    def key(source_path, **params):
+        size, mtime_ns = source_stamp(source_path)
+        stamp = json.dumps([os.path.abspath(source_path), size, mtime_ns, params], sort_keys=True)
+        return hashlib.sha1(stamp.encode("utf-8")).hexdigest()
+
+    def get(self, key, suffix=".png"):
+        '''
+        Path of the cached thumbnail, or None.
+        '''
+        path = os.path.join(self.dir, key + suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, suffix=".png"):
+        '''
+        Fresh file name in the cache folder for a producer to write to before put_file().
+        '''
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=".tmp_", dir=self.dir)
+        os.close(fd)
+        return path
+
+    def put_file(self, key, src_path, suffix=".png"):
+        '''
+        Move a finished thumbnail into the cache and return its path.
+        '''
+        path = os.path.join(self.dir, key + suffix)
+        size = os.path.getsize(src_path)
+        try:
+            size -= os.path.getsize(path)       # replacing an existing entry
+        except OSError:
+            pass
+        os.replace(src_path, path)
+        self.nbytes += size
+        if self.nbytes > self.max_bytes:
+            self.evict()
+        return path
+
+    def evict(self):
+        '''
+        Remove the least recently used thumbnails until the folder is below 90% of the cap;
+        temporary files left by producers that died are removed first.
+        '''
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.dir):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if not entry.name.startswith(".tmp_"):
+                entries.append((st.st_mtime, st.st_size, entry.path))
+            elif st.st_mtime < now - 3600:
+                entries.append((0, st.st_size, entry.path))
+        entries.sort()
+        self.nbytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.nbytes <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.nbytes -= size
+
+
+def convert_dir(swc_dir, cache_dir=None, force=False):
+    '''
+    Pre-convert every SWC/ESWC file in a directory. Returns the number of files (re)written.
+    '''
+    n_written = 0
+    for fname in sorted(os.listdir(swc_dir)):
+        if not fname.endswith((".swc", ".eswc")):
+            continue
+        swc_path = os.path.join(swc_dir, fname)
+        if not force and load_cache(swc_path, cache_dir) is not None:
+            continue
+        stamp = source_stamp(swc_path)
+        swc = readSWCArrays(swc_path)
+        offsets, index = swc2branches(swc)
+        print(f"{fname} -> {save_cache(swc_path, swc, offsets, index, cache_dir, stamp)}")
+        n_written += 1
+    return n_written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-convert SWC/ESWC files to the binary neuron cache")
+    parser.add_argument("swc_dir")
+    parser.add_argument("--cache-dir", default=None, help=f"default: {CACHE_DIR}")
+    parser.add_argument("--force", action="store_true", help="rewrite sidecars that are still fresh")
+    args = parser.parse_args()
+    n = convert_dir(args.swc_dir, args.cache_dir, args.force)
+    print(f"{n} file(s) converted")
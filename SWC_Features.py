@@ -0,0 +1,218 @@
+'''
+Global morphology features of neurons, a NumPy port of the Vaa3D `global_neuron_feature`
+plugin (compute_feature_in_folder) with the same definitions and the same CSV schema.
+
+    python SWC_Features.py SWC_DIR features.csv [--processes N]
+
+As in the plugin, size features (tips, bifurcations, width, length, ...) cover every node,
+while branch-based features follow the tree of the first root (parent == -1) only.
+'''
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from SWC_IO import SWC_COLUMNS, readSWCArrays
+from SWC_Topology import parent_rows, pointer_jump
+
+FEATURE_COLUMNS = ["Nodes", "SomaSurface", "Stems", "Bifurcations", "Branches", "Tips",
+                   "OverallWidth", "OverallHeight", "OverallDepth", "AverageDiameter", "Length",
+                   "Surface", "Volume", "MaxEuclideanDistance", "MaxPathDistance", "MaxBranchOrder",
+                   "AverageContraction", "AverageFragmentation", "AverageParent-daughterRatio",
+                   "AverageBifurcationAngleLocal", "AverageBifurcationAngleRemote", "HausdorffDimension"]
+
+VOID = 1000000000
+
+
+def _angle(a, b, c):
+    '''
+    Angle bac in degrees, NaN when undefined (zero-length arm). Computed in single precision
+    like the plugin, which matters for nearly straight or folded bifurcations.
+    '''
+    ab = (b - a).astype(np.float32)
+    ac = (c - a).astype(np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = np.einsum('ij,ij->i', ab, ac) / (np.linalg.norm(ab, axis=1) * np.linalg.norm(ac, axis=1))
+        return np.degrees(np.arccos(cos).astype(np.float64))
+
+
+def neuron_features(swc):
+    '''
+    Features of one neuron given as a mapping of columns. Returns a dict keyed by FEATURE_COLUMNS,
+    or None when there is no root.
+    '''
+    n_node = len(swc['n'])
+    parent = np.asarray(swc['parent'])
+    roots = np.flatnonzero(parent == -1)
+    if n_node == 0 or roots.size == 0:
+        return None
+    root = int(roots[0])
+
+    xyz = np.column_stack((swc['x'], swc['y'], swc['z'])).astype(np.float64)
+    r = np.asarray(swc['r'], dtype=np.float64)
+    prow = parent_rows(swc)
+    has_parent = prow >= 0
+    rows = np.arange(n_node)
+    n_child = np.bincount(prow[has_parent], minlength=n_node)
+
+    # Size features over all nodes
+    seg = np.zeros(n_node)
+    seg[has_parent] = np.linalg.norm(xyz[has_parent] - xyz[prow[has_parent]], axis=1)
+    lo = np.minimum(xyz.min(axis=0), VOID)
+    hi = np.maximum(xyz.max(axis=0), 0)
+    f = {
+        "Nodes": n_node,
+        "SomaSurface": 4 * np.pi * r[root] ** 2,
+        "Stems": int(n_child[root]),
+        "Bifurcations": int((n_child > 1).sum()),
+        "Branches": 0,
+        "Tips": int((n_child == 0).sum()),
+        "OverallWidth": hi[0] - lo[0],
+        "OverallHeight": hi[1] - lo[1],
+        "OverallDepth": hi[2] - lo[2],
+        "AverageDiameter": 2 * r[has_parent].sum() / n_node,
+        "Length": seg.sum(),
+        "Surface": (2 * np.pi * r * seg).sum(),
+        "Volume": (np.pi * r * r * seg).sum(),
+        "MaxEuclideanDistance": max(0.0, np.linalg.norm(xyz[has_parent] - xyz[root], axis=1).max(initial=0)),
+    }
+
+    # Branches of the first tree: each runs from a branch point (or the root) through
+    # single-child nodes down to the next branch point or tip
+    top, _ = pointer_jump(np.where(has_parent, prow, rows))
+    in_tree = top == root
+    stop = (n_child != 1) | (rows == root) | ~has_parent
+    ends = np.flatnonzero(stop & in_tree & (rows != root))
+    start_of, _ = pointer_jump(np.where(stop, rows, prow))          # nearest stop at or above each node
+    starts = start_of[prow[ends]]
+
+    _, path = pointer_jump(np.where(has_parent, prow, rows), np.where(has_parent, seg, 0))
+    branch_len = path[ends] - path[starts]
+    chord = np.linalg.norm(xyz[ends] - xyz[starts], axis=1)
+    _, order = pointer_jump(np.where(has_parent, prow, rows), np.where(has_parent, stop[np.maximum(prow, 0)], 0))
+
+    n_branch = ends.size
+    f["Branches"] = n_branch
+    f["MaxPathDistance"] = path[ends].max(initial=0)
+    f["MaxBranchOrder"] = int(order[ends].max(initial=0))
+    nonzero = branch_len > 0
+    f["AverageContraction"] = (chord[nonzero] / branch_len[nonzero]).mean() if nonzero.any() else np.nan
+    f["AverageFragmentation"] = (in_tree & ~stop).sum() / n_branch if n_branch else np.nan
+
+    # Parent-daughter ratio over the first node of every branch
+    first = np.flatnonzero(in_tree & has_parent & stop[np.maximum(prow, 0)])
+    first = first[r[prow[first]] > 0]
+    f["AverageParent-daughterRatio"] = (r[first] / r[prow[first]]).mean() if first.size else np.nan
+
+    # Bifurcation angles between the first two children of every branch point,
+    # locally and at the far ends of the two branches
+    bifs = np.flatnonzero(in_tree & (n_child > 1))
+    children = np.flatnonzero(has_parent)
+    children = children[np.argsort(prow[children], kind='stable')]
+    first_child = np.searchsorted(prow[children], bifs)
+    c1 = children[first_child]
+    c2 = children[first_child + 1]
+    remote, _ = pointer_jump(np.where(n_child == 1, np.r_[children, 0][np.searchsorted(prow[children], rows).clip(0, max(len(children) - 1, 0))], rows))
+    local_ang = np.nan_to_num(_angle(xyz[bifs], xyz[c1], xyz[c2]))
+    remote_ang = np.nan_to_num(_angle(xyz[bifs], xyz[remote[c1]], xyz[remote[c2]]))
+    n_bifs = f["Bifurcations"]
+    f["AverageBifurcationAngleLocal"] = local_ang.sum() / n_bifs if n_bifs else 0.0
+    f["AverageBifurcationAngleRemote"] = remote_ang.sum() / n_bifs if n_bifs else 0.0
+
+    f["HausdorffDimension"] = hausdorff_dimension(xyz, prow)
+    return f
+
+
+def hausdorff_dimension(xyz, prow):
+    '''
+    Box-counting dimension of the segments on the integer lattice used by the plugin
+    (coordinates truncated): the cells crossed by the segments are counted for box sizes
+    2, 4, 8, ... below a quarter of the extent, and the dimension is minus the slope of
+    log(count) against log(size), NaN with fewer than two box sizes. This is an estimate of
+    the plugin's HausdorffDimension, not a reproduction: on the GF_test.csv neurons it is
+    mostly within 0.01, and within about 0.15 for small neurons.
+    '''
+    a = np.trunc(xyz[np.where(prow >= 0, prow, np.arange(len(xyz)))])
+    b = np.trunc(xyz)
+    span = np.ptp(b, axis=0).max() if len(b) else 0
+    if span < 16:
+        return np.nan
+
+    # Sample every segment at unit steps, so that no unit cell it crosses is missed
+    n_step = np.maximum(np.abs(b - a).max(axis=1).astype(np.int64), 1)
+    seg = np.repeat(np.arange(len(a)), n_step + 1)
+    first = np.repeat(np.cumsum(n_step + 1) - (n_step + 1), n_step + 1)
+    t = (np.arange(seg.size) - first) / np.repeat(n_step, n_step + 1)
+    cells = np.floor(a[seg] + (b[seg] - a[seg]) * t[:, None]).astype(np.int64)
+    cells -= cells.min() >> 20 << 20       # non-negative, keeping the lattice aligned
+
+    # One int64 key per cell, 21 bits per axis; halving every field gives the next box size
+    keys = np.unique((cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2])
+    carry = ~np.int64((1 << 20) | (1 << 41))
+    sizes, counts = [], []
+    size = 1
+    while size < span / 4:
+        if size >= 2:
+            sizes.append(size)
+            counts.append(len(keys))
+        keys = np.unique((keys >> 1) & carry)
+        size *= 2
+    if len(sizes) < 2:                      # no slope from a single box size
+        return np.nan
+    return -np.polyfit(np.log(sizes), np.log(counts), 1)[0]
+
+
+def file_features(swc_path):
+    '''
+    Features of one SWC/ESWC file as a CSV row (Name first), or None if it cannot be used.
+    '''
+    try:
+        f = neuron_features(readSWCArrays(swc_path, SWC_COLUMNS))
+    except (OSError, ValueError) as e:
+        print(f"Warning: {swc_path}: {e}", file=sys.stderr)
+        return None
+    if f is None:
+        print(f"Warning: {swc_path}: the neuron tree does not have a root", file=sys.stderr)
+        return None
+    return {"Name": os.path.basename(swc_path), **f}
+
+
+def map_folder(func, swc_dir, processes=None):
+    '''
+    Apply `func` to every SWC/ESWC file of `swc_dir` (sorted by name) in a process pool and
+    return the results that are not None.
+    '''
+    paths = [os.path.join(swc_dir, fname) for fname in sorted(os.listdir(swc_dir))
+             if fname.endswith((".swc", ".eswc"))]
+    if processes == 1 or len(paths) < 2:
+        rows = list(map(func, paths))
+    else:
+        chunksize = max(1, len(paths) // (4 * (processes or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(processes) as pool:
+            rows = list(pool.map(func, paths, chunksize=chunksize))
+    return [row for row in rows if row is not None]
+
+
+def compute_feature_in_folder(swc_dir, output_csv=None, processes=None):
+    '''
+    Features of every SWC/ESWC file in `swc_dir`, computed in a process pool.
+    Returns a DataFrame with the GF_test.csv columns and writes it to `output_csv` if given.
+    '''
+    df = pd.DataFrame(map_folder(file_features, swc_dir, processes), columns=["Name"] + FEATURE_COLUMNS)
+    if output_csv:
+        df.to_csv(output_csv, index=False, float_format="%g")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Global neuron features of every SWC/ESWC file in a folder")
+    parser.add_argument("swc_dir")
+    parser.add_argument("output_csv")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    df = compute_feature_in_folder(args.swc_dir, args.output_csv, args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df)} neuron(s) in {elapsed:.2f} s ({len(df) / elapsed:.1f} neurons/s) -> {args.output_csv}")
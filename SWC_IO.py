@@ -0,0 +1,146 @@
+import io
+import numpy as np
+import pandas as pd
+
+# Column layout of plain SWC (7 columns) and of the terafly ESWC export (12/13 columns)
+SWC_COLUMNS = ("n", "type", "x", "y", "z", "r", "parent")
+ESWC_COLUMNS = SWC_COLUMNS + ("seg_id", "level", "mode", "timestamp", "teraflyindex", "feature_value")
+
+COLUMN_DTYPES = {
+    "n": np.int32, "type": np.int32, "parent": np.int32,
+    "x": np.float32, "y": np.float32, "z": np.float32, "r": np.float32,
+    "seg_id": np.int32, "level": np.int32, "mode": np.int32,
+    "timestamp": np.int64, "teraflyindex": np.int64, "feature_value": np.float32,
+}
+
+# pyarrow's CSV reader parses straight into typed columns; without it, pandas' C engine
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+def skip_header(data):
+    '''
+    Return the offset of the first data line, skipping the leading "#" header lines and
+    blank lines (either may start with spaces or tabs).
+    '''
+    offset = 0
+    while offset < len(data):
+        start = offset
+        while data[start:start + 1] in (b" ", b"\t"):
+            start += 1
+        if data[start:start + 1] not in (b"#", b"\n", b"\r", b""):
+            break
+        nl = data.find(b"\n", start)
+        if nl < 0:
+            return len(data)
+        offset = nl + 1
+    return offset
+
+
+def count_columns(data, offset=0):
+    nl = data.find(b"\n", offset)
+    first = data[offset:] if nl < 0 else data[offset:nl]
+    return len(first.split())
+
+
+def _layout(data, offset, columns=None):
+    '''
+    Column names of the file and positions of the requested ones, from its first data line.
+    '''
+    n_col = count_columns(data, offset)
+    if 0 < n_col < len(SWC_COLUMNS):
+        raise ValueError(f"Expected at least {len(SWC_COLUMNS)} columns, found {n_col}")
+    names = list(ESWC_COLUMNS[:min(n_col, len(ESWC_COLUMNS))])
+    return names, [i for i, name in enumerate(names) if columns is None or name in columns]
+
+
+def _parse_body(body, names, usecols):
+    if pa is not None:
+        include = [names[i] for i in usecols]
+        try:
+            table = pa_csv.read_csv(
+                pa.py_buffer(body),
+                read_options=pa_csv.ReadOptions(column_names=names),
+                parse_options=pa_csv.ParseOptions(delimiter=" "),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=include,
+                    column_types={name: pa.from_numpy_dtype(COLUMN_DTYPES[name]) for name in include}))
+            return {name: table.column(name).to_numpy() for name in include}
+        except pa.ArrowInvalid:
+            pass
+    # Ragged rows, trailing blanks or comments in the body (or no pyarrow): pandas' C parser
+    try:
+        df = pd.read_csv(io.BytesIO(body), sep=r"\s+", header=None, usecols=usecols,
+                         comment="#", engine="c")
+    except pd.errors.EmptyDataError:        # blank lines only
+        return _empty([names[i] for i in usecols])
+    return {names[i]: df.iloc[:, k].to_numpy(dtype=COLUMN_DTYPES[names[i]]) for k, i in enumerate(usecols)}
+
+def _empty(columns):
+    return {name: np.empty(0, COLUMN_DTYPES[name]) for name in (columns or SWC_COLUMNS)}
+
+
+def parseSWCBuffer(data, columns=None):
+    '''
+    Parse the raw bytes of a SWC/ESWC file into a dict of typed NumPy columns.
+    `columns` restricts the result to a subset of column names.
+    '''
+    offset = skip_header(data)
+    names, usecols = _layout(data, offset, columns)
+    if not names:
+        return _empty(columns)
+    return _parse_body(memoryview(data)[offset:], names, usecols)
+
+
+def readSWCStream(f, columns=None, chunk_size=1 << 20):
+    '''
+    Parse a SWC/ESWC file from a binary file-like object (e.g. a prefetching SFTP file) in
+    chunks of `chunk_size` bytes. Complete lines of every chunk are parsed straight into
+    typed columns, so the text of the whole file is never held in memory.
+    '''
+    parts = []
+    names = usecols = None
+    tail = b""
+    while True:
+        chunk = f.read(chunk_size)
+        data = tail + chunk if tail else chunk
+        end = data.rfind(b"\n") + 1 if chunk else len(data)
+        tail = data[end:]
+        if names is None:
+            offset = skip_header(data[:end])
+            if offset == end and chunk:         # still in the header
+                tail = data[offset:]
+                continue
+            names, usecols = _layout(data, offset, columns)
+        else:
+            offset = 0
+        if end > offset and names:
+            parts.append(_parse_body(memoryview(data)[offset:end], names, usecols))
+        if not chunk:
+            break
+    if not parts:
+        return _empty(columns)
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def readSWCArrays(swc_path, columns=None):
+    '''
+    Read a SWC/ESWC file once and return a dict of typed NumPy columns.
+    '''
+    with open(swc_path, "rb") as f:
+        data = f.read()
+    return parseSWCBuffer(data, columns)
+
+
+def readSWC(swc_path, mode='simple'):  # pandas DataFrame
+    '''
+    Read a SWC/ESWC file as a DataFrame indexed by node id.
+    mode='simple' keeps the 7 SWC columns, mode='full' keeps the ESWC extras as well.
+    '''
+    columns = SWC_COLUMNS if mode == 'simple' else None
+    cols = readSWCArrays(swc_path, columns)
+    df = pd.DataFrame({name: col for name, col in cols.items() if name != "n"},
+                      index=pd.Index(cols["n"], name="##n"))
+    return df
@@ -0,0 +1,190 @@
+'''
+Level-of-detail pyramid for drawing large neurons in small tiles.
+
+Keypoints (root, branch points and tips) are always kept, so every level has the same
+branches and topology; only the degree-2 runs between them are simplified, with
+Douglas-Peucker, to a tolerance given as a fraction of the neuron's extent. Level 0 is
+the full-resolution tree, level k has tolerance extent * 2**k / 4096.
+
+The coarse levels are stored in their own sidecar next to the binary neuron cache, so a
+tile drawn at a coarse level never touches the full-resolution data.
+'''
+import numpy as np
+from SWC_Cache import cache_path, map_sidecar, source_stamp, write_sidecar
+from SWC_Tree import NeuronTree
+
+N_LEVELS = 6        # coarse levels, tolerance extent/2048 ... extent/64
+
+
+def level_tolerance(span, k):
+    return span * 2.0 ** k / 4096 if k > 0 else 0.0
+
+
+def simplify_importance(points, offsets, min_tolerance=0.0):
+    '''
+    Douglas-Peucker over every branch at once. `points` are the branch entries in order and
+    `offsets` the branch boundaries. Returns, per entry, the largest tolerance at which the
+    entry is still kept (inf for branch endpoints, 0 for entries below `min_tolerance`):
+    simplifying to tolerance t keeps exactly the entries with importance > t, so the
+    levels of a pyramid are nested and come from a single pass.
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    offsets = np.asarray(offsets)
+    importance = np.zeros(len(points))
+    if len(points) == 0:
+        return importance
+    importance[offsets[:-1]] = np.inf
+    importance[offsets[1:] - 1] = np.inf
+    kept = np.isinf(importance)
+    active = ~kept                # interior entries whose span may still be split
+
+    while active.any():
+        kept_pos = np.flatnonzero(kept)
+        idx = np.flatnonzero(active)
+        slot = np.searchsorted(kept_pos, idx) - 1      # entry lies in span (kept_pos[slot], kept_pos[slot + 1])
+        a = kept_pos[slot]
+        b = kept_pos[slot + 1]
+
+        # Distance from each active entry to the chord of its span
+        ab = points[b] - points[a]
+        ap = points[idx] - points[a]
+        len2 = np.einsum('ij,ij->i', ab, ab)
+        t = np.clip(np.einsum('ij,ij->i', ap, ab) / np.where(len2 > 0, len2, 1), 0, 1)
+        dist = np.linalg.norm(ap - t[:, None] * ab, axis=1)
+
+        # Farthest entry of every span
+        starts = np.flatnonzero(np.r_[True, slot[1:] != slot[:-1]])
+        span_len = np.diff(np.r_[starts, len(idx)])
+        span_max = np.repeat(np.maximum.reduceat(dist, starts), span_len)
+        active[idx[span_max <= min_tolerance]] = False          # span is within tolerance, done
+        cand = np.flatnonzero((dist == span_max) & (span_max > min_tolerance))
+        if cand.size == 0:
+            break
+        _, first = np.unique(slot[cand], return_index=True)
+        split = cand[first]
+
+        # A split point is kept only while its span is, so it inherits the span importance
+        # (that of the later of the two endpoints, the smaller one)
+        importance[idx[split]] = np.minimum(dist[split], np.minimum(importance[a[split]], importance[b[split]]))
+        kept[idx[split]] = True
+        active[idx[split]] = False
+    return importance
+
+
+class LODPyramid:
+    '''
+    Branch polylines of one neuron at N_LEVELS + 1 levels of detail. Level 0 is loaded from
+    the full-resolution tree on first use; the others come from the LOD sidecar.
+    '''
+    __slots__ = ("path", "cache_dir", "span", "types", "_levels")
+
+    def __init__(self, path, span, types, levels, cache_dir=None):
+        '''
+        levels: list of (offsets, points) for levels 1..N_LEVELS.
+        '''
+        self.path = path
+        self.cache_dir = cache_dir
+        self.span = float(span)
+        self.types = types
+        self._levels = [None] + list(levels)
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __repr__(self):
+        return f"LODPyramid({self.path!r}, levels={len(self)})"
+
+    def tolerance(self, k):
+        return level_tolerance(self.span, k)
+
+    def pick(self, tile_px, pixel_tolerance=0.5):
+        '''
+        Coarsest level whose tolerance stays below `pixel_tolerance` pixels when the whole
+        neuron is drawn across `tile_px` pixels.
+        '''
+        if self.span <= 0:
+            return len(self) - 1
+        limit = pixel_tolerance * self.span / max(tile_px, 1)
+        k = 0
+        while k + 1 < len(self) and self.tolerance(k + 1) <= limit:
+            k += 1
+        return k
+
+    def level(self, k):
+        '''
+        (offsets, points) of level k: branch b is points[offsets[b]:offsets[b + 1]].
+        '''
+        if self._levels[k] is None:
+            tree = NeuronTree.load(self.path, self.cache_dir)
+            offsets, index = tree.branches
+            self._levels[k] = (offsets, tree.coords(index))
+        return self._levels[k]
+
+    def branches(self, k):
+        '''
+        Iterate (type, points) over the branches of level k.
+        '''
+        offsets, points = self.level(k)
+        for b in range(len(offsets) - 1):
+            yield self.types[b], points[offsets[b]:offsets[b + 1]]
+
+    def npoints(self, k):
+        return len(self.level(k)[1])
+
+
+def build_lod(tree, n_levels=N_LEVELS):
+    '''
+    Build the pyramid of a NeuronTree.
+    '''
+    offsets, index = tree.branches
+    points = tree.coords(index)
+    types = np.asarray(tree.type)[index[offsets[:-1]]].astype(np.int32)
+    span = float(np.nanmax(np.ptp(points, axis=0))) if len(points) else 0.0
+
+    importance = simplify_importance(points, offsets, level_tolerance(span, 1))
+    levels = []
+    for k in range(1, n_levels + 1):
+        keep = importance > level_tolerance(span, k)
+        counts = np.add.reduceat(keep, offsets[:-1]) if len(points) else np.zeros(0, dtype=np.int64)
+        levels.append((np.r_[0, np.cumsum(counts)].astype(np.int64), points[keep]))
+    return LODPyramid(tree.path, span, types, levels)
+
+
+def loadLOD(swc_path, cache_dir=None, n_levels=N_LEVELS):
+    '''
+    LOD pyramid of a SWC/ESWC file, memory-mapped from its sidecar when it is fresh,
+    otherwise built from the full tree and written back.
+    '''
+    lod_path = cache_path(swc_path, cache_dir, suffix=".lod")
+    arrays = map_sidecar(lod_path, swc_path)
+    if arrays is not None and len(arrays) == 2 * n_levels + 2:
+        levels = [(arrays[f"offsets{k}"], arrays[f"points{k}"]) for k in range(1, n_levels + 1)]
+        return LODPyramid(swc_path, arrays["span"][0], arrays["types"], levels, cache_dir)
+
+    stamp = source_stamp(swc_path)
+    lod = build_lod(NeuronTree.load(swc_path, cache_dir), n_levels)
+    lod.cache_dir = cache_dir
+    arrays = {"span": np.array([lod.span]), "types": lod.types}
+    for k in range(1, n_levels + 1):
+        arrays[f"offsets{k}"], arrays[f"points{k}"] = lod.level(k)
+    try:
+        write_sidecar(lod_path, swc_path, arrays, stamp)
+    except OSError as e:
+        print(f"Warning: could not write LOD cache for {swc_path}: {e}")
+    return lod
+
+
+def plot3D_lod(ax, lod, level, linewidth=1):
+    '''
+    Draw level `level` of a pyramid on a matplotlib 3D axes as a single line collection
+    colored by branch type, instead of one artist per branch.
+    '''
+    from mpl_toolkits.mplot3d.art3d import Line3DCollection
+    colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
+    offsets, points = lod.level(level)
+    segments = np.split(np.asarray(points), np.asarray(offsets[1:-1]))
+    lines = Line3DCollection(segments, colors=[colors[t] for t in lod.types], linewidths=linewidth)
+    ax.add_collection3d(lines)
+    if len(points):
+        ax.auto_scale_xyz(points[:, 0], points[:, 1], points[:, 2])
+    return lines
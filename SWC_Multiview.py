@@ -1,90 +1,33 @@
+import sys
 import numpy as np
-import pandas as pd
+from SWC_Tree import NeuronTree
+from SWC_Render import neuron_polydata, add_neuron, shared_actor
+from Camera_Link import CameraLink
 from PyQt5.QtWidgets import QWidget, QFileDialog, QApplication, QVBoxLayout
 from PyQt5.QtCore import Qt
 from pyvistaqt import BackgroundPlotter
 # import vtk
 # import pyvista
 
-def readSWC(swc_path, mode='simple'):  # pandas DataFrame
-    n_skip = 0
-    with open(swc_path, "r") as f:
-        for line in f.readlines():
-            line = line.strip()
-            if line.startswith("#"):
-                n_skip += 1
-            else:
-                break
-    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
-    names = ["##n", "type", "x", "y", "z", "r", "parent"]
-    used_cols = [0, 1, 2, 3, 4, 5, 6]
-    if mode == 'simple':
-        pass
-    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
-                     usecols=used_cols,
-                     names=names
-                     )
-    return df
-
-def get_degree(tswc):   # Degree of node: the number of nodes connected to it
-    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
-    # print(tswc['degree'])
-    n_child = tswc.parent.value_counts()
-    n_child = n_child[n_child.index.isin(tswc.index)]
-    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
-    return tswc
-
-def get_rid(swc):
-    '''
-    Find root node.
-    '''
-    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
-    if rnode.shape[0]<1:
-        return -1
-    return rnode.index[0]
-
-def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
-    if rid is None:
-        rid = get_rid(swc)
-    # print(swc.shape)
-    swc=get_degree(swc)
-    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
-    return idlist
-
-def swc2branches(swc):
+def view_up(view):
+    # The top view looks along z, so z cannot be its view-up
+    return (0, 1, 0) if np.allclose(np.cross(view, (0, 0, 1)), 0) else (0, 0, 1)
+
+def view_vectors(n_views):
     '''
-    reture branch list of a swc
+    Camera directions of the viewports: top, front, side, iso, then evenly spaced azimuths for larger walls.
     '''
-    keyids=get_keypoint(swc)
-    branches=[]
-    for key in keyids:
-        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
-            continue
-        branch=[]
-        branch.append(key)
-        pkey=swc.loc[key,'parent']
-        while True:
-            branch.append(pkey)
-            if pkey in keyids:
-                break
-            key=pkey
-            pkey=swc.loc[key,'parent']
-        branches.append(branch)
-    return branches
-
-def synchronize_cameras(renderers, main_renderer):
-    main_cam = main_renderer.camera
-    for renderer in renderers:
-        if renderer != main_renderer:
-            cam = renderer.camera
-            cam.position = main_cam.position
-            cam.focal_point = main_cam.focal_point
-            cam.view_up = main_cam.view_up
-            renderer.reset_camera_clipping_range()
+    views = [(0, 0, 1), (1, 0, 0), (0, 1, 0), (1, 1, 1)]
+    n_extra = n_views - len(views)
+    for k in range(n_extra):
+        angle = 2 * np.pi * (k + 0.5) / n_extra
+        views.append((np.cos(angle), np.sin(angle), 0.5))
+    return views[:n_views]
 
 class MyWindow(QWidget):
-    def __init__(self):
+    def __init__(self, shape=(2, 2)):
         super(MyWindow, self).__init__()
+        self.shape = shape     # rows x columns of viewports
         self.initUI()
 
     def initUI(self):
@@ -96,62 +39,39 @@ class MyWindow(QWidget):
 
         fname, _ = QFileDialog.getOpenFileName(self, 'Open SWC/ESWC File', '', 'SWC Files (*.swc *.eswc;;All Files (*)')
         if fname:
-            plotter = BackgroundPlotter(shape=(2, 2), window_size=(1920, 1080))  # create a BackgroundPlotter with 2*2 subgraph layout and size of 1920*1080
+            plotter = BackgroundPlotter(shape=self.shape, window_size=(1920, 1080))  # create a BackgroundPlotter with 2*2 (default) subgraph layout and size of 1920*1080
             # plotter = BackgroundPlotter(shape=(2, 2)) 
             plotter.app_window.move(200, 200)
             # plotter.app_window.move(3840, 0)
             plotter.set_background("white")
 
-            self.display_swc(fname, plotter) # 使用选择的SWC文件和plotter来显示内容
+            self.camera_link = self.display_swc(fname, plotter) # 使用选择的SWC文件和plotter来显示内容
             layout.addWidget(plotter)  # 将plotter添加到布局中
 
         self.setLayout(layout)
         self.show()
 
     def display_swc(self, fname, plotter):
-        swc = readSWC(fname, mode='simple')
-        swc_brs = swc2branches(swc)
-        colors = ['white', 'black', 'red', 'blue', 'magenta', 'green']
-        views = [(0, 0, 1), (1, 0, 0), (0, 1, 0), (1, 1, 1)]
+        swc = NeuronTree.load(fname)
+        mesh = neuron_polydata(swc)    # 几何只构建一次，所有子视图共享
+        n_rows, n_cols = plotter.shape
+        views = view_vectors(n_rows * n_cols)
 
         renderers = []
-        # actors = []
-        
-        for i in range(2):
-            for j in range(2):
+        actor = None
+        for i in range(n_rows):
+            for j in range(n_cols):
                 plotter.subplot(i, j)
-                plotter.view_vector(views[2*i + j], viewup=(0, 0, 1))
-                renderers.append(plotter.renderer)
-                # actor = plotter.add_mesh(pyvista.PolyData(), color='white')
-                # actors.append(actor)
-
-        for i in range(2):
-            for j in range(2):
-                plotter.subplot(i, j)
-                for br in swc_brs:
-                    br_color = colors[int(swc.loc[br[0], 'type'])]
-                    br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
-                    Xe = br_coords['x'].to_numpy()
-                    Ye = br_coords['y'].to_numpy()
-                    Ze = br_coords['z'].to_numpy()
-                    
-                    lines = []
-                    for k in range(len(Xe) - 1):
-                        lines.append([Xe[k], Ye[k], Ze[k]])
-                        lines.append([Xe[k+1], Ye[k+1], Ze[k+1]])
-                    
-                    plotter.add_lines(np.array(lines), color=br_color)
-                    plotter.reset_camera()
-                    # polydata = pyvista.PolyData(np.array(lines))
-                    # actor.GetMapper().SetInputData(polydata)
-                    # actor.GetProperty().SetColor(br_color)
-
+                if actor is None:
+                    actor = add_neuron(plotter, mesh, reset_camera=False)
+                else:
+                    plotter.add_actor(shared_actor(actor), reset_camera=False)
+                plotter.view_vector(views[n_cols*i + j], viewup=view_up(views[n_cols*i + j]))
                 plotter.show_axes()
-                # plotter.view_vector(views[2*i + j], viewup=(0, 0, 1))
+                renderers.append(plotter.renderer)
             
-        # Add abservers to synchronize cameras
-        for renderer in renderers:
-            renderer.camera.AddObserver("ModifiedEvent", lambda: synchronize_cameras(renderers, renderer))
+        # Link the cameras: each view keeps its rotation offset, at most one render per frame
+        return CameraLink(renderers, plotter.render)
 
     # def display_swc(self, fname, plotter):
     #     swc = readSWC(fname, mode='simple')
@@ -240,6 +160,8 @@ class MyWindow(QWidget):
 
 if __name__ == "__main__":
     app = QApplication([])
-    window = MyWindow()
+    # Optional layout argument for larger walls, e.g. "python SWC_Multiview.py 3x4"
+    shape = tuple(int(v) for v in sys.argv[1].split("x")) if len(sys.argv) > 1 else (2, 2)
+    window = MyWindow(shape)
     app.exec_()
 
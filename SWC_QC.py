@@ -0,0 +1,184 @@
+'''
+Morphology quality checks of neurons, producing the columns of report_data_forBBP_1891.csv
+(the neuronQC report). The checks follow NeuroM's morphology checks on a MorphIO-style
+section tree, and each column counts the offending neurites, sections or segments
+(0 means the check passes).
+
+    python SWC_QC.py SWC_DIR report.csv [--processes N]
+
+Sections run between branch points as in MorphIO: a child section starts with a copy of
+the branch point, and the segment joining a neurite to the soma belongs to no section. A
+single-child node ends its section only where the neurite type changes, which makes the
+child a single child section. The soma is the set of type-1 nodes, or the
+first root when there are none.
+'''
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from SWC_Features import map_folder
+from SWC_IO import SWC_COLUMNS, readSWCArrays
+from SWC_Topology import parent_rows, pointer_jump
+
+QC_COLUMNS = ["dangling_branch", "root_node_jump", "z_jumps", "narrow_start", "fat_ends",
+              "has_all_nonzero_segment_lengths", "narrow_neurite_section", "single_child",
+              "multifurcation", "number_of_dendritic_trees_steaming_from_the_soma", "number_of_axons",
+              "max_branch_order", "total_section_length", "max_section_length"]
+
+AXON = 2
+DENDRITES = (3, 4)                  # basal, apical
+
+DANGLING_DISTANCE = 12.0            # neurite start beyond the soma surface
+ROOT_JUMP_MULTIPLIER = 2.0          # neurite start beyond this many soma radii
+Z_JUMP = 30.0                       # |dz| of one segment
+NARROW_START_FRAC = 0.9             # first radius below this fraction of the second
+FAT_END_MULTIPLE = 2.0              # last radius at least this many times the mean ...
+FAT_END_POINTS = 5                  # ... of the last points of a leaf section
+SEGMENT_LENGTH_MIN = 0.0
+NARROW_SECTION_RADIUS = 0.05        # mean radius of a section ...
+NARROW_SECTION_MIN_LENGTH = 50.0    # ... longer than this
+
+
+def neuron_qc(swc):
+    '''
+    QC columns of one neuron given as a mapping of columns, as a dict keyed by QC_COLUMNS,
+    or None when it has no root.
+    '''
+    n_node = len(swc['n'])
+    roots = np.flatnonzero(np.asarray(swc['parent']) == -1)
+    if n_node == 0 or roots.size == 0:
+        return None
+
+    xyz = np.column_stack((swc['x'], swc['y'], swc['z'])).astype(np.float64)
+    r = np.asarray(swc['r'], dtype=np.float64)
+    ntype = np.asarray(swc['type'])
+    prow = parent_rows(swc)
+    rows = np.arange(n_node)
+
+    soma = ntype == 1
+    if not soma.any():
+        soma[roots[0]] = True
+    soma_rows = np.flatnonzero(soma)
+    center = xyz[soma_rows[0]]
+    if soma_rows.size == 1:
+        soma_radius = r[soma_rows[0]]
+        soma_spread = 0.0
+    else:
+        soma_spread = np.linalg.norm(xyz[soma_rows] - xyz[soma_rows].mean(axis=0), axis=1).max()
+        soma_radius = soma_spread
+
+    # Neurite nodes, their parents inside the neurite, and the section tree
+    neurite = ~soma
+    inner = neurite & (prow >= 0)
+    inner[inner] = neurite[prow[inner]]              # node with a neurite parent: owns a segment
+    n_child = np.bincount(prow[inner], minlength=n_node)
+    stems = np.flatnonzero(neurite & ~inner)
+    sec_start = neurite & ~inner
+    sec_start[inner] = (n_child[prow[inner]] > 1) | (ntype[inner] != ntype[prow[inner]])
+    sec_of, _ = pointer_jump(np.where(sec_start | ~inner, rows, prow))
+    _, order = pointer_jump(np.where(inner, prow, rows), np.where(inner, sec_start, 0))
+
+    seg = np.zeros(n_node)
+    seg[inner] = np.linalg.norm(xyz[inner] - xyz[prow[inner]], axis=1)
+    sec_rows = np.flatnonzero(sec_start)
+    sec_len = np.bincount(sec_of[neurite], weights=seg[neurite], minlength=n_node)[sec_rows]
+
+    q = dict.fromkeys(QC_COLUMNS, 0)
+
+    # Neurite starts: dangling (far from the soma surface) and root node jumps
+    start_dist = np.linalg.norm(xyz[stems] - center, axis=1)
+    q["dangling_branch"] = int((np.linalg.norm(xyz[stems] - xyz[soma_rows].mean(axis=0), axis=1)
+                                - soma_spread > DANGLING_DISTANCE).sum())
+    q["root_node_jump"] = int((start_dist > ROOT_JUMP_MULTIPLIER * soma_radius).sum())
+
+    # Segments: z jumps (not counting the first segment of each neurite) and zero lengths
+    first_seg = inner & ~inner[np.maximum(prow, 0)] & ~sec_start     # stem -> its only child
+    dz = np.abs(xyz[inner, 2] - xyz[prow[inner], 2])
+    q["z_jumps"] = int(((dz > Z_JUMP) & ~first_seg[inner]).sum())
+    copy_seg = inner & sec_start                    # a zero-length branch point copy is not added
+    q["has_all_nonzero_segment_lengths"] = int(((seg <= SEGMENT_LENGTH_MIN) & inner
+                                                & ~(copy_seg & (seg == 0))).sum())
+
+    # Narrow start: the first radius of a root section against the second one
+    single = stems[n_child[stems] == 1]
+    child_of = np.full(n_node, -1)
+    child_of[prow[inner]] = rows[inner]
+    q["narrow_start"] = int((r[single] < NARROW_START_FRAC * r[child_of[single]]).sum())
+
+    # Fat ends: last radius of a leaf section against the mean of its last points, leaf
+    # included, not counting the first point of the section (NeuroM's points[1:][-5:])
+    leaves = np.flatnonzero(neurite & (n_child == 0))
+    total = np.zeros(leaves.size)
+    count = np.zeros(leaves.size)
+    node = leaves.copy()
+    alive = np.ones(leaves.size, dtype=bool)
+    for _ in range(FAT_END_POINTS):
+        own = alive & inner[node]                    # the first point of a root section is the stem
+        total[own] += r[node[own]]
+        count[own] += 1
+        alive &= ~sec_start[node]                    # a child section's first point is the branch copy
+        node = np.where(alive, prow[node], node)
+    fat = count > 0
+    q["fat_ends"] = int((total[fat] / count[fat] * FAT_END_MULTIPLE <= r[leaves[fat]]).sum())
+
+    # Narrow sections: long sections with a tiny mean radius (branch point copy included)
+    sec_r = np.bincount(sec_of[neurite], weights=r[neurite], minlength=n_node)[sec_rows]
+    sec_n = np.bincount(sec_of[neurite], minlength=n_node)[sec_rows].astype(np.float64)
+    has_copy = inner[sec_rows]
+    sec_r[has_copy] += r[prow[sec_rows[has_copy]]]
+    sec_n[has_copy] += 1
+    q["narrow_neurite_section"] = int(((sec_len > NARROW_SECTION_MIN_LENGTH)
+                                       & (sec_r / sec_n < NARROW_SECTION_RADIUS)).sum())
+
+    # Sections with exactly one child section (their end node continues with another type)
+    child_secs = sec_start & inner
+    q["single_child"] = int((np.bincount(sec_of[prow[child_secs]], minlength=n_node) == 1).sum())
+    q["multifurcation"] = int((neurite & (n_child > 2)).sum())
+
+    q["number_of_dendritic_trees_steaming_from_the_soma"] = int(np.isin(ntype[stems], DENDRITES).sum())
+    q["number_of_axons"] = int((ntype[stems] == AXON).sum())
+    q["max_branch_order"] = int(order[neurite].max(initial=0))
+    q["total_section_length"] = sec_len.sum()
+    q["max_section_length"] = sec_len.max(initial=0)
+    return q
+
+
+def file_qc(swc_path):
+    '''
+    QC columns of one SWC/ESWC file as a report row (swc_name first), or None if it cannot be used.
+    '''
+    try:
+        q = neuron_qc(readSWCArrays(swc_path, SWC_COLUMNS))
+    except (OSError, ValueError) as e:
+        print(f"Warning: {swc_path}: {e}", file=sys.stderr)
+        return None
+    if q is None:
+        print(f"Warning: {swc_path}: the neuron tree does not have a root", file=sys.stderr)
+        return None
+    return {"swc_name": os.path.splitext(os.path.basename(swc_path))[0], **q}
+
+
+def compute_qc_in_folder(swc_dir, output_csv=None, processes=None):
+    '''
+    QC report of every SWC/ESWC file in `swc_dir`, computed in a process pool.
+    Returns a DataFrame with the report_data_forBBP_1891.csv columns and writes it to `output_csv` if given.
+    '''
+    df = pd.DataFrame(map_folder(file_qc, swc_dir, processes), columns=["swc_name"] + QC_COLUMNS)
+    if output_csv:
+        df.to_csv(output_csv, index=False, float_format="%.10g")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="QC report of every SWC/ESWC file in a folder")
+    parser.add_argument("swc_dir")
+    parser.add_argument("output_csv")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    df = compute_qc_in_folder(args.swc_dir, args.output_csv, args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df)} neuron(s) in {elapsed:.2f} s ({1000 * elapsed / max(len(df), 1):.1f} s per 1000 neurons) "
+          f"-> {args.output_csv}")
@@ -0,0 +1,67 @@
+import numpy as np
+import pyvista as pv
+
+SWC_COLORS = ['white', 'black', 'red', 'blue', 'magenta', 'green']    # indexed by SWC node type
+
+
+def branch_cells(offsets, index, keep=None):
+    '''
+    VTK polyline connectivity [n0, i..., n1, j..., ...] for the branches in (offsets, index).
+    `keep` is an optional boolean mask selecting branches.
+    '''
+    offsets = np.asarray(offsets)
+    lengths = np.diff(offsets)
+    if keep is not None:
+        index = np.asarray(index)[np.repeat(keep, lengths)]
+        lengths = lengths[keep]
+        offsets = np.r_[0, np.cumsum(lengths)]
+    n_branch = lengths.size
+    cells = np.empty(len(index) + n_branch, dtype=np.int64)
+    heads = offsets[:-1] + np.arange(n_branch)
+    cells[heads] = lengths
+    body = np.ones(cells.size, dtype=bool)
+    body[heads] = False
+    cells[body] = index
+    return cells
+
+
+def neuron_polydata(tree):
+    '''
+    Whole neuron as one PolyData: one polyline cell per branch, with the branch type
+    (type of its first node) as cell scalars. Branches with an unknown type or NaN
+    coordinates are left out.
+    '''
+    offsets, index = tree.branches
+    points = tree.coords()
+    br_type = np.asarray(tree.type)[index[offsets[:-1]]]
+    has_nan = np.logical_or.reduceat(np.isnan(points[index]).any(axis=1), offsets[:-1]) \
+        if len(index) else np.zeros(0, dtype=bool)
+    keep = (br_type >= 0) & (br_type < len(SWC_COLORS)) & ~has_nan
+
+    mesh = pv.PolyData(points, lines=branch_cells(offsets, index, keep))
+    mesh.cell_data['type'] = br_type[keep].astype(np.int32)
+    return mesh
+
+
+def swc_lookup_table():
+    lut = pv.LookupTable(cmap=SWC_COLORS, n_values=len(SWC_COLORS))
+    lut.scalar_range = (-0.5, len(SWC_COLORS) - 0.5)
+    return lut
+
+
+def add_neuron(plotter, mesh, **kwargs):
+    '''
+    Add a neuron mesh as a single actor colored by branch type.
+    '''
+    return plotter.add_mesh(mesh, scalars='type', cmap=swc_lookup_table(), show_scalar_bar=False,
+                            **kwargs)
+
+
+def shared_actor(actor):
+    '''
+    New actor drawing through the same mapper as `actor`, so viewports of one render window
+    share a single copy of the geometry.
+    '''
+    twin = pv.Actor(mapper=actor.mapper)
+    twin.SetProperty(actor.GetProperty())
+    return twin
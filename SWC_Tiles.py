@@ -0,0 +1,111 @@
+'''
+Rendered SWC tiles for the multimedia viewers: a neuron drawn with matplotlib's Agg renderer
+at the exact pixel size of its tile, without GUI objects (so it can run in worker processes),
+and the QPixmap holding the result. RenderPool runs the drawing in a process pool and
+delivers each result to the GUI thread through a signal as soon as it is done.
+'''
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from SWC_LOD import loadLOD, plot3D_lod
+
+TILE_DPI = 100
+
+
+def draw_lod(lod, width, height, level_size=None, dpi=TILE_DPI, linewidth=0.5):
+    '''
+    Draw a LOD pyramid as a width x height pixel image and return it as an RGBA array of
+    shape (height, width, 4). The level of detail is chosen for `level_size` pixels
+    (default: the smaller side of the image).
+    '''
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    plot3D_lod(ax, lod, lod.pick(level_size or min(width, height)), linewidth=linewidth)
+    ax.axis('off')
+    ax.grid(False)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba()).copy()
+    # Figures are reference cycles: drop the pixel buffer and the artists now rather than at
+    # the next garbage collection
+    canvas.renderer = None
+    fig.clear()
+    return rgba
+
+
+def render_swc_tile(swc_path, width, height, dpi=TILE_DPI, linewidth=0.5):
+    '''
+    Draw a SWC file as a width x height pixel tile, see draw_lod.
+    '''
+    # The level of detail follows the tile size, full resolution only for large tiles
+    return draw_lod(loadLOD(swc_path), width, height, dpi=dpi, linewidth=linewidth)
+
+
+def render_swc_images(swc_path, tile_size, icon_size, with_tile=True):
+    '''
+    Waiting-list icon and display tile of a SWC file from a single load: the icon fits in
+    icon_size x icon_size pixels with the aspect ratio of the (width, height) tile. Returns
+    (icon RGBA, tile RGBA or None).
+    '''
+    lod = loadLOD(swc_path)
+    width, height = tile_size
+    scale = icon_size / max(width, height)
+    icon = draw_lod(lod, max(1, round(width * scale)), max(1, round(height * scale)), icon_size, linewidth=1)
+    tile = draw_lod(lod, width, height) if with_tile else None
+    return icon, tile
+
+
+def rgba_pixmap(rgba):
+    height, width = rgba.shape[:2]
+    image = QImage(rgba.data, width, height, 4 * width, QImage.Format_RGBA8888)
+    return QPixmap.fromImage(image.copy())      # the QImage only borrows the array
+
+
+def pixmap_nbytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+class RenderPool(QObject):
+    '''
+    Process pool (spawned, Agg backend) for the render functions of this module. Every
+    submitted job ends with finished(tag, result, error) in the thread that owns the pool,
+    in completion order; error is None on success. Cancelled jobs report nothing.
+    '''
+    finished = pyqtSignal(object, object, object)
+
+    def __init__(self, processes=None):
+        super().__init__()
+        self._executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker)
+        self._pending = set()
+
+    def submit(self, tag, func, *args):
+        future = self._executor.submit(func, *args)
+        self._pending.add(future)
+        future.add_done_callback(lambda f: self._done(tag, f))
+        return future
+
+    def _done(self, tag, future):
+        # Runs in an executor thread; the queued signal hands the result to the GUI thread
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        self.finished.emit(tag, None if error is not None else future.result(), error)
+
+    def cancel_pending(self):
+        for future in list(self._pending):
+            future.cancel()
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False)
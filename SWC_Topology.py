@@ -0,0 +1,136 @@
+import numpy as np
+
+# All functions take `swc` as a mapping of NumPy columns ('n', 'type', 'parent', ...),
+# e.g. the dict returned by SWC_IO.readSWCArrays, and work on row indices rather than node ids.
+
+
+def parent_rows(swc):
+    '''
+    Row index of each node's parent, -1 when the parent is missing or negative.
+    '''
+    ids = np.asarray(swc['n'])
+    parent = np.asarray(swc['parent'])
+    prow = np.full(ids.size, -1, dtype=np.int32)
+    if ids.size == 0:
+        return prow
+
+    max_id = int(ids.max())
+    valid = parent >= 0
+    if ids.min() >= 0 and max_id <= 4 * ids.size + 1024:
+        # Node ids are (nearly) contiguous: use a dense id -> row table
+        table = np.full(max_id + 1, -1, dtype=np.int32)
+        table[ids] = np.arange(ids.size, dtype=np.int32)
+        valid &= parent <= max_id
+        prow[valid] = table[parent[valid]]
+    else:
+        order = np.argsort(ids, kind='stable')
+        pos = np.searchsorted(ids, parent, sorter=order).clip(0, ids.size - 1)
+        found = valid & (ids[order[pos]] == parent)
+        prow[found] = order[pos[found]]
+    return prow
+
+
+def pointer_jump(nxt, weight=None):
+    '''
+    Pointer doubling on a forest given as next-pointers (fixed points are terminals).
+    Returns the terminal reached from every node and, with `weight` (per node, for the step to
+    its next node; zero on terminals), the weight summed on the way.
+    '''
+    nxt = nxt.copy()
+    acc = None if weight is None else weight.astype(np.float64)
+    for _ in range(int(np.ceil(np.log2(len(nxt) + 1))) + 1):     # bounded, in case of parent cycles
+        nn = nxt[nxt]
+        if np.array_equal(nn, nxt):
+            break
+        if acc is not None:
+            acc = acc + acc[nxt]
+        nxt = nn
+    return nxt, acc
+
+
+def get_degree(swc, prow=None):   # Degree of node: the number of nodes connected to it
+    if prow is None:
+        prow = parent_rows(swc)
+    has_parent = prow >= 0
+    n_child = np.bincount(prow[has_parent], minlength=prow.size)
+    return has_parent.astype(np.int32) + n_child.astype(np.int32)
+
+
+def get_rid(swc):
+    '''
+    Find root node. Returns its row index, -1 if there is none.
+    '''
+    rows = np.flatnonzero((np.asarray(swc['parent']) < 0) & (np.asarray(swc['type']) <= 1))
+    if rows.size < 1:
+        return -1
+    return int(rows[0])
+
+
+def get_keypoint(swc, rid=None, prow=None):  # keypoint: degree ≠ 2 (branches & tips)
+    '''
+    Row indices of the keypoints: branch points, tips and the root.
+    '''
+    if rid is None:
+        rid = get_rid(swc)
+    mask = get_degree(swc, prow) != 2
+    if rid >= 0:
+        mask[rid] = True
+    return np.flatnonzero(mask)
+
+
+def swc2branches(swc, prow=None):
+    '''
+    Branches of a swc as flat arrays (offsets, index): branch i is index[offsets[i]:offsets[i+1]],
+    the row indices from a non-soma keypoint up through its parents to the next keypoint.
+    '''
+    n_nodes = len(swc['n'])
+    if prow is None:
+        prow = parent_rows(swc)
+    rows = np.arange(n_nodes, dtype=np.int32)
+
+    is_key = np.zeros(n_nodes, dtype=bool)
+    is_key[get_keypoint(swc, prow=prow)] = True
+    stop = is_key | (prow < 0)      # a walk ends at a keypoint or at a node without parent
+    starts = np.flatnonzero(is_key & (np.asarray(swc['parent']) >= 0) & (np.asarray(swc['type']) > 1) & (prow >= 0))
+
+    # Interior nodes have exactly one child, so each belongs to at most one branch.
+    # Jump from every interior node down to the bottom of its chain by pointer doubling.
+    interior = ~stop
+    down = rows.copy()
+    has_parent = prow >= 0
+    child = rows[has_parent]
+    on_interior = interior[prow[has_parent]]
+    down[prow[has_parent][on_interior]] = child[on_interior]
+    dist = interior.astype(np.int32)
+    for _ in range(max(1, int(np.ceil(np.log2(n_nodes + 1)))) + 1):
+        nxt = down[down]
+        if np.array_equal(nxt, down):
+            break
+        dist = dist + dist[down]
+        down = nxt
+
+    # Branch id of every start, and of every interior node whose chain bottoms out at a start
+    branch_of = np.full(n_nodes, -1, dtype=np.int32)
+    branch_of[starts] = np.arange(starts.size, dtype=np.int32)
+    in_branch = interior & ~interior[down]
+    in_branch[in_branch] = branch_of[down[in_branch]] >= 0
+    member_branch = branch_of[down[in_branch]]
+
+    lengths = 2 + np.bincount(member_branch, minlength=starts.size)
+    offsets = np.zeros(starts.size + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    index = np.empty(offsets[-1], dtype=np.int32)
+    index[offsets[:-1]] = starts
+    index[offsets[:-1][member_branch] + dist[in_branch]] = rows[in_branch]
+    last = offsets[1:] - 1
+    index[last] = prow[index[last - 1]]
+    return offsets, index
+
+
+def branches_to_lists(swc, offsets, index):
+    '''
+    Convert (offsets, index) to the list-of-node-id form of the original swc2branches.
+    '''
+    ids = np.asarray(swc['n'])[index].tolist()
+    return [ids[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
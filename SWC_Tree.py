@@ -0,0 +1,126 @@
+import numpy as np
+from SWC_IO import COLUMN_DTYPES, readSWCArrays
+from SWC_Topology import parent_rows, get_degree, get_rid, get_keypoint, swc2branches
+
+TREE_COLUMNS = ("n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp")
+
+
+class NeuronTree:
+    '''
+    Array-backed neuron: one contiguous typed array per column, rows in file order.
+    Supports swc['x'] style access, so it can be passed wherever a column dict is expected.
+    Degree, root, keypoints and branches are computed on first use and memoized.
+    '''
+    __slots__ = TREE_COLUMNS + ("path", "_order", "_prow", "_degree", "_rid", "_keypoints", "_branches")
+
+    def __init__(self, columns, path=None, branches=None):
+        for name in TREE_COLUMNS:
+            col = columns.get(name)      # ESWC extras are None for plain SWC files
+            setattr(self, name, None if col is None else np.ascontiguousarray(col, dtype=COLUMN_DTYPES[name]))
+        self.path = path
+        self._order = None
+        self._prow = None
+        self._degree = None
+        self._rid = None
+        self._keypoints = None
+        self._branches = branches
+
+    @classmethod
+    def fromFile(cls, swc_path):
+        '''
+        Parse a SWC/ESWC text file.
+        '''
+        return cls(readSWCArrays(swc_path), path=swc_path)
+
+    @classmethod
+    def load(cls, swc_path, cache_dir=None):
+        '''
+        Load through the binary cache: columns are memory-mapped and branches come precomputed.
+        '''
+        from SWC_Cache import loadNeuron
+        columns, offsets, index = loadNeuron(swc_path, cache_dir)
+        return cls(columns, path=swc_path, branches=(offsets, index))
+
+    def __len__(self):
+        return len(self.n)
+
+    def __getitem__(self, name):
+        if name not in TREE_COLUMNS:
+            raise KeyError(name)
+        col = getattr(self, name)
+        if col is None:
+            raise KeyError(name)
+        return col
+
+    def __contains__(self, name):
+        return name in TREE_COLUMNS and getattr(self, name) is not None
+
+    def __repr__(self):
+        return f"NeuronTree({self.path!r}, nodes={len(self)})"
+
+    def rows(self, ids):
+        '''
+        Map node ids to row indices (-1 for unknown ids).
+        '''
+        if self._order is None:
+            self._order = np.argsort(self.n, kind='stable').astype(np.int32)
+        order = self._order
+        ids = np.asarray(ids)
+        pos = np.searchsorted(self.n, ids, sorter=order).clip(0, max(len(self) - 1, 0))
+        found = self.n[order[pos]] == ids if len(self) else np.zeros(ids.shape, dtype=bool)
+        return np.where(found, order[pos], -1)
+
+    def coords(self, rows=None):
+        '''
+        (N, 3) float32 array of x, y, z, optionally for a subset of rows.
+        '''
+        if rows is None:
+            return np.column_stack((self.x, self.y, self.z))
+        return np.column_stack((self.x[rows], self.y[rows], self.z[rows]))
+
+    @property
+    def parent_rows(self):
+        if self._prow is None:
+            self._prow = parent_rows(self)
+        return self._prow
+
+    @property
+    def degree(self):
+        if self._degree is None:
+            self._degree = get_degree(self, self.parent_rows)
+        return self._degree
+
+    @property
+    def root(self):
+        '''
+        Row index of the root node, -1 if there is none.
+        '''
+        if self._rid is None:
+            self._rid = get_rid(self)
+        return self._rid
+
+    @property
+    def keypoints(self):
+        if self._keypoints is None:
+            self._keypoints = get_keypoint(self, self.root, self.parent_rows)
+        return self._keypoints
+
+    @property
+    def branches(self):
+        '''
+        (offsets, index) flat branch arrays, see SWC_Topology.swc2branches.
+        '''
+        if self._branches is None:
+            self._branches = swc2branches(self, self.parent_rows)
+        return self._branches
+
+    @property
+    def nbytes(self):
+        '''
+        Bytes held by the columns and the derived arrays computed so far.
+        '''
+        arrays = [getattr(self, name) for name in TREE_COLUMNS]
+        arrays += [self._order, self._prow, self._degree, self._keypoints]
+        if self._branches is not None:
+            arrays += list(self._branches)
+        return sum(arr.nbytes for arr in arrays if arr is not None)
@@ -0,0 +1,132 @@
+'''
+Waiting-list icons of videos for the multimedia viewers. VideoThumbnailer runs ffmpeg in at
+most `processes` QProcesses at a time, beside the event loop of the thread that owns it, and
+reports each video through a signal when its frame is written:
+
+    finished(object, str, str)   tag, image path ("" on failure), error message ("" on success)
+
+ffmpeg seeks on the input to the keyframe before the requested time, decodes keyframes only
+and scales the frame to the icon size itself, so a frame costs one small decode and a small
+JPEG whatever the resolution of the video. A process still running after `timeout` seconds is
+killed and reported as failed, as is every video when ffmpeg is not installed.
+'''
+import os
+import shutil
+from collections import deque
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+
+def ffmpeg_arguments(video_path, output_path, size, seek=1.0):
+    '''
+    ffmpeg arguments writing the keyframe at or before `seek` seconds of `video_path`, scaled
+    to fit in size x size pixels, to the JPEG `output_path`.
+    '''
+    return ["-nostdin", "-loglevel", "error", "-y",
+            "-skip_frame", "nokey", "-noaccurate_seek", "-ss", f"{seek:g}", "-i", video_path,
+            "-map", "0:v:0", "-frames:v", "1",
+            "-vf", f"scale={size}:{size}:force_original_aspect_ratio=decrease",
+            "-q:v", "3", output_path]
+
+
+class VideoThumbnailer(QObject):
+    finished = pyqtSignal(object, str, str)
+
+    def __init__(self, processes=None, timeout=10.0, program=None):
+        '''
+        processes: ffmpeg processes running at the same time (default: cores, at most 4).
+        timeout: seconds before a process is killed.
+        program: ffmpeg executable (default: looked up in PATH).
+        '''
+        super().__init__()
+        self.program = program or shutil.which("ffmpeg")
+        self.processes = processes or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self._queue = deque()
+        self._running = {}          # QProcess -> job
+        self._timed_out = set()
+
+    @property
+    def available(self):
+        return self.program is not None
+
+    def submit(self, tag, video_path, output_path, size, seek=1.0):
+        '''
+        Write a frame of `video_path` to `output_path`. A video shorter than `seek` seconds
+        falls back to its first frame.
+        '''
+        if self.program is None:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            self.finished.emit(tag, "", "ffmpeg not found")
+            return
+        self._queue.append((tag, video_path, output_path, size, seek))
+        self._start()
+
+    def _start(self):
+        while self._queue and len(self._running) < self.processes:
+            job = self._queue.popleft()
+            tag, video_path, output_path, size, seek = job
+            process = QProcess(self)
+            self._running[process] = job
+            timer = QTimer(process)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda p=process: self._kill(p))
+            process.finished.connect(lambda code, status, p=process: self._done(p))
+            process.errorOccurred.connect(lambda error, p=process: error == QProcess.FailedToStart and self._done(p))
+            process.start(self.program, ffmpeg_arguments(video_path, output_path, size, seek))
+            timer.start(int(self.timeout * 1000))
+
+    def _kill(self, process):
+        if process in self._running:
+            self._timed_out.add(process)
+            process.kill()
+
+    def _done(self, process):
+        job = self._running.pop(process, None)
+        if job is None:             # already reported (FailedToStart) or shut down
+            return
+        tag, video_path, output_path, size, seek = job
+        error = ""
+        if process in self._timed_out:
+            self._timed_out.discard(process)
+            error = f"ffmpeg timed out after {self.timeout:g} s"
+        elif process.error() == QProcess.FailedToStart:
+            error = f"cannot start {self.program}"
+        elif process.exitStatus() != QProcess.NormalExit or process.exitCode() != 0:
+            message = bytes(process.readAllStandardError()).decode(errors="replace").strip()
+            error = message.splitlines()[-1] if message else f"ffmpeg exited with code {process.exitCode()}"
+        elif not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            if seek > 0:            # shorter than `seek`: try again from the start
+                self._queue.appendleft((tag, video_path, output_path, size, 0))
+                error = None
+            else:
+                error = "no video frame"
+        process.deleteLater()
+        if error:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            self.finished.emit(tag, "", error)
+        elif error is not None:
+            self.finished.emit(tag, output_path, "")
+        self._start()
+
+    def cancel_pending(self):
+        '''
+        Drop the videos that have not started; they report nothing.
+        '''
+        while self._queue:
+            output_path = self._queue.popleft()[2]
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    def shutdown(self):
+        '''
+        Drop the queue and kill the running processes without reporting them.
+        '''
+        self.cancel_pending()
+        running, self._running = self._running, {}
+        for process, job in running.items():
+            process.kill()
+            process.waitForFinished(1000)
+            if os.path.exists(job[2]):
+                os.remove(job[2])
@@ -0,0 +1,106 @@
+"""
+Responsiveness of the monitor GUI thread during a statistics refresh: the extraction run
+directly in the GUI thread (as a blocking script call would) against MonitorCollector, on a
+synthetic data tree behind a local SSH server with emulated latency.
+
+    python benchmarks/bench_collector.py [n_neurons] [--rtt SECONDS] [--nodes N]
+
+A 10 ms QTimer in the GUI thread stands for the event loop; the longest gap between its
+ticks is how long the window would have been frozen.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+from Monitor_Collector import MonitorCollector
+from Monitor_Information_Extraction import collect_statistics
+from Monitor_Manifest import ManifestIndex, RANGES
+from Monitor_Remote import SFTPPool, project_annotators
+from Monitor_Transport import SSHTransport
+from bench_transport import make_tree
+from sftp_server import LocalSSHServer
+
+
+class Heartbeat:
+    def __init__(self, interval_ms=10):
+        self.gaps = []
+        self._last = time.perf_counter()
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._tick)
+        self._timer.start(interval_ms)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.gaps.append(now - self._last)
+        self._last = now
+
+    def max_gap(self):
+        return max(self.gaps[1:], default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_neurons", nargs="?", type=int, default=400)
+    parser.add_argument("--rtt", type=float, default=0.05, help="emulated round-trip time of the SSH link (s)")
+    parser.add_argument("--nodes", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    with tempfile.TemporaryDirectory() as tmp, LocalSSHServer(args.rtt, separate_process=True) as server:
+        root = os.path.join(tmp, "data")
+        paths = make_tree(root, args.n_neurons, args.nodes)
+        for path in paths[::10]:
+            os.utime(path)
+        RANGES["batch"] = ("17298", "17337")        # the brain ids of make_tree
+
+        def connect():
+            return SSHTransport("127.0.0.1", server.port, "bench", "bench", root=root,
+                                look_for_keys=False, allow_agent=False)
+
+        # Blocking: the extraction called from a GUI slot
+        heartbeat = Heartbeat()
+
+        def blocking():
+            start = time.perf_counter()
+            transport = connect()
+            index = ManifestIndex(os.path.join(tmp, "blocking.sqlite"), root)
+            with SFTPPool(transport.open_session, size=8) as pool:
+                summary = collect_statistics(transport, index)
+                project_annotators(transport, summary["batch_24h"], pool)
+            index.close()
+            transport.close()
+            blocking.seconds = time.perf_counter() - start
+            QTimer.singleShot(100, app.quit)
+        QTimer.singleShot(100, blocking)
+        app.exec_()
+        blocking_gap = heartbeat.max_gap()
+
+        # Background: MonitorCollector in its worker thread
+        heartbeat = Heartbeat()
+        collector = MonitorCollector(3600, connect, os.path.join(tmp, "collector.sqlite"))
+        results = {}
+        collector.statistics_ready.connect(lambda summary: results.update(summary=summary))
+        collector.attribution_ready.connect(lambda rows: results.update(rows=rows))
+        collector.refresh_failed.connect(lambda message: (print(f"refresh failed: {message}"), app.quit()))
+        collector.refresh_finished.connect(lambda seconds: QTimer.singleShot(100, app.quit))
+        collector.start()
+        app.exec_()
+        collector.stop()
+        background_gap = heartbeat.max_gap()
+
+        print(f"{args.n_neurons} neurons, SSH rtt {args.rtt * 1000:.0f} ms")
+        print(f"{'':<22}{'refresh s':>10}{'max GUI stall ms':>18}")
+        print(f"{'blocking (GUI thread)':<22}{blocking.seconds:>10.2f}{blocking_gap * 1000:>18.1f}")
+        print(f"{'MonitorCollector':<22}{collector.last_refresh_seconds:>10.2f}{background_gap * 1000:>18.1f}")
+        print(f"batch total {results['summary']['batch_total']}, changed within 24h {len(results['rows'])}")
+
+
+if __name__ == "__main__":
+    main()
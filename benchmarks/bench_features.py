@@ -0,0 +1,81 @@
+"""
+Native feature engine vs the Vaa3D global_neuron_feature output in GF_test.csv, plus
+throughput in neurons per second.
+
+    python benchmarks/bench_features.py [swc_dir] [--copies N] [--processes N]
+
+Every neuron of swc_dir that appears in GF_test.csv is compared column by column. The
+reference values are stored with 3 to 6 significant digits, so each one is checked to
+half a unit in its last printed digit. HausdorffDimension is an estimate and is reported
+as an absolute difference instead. For throughput the folder is replicated N times.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from SWC_Features import FEATURE_COLUMNS, compute_feature_in_folder
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def printed_tolerance(text):
+    '''
+    Half a unit in the last significant digit of a number as printed, e.g. "1.02E+06" -> 5000.
+    '''
+    mantissa, _, exponent = text.lower().partition("e")
+    digits = len(mantissa.split(".")[1]) if "." in mantissa else 0
+    return 0.5 * 10.0 ** (int(exponent or 0) - digits)
+
+
+def compare(df, gf_text):
+    gf = gf_text.astype({c: float for c in FEATURE_COLUMNS})
+    common = [name for name in df["Name"] if name in gf.index]
+    ours = df.set_index("Name").loc[common]
+    print(f"{len(common)} neuron(s) also in GF_test.csv")
+    ok = True
+    for col in FEATURE_COLUMNS:
+        diff = (ours[col] - gf.loc[common, col]).abs()
+        if col == "HausdorffDimension":
+            print(f"  {col:<32} max |diff| {diff.max():.3f} (box-counting estimate)")
+            continue
+        tol = gf_text.loc[common, col].map(printed_tolerance) * (1 + 1e-6) + 1e-6 * gf.loc[common, col].abs()
+        bad = (diff > tol).sum()
+        ok &= bad == 0
+        print(f"  {col:<32} max rel diff {(diff / gf.loc[common, col].abs().clip(lower=1e-12)).max():.1e}"
+              + (f"  {bad} outside printed precision" if bad else ""))
+    print("all columns match GF_test.csv" if ok else "MISMATCH")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("swc_dir", nargs="?", default=os.path.join(REPO, "test"))
+    parser.add_argument("--copies", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    swc_dir, copies, processes = args.swc_dir, args.copies, args.processes
+
+    gf_text = pd.read_csv(os.path.join(REPO, "GF_test.csv"), dtype=str).set_index("Name")
+    compare(compute_feature_in_folder(swc_dir, processes=processes), gf_text)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in range(copies):
+            for fname in os.listdir(swc_dir):
+                if fname.endswith((".swc", ".eswc")):
+                    shutil.copy(os.path.join(swc_dir, fname), os.path.join(tmp, f"{k}_{fname}"))
+        start = time.perf_counter()
+        df = compute_feature_in_folder(tmp, os.path.join(tmp, "features.csv"), processes)
+        elapsed = time.perf_counter() - start
+    print(f"{len(df)} neurons in {elapsed:.2f} s: {len(df) / elapsed:.1f} neurons/s "
+          f"({processes or os.cpu_count()} process(es))")
+
+
+if __name__ == "__main__":
+    main()
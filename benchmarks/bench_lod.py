@@ -0,0 +1,73 @@
+"""
+Level-of-detail pyramid: build time, points per level, and the time to draw one matplotlib
+tile: original per-branch plot3D at full resolution vs one line collection at full
+resolution and at the level picked for the tile size.
+
+    python benchmarks/bench_lod.py [swc_path] [--tile 288]
+
+Without a path a synthetic 187k-node neuron is used.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+import synthetic
+from SWC_LOD import loadLOD, plot3D_lod
+
+COLORS = ['white', 'black', 'red', 'blue', 'magenta', 'green']
+
+
+def draw_time(lod, level, tile, per_branch=False):
+    start = time.perf_counter()
+    fig = plt.figure(figsize=(tile * 16 / 9 / 80, tile / 80), dpi=80)
+    ax = fig.add_subplot(111, projection='3d')
+    if per_branch:      # the viewers' original loop, one artist per branch
+        for br_type, xyz in lod.branches(level):
+            ax.plot3D(xyz[:, 0], xyz[:, 1], xyz[:, 2], color=COLORS[br_type], linewidth=1)
+    else:
+        plot3D_lod(ax, lod, level)
+    ax.axis('off')
+    fig.canvas.draw()
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    tile = int(sys.argv[sys.argv.index("--tile") + 1]) if "--tile" in sys.argv else 288
+    with tempfile.TemporaryDirectory() as tmp:
+        if args and not args[0].isdigit():
+            swc_path = args[0]
+        else:
+            swc_path = os.path.join(tmp, "synthetic_187k.eswc")
+            synthetic.write_swc(swc_path, synthetic.make_neuron(187005, n_tips=410))
+
+        start = time.perf_counter()
+        lod = loadLOD(swc_path, tmp)                      # builds and writes the LOD sidecar
+        t_build = time.perf_counter() - start
+        start = time.perf_counter()
+        lod = loadLOD(swc_path, tmp)
+        t_load = time.perf_counter() - start
+        print(f"build {t_build:.2f} s, load from sidecar {t_load * 1000:.1f} ms")
+        for k in range(len(lod)):
+            print(f"  level {k}: tolerance {lod.tolerance(k):8.2f}, {lod.npoints(k):>8} points")
+
+        level = lod.pick(tile)
+        t_before = draw_time(lod, 0, tile, per_branch=True)
+        t_full = draw_time(lod, 0, tile)
+        t_lod = draw_time(lod, level, tile)
+        print(f"{tile}px tile: per-branch plot3D at full resolution {t_before:.2f} s, "
+              f"one collection at full resolution {t_full:.2f} s, at level {level} {t_lod:.2f} s "
+              f"({t_before / t_lod:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Manifest scan vs the seven per-range find loops, on a synthetic local copy of the data tree.
+
+    python benchmarks/bench_manifest.py [n_files]
+
+Builds brain folders (zero-padded mouse ids, plain human/batch ids, out-of-range and nested
+ones) with files of various ages, then checks that Monitor_Manifest.summarize gives the same
+counts and lists as the original bash commands run on the same tree, and times both.
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Monitor_Manifest import RANGES, DAY, scan_manifest, summarize
+from Monitor_Transport import LocalTransport
+
+BRAINS = ["00011", "00500", "02327", "02328", "11", "0011", "15257", "17297", "17298", "18454",
+          "191000", "201586", "201587", "201598", "201599", "018000", "abc"]
+# Ages in days, at least 10 minutes away from the -mtime day boundaries (find takes its own clock)
+AGES = [0, 0.5, 1.01, 2, 30, 30.99, 31.01, 45, 400, 700, 1000, 1100, 1200, 1500, -0.04]
+
+
+def legacy_command(root, lo, hi, expr, count):
+    return (f'for dir in {root}/{{{lo}..{hi}}}; do if [ -d "$dir" ]; then '
+            f'find "$dir" -type f -name "*.eswc" {expr}; fi; done' + (" | wc -l" if count else ""))
+
+
+def legacy_summary(root):
+    def run(lo, hi, expr="", count=True):
+        out = subprocess.run(["bash", "-c", legacy_command(root, lo, hi, expr, count)],
+                             capture_output=True, text=True, check=True).stdout
+        return int(out) if count else out.split()
+    newer = "-newermt 2023-01-01 ! -newermt 2024-01-01"
+    summary = {"batch_total": run(*RANGES["batch"]),
+               "batch_24h": run(*RANGES["batch"], "-mtime 0", False),
+               "batch_unchanged": run(*RANGES["batch"], "-mtime +30", False)}
+    for name in ("mouse", "human"):
+        summary[f"{name}_total"] = run(*RANGES[name])
+        summary[f"{name}_2023"] = run(*RANGES[name], newer)
+    return summary
+
+
+def make_tree(root, n_files, now):
+    random.seed(0)
+    for k in range(n_files):
+        folder = os.path.join(root, random.choice(BRAINS), *random.choice([[], ["a"], ["a", "b"]]))
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{k}.eswc")
+        with open(path, "w") as f:
+            f.write("x" * random.randint(0, 100))
+        t = now - random.choice(AGES) * DAY
+        os.utime(path, (t, t))
+    open(os.path.join(root, "top_level.eswc"), "w").close()
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, n_files, time.time())
+
+        start = time.perf_counter()
+        ref = legacy_summary(root)
+        t_legacy = time.perf_counter() - start
+        start = time.perf_counter()
+        now = time.time()
+        new = summarize(scan_manifest(LocalTransport(), root), now)
+        t_new = time.perf_counter() - start
+
+        ok = True
+        for key, value in ref.items():
+            same = sorted(value) == sorted(new[key]) if isinstance(value, list) else value == new[key]
+            ok &= same
+            shown = len(value) if isinstance(value, list) else value
+            print(f"{key:<18}{shown:>8}{'' if same else '  MISMATCH'}")
+        print(f"legacy (7 traversals): {t_legacy:.2f} s, manifest (1 traversal): {t_new:.2f} s")
+        print("all statistics match" if ok else "statistics differ")
+
+
+if __name__ == "__main__":
+    main()
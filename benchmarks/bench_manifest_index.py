@@ -0,0 +1,97 @@
+"""
+Incremental refresh of the SQLite manifest index vs a full rescan, on a synthetic local tree.
+
+    python benchmarks/bench_manifest_index.py [n_files] [n_changes]
+
+The tree is indexed once, then changed in every way the index has to follow (new, modified
+and deleted files, a deleted brain folder, a new brain folder, a folder moved in with old
+mtimes); after each refresh the index must equal a fresh full scan. Finally the cost of an
+incremental refresh with n_changes modified files is compared with a full rescan.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Monitor_Manifest import ManifestIndex, RANGES, in_range, scan_manifest
+from Monitor_Transport import LocalTransport
+
+
+def write(path, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x" * random.randint(1, 100))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def check(index, root, label):
+    expected = scan_manifest(LocalTransport(), root).sort_values("path").reset_index(drop=True)
+    got = index.manifest()
+    same = got[["path", "brain_id", "size"]].equals(expected[["path", "brain_id", "size"]]) and \
+        bool(((got["mtime"] - expected["mtime"]).abs() < 1e-6).all())
+    stats = index.last_refresh
+    print(f"{label:<28}{'ok' if same else 'MISMATCH':<10}updated {stats['updated']:>6}  deleted {stats['deleted']:>5}"
+          f"  changed dirs {stats['changed_dirs']:>5}  {stats['seconds'] * 1000:>8.1f} ms")
+    return same
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    random.seed(0)
+    shell = LocalTransport()
+    old = time.time() - 100 * 86400
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "data")
+        brains = [str(b) for b in range(17298, 17298 + max(1, n_files // 50))]
+        paths = [os.path.join(root, random.choice(brains), random.choice(["", "a/"]) + f"{k}.eswc") for k in range(n_files)]
+        for path in paths:
+            write(path, old)
+        for d, _, _ in os.walk(root):
+            os.utime(d, (old, old))
+
+        index = ManifestIndex(os.path.join(tmp, "manifest.sqlite"), root)
+        index.refresh(shell)
+        ok = check(index, root, "initial full scan")
+        time.sleep(0.05)
+
+        write(os.path.join(root, brains[0], "new.eswc"))
+        write(paths[1])                                                     # modified in place
+        os.remove(paths[2])
+        shutil.rmtree(os.path.join(root, brains[-1]))
+        write(os.path.join(root, "999999", "b", "fresh.eswc"))
+        moved = os.path.join(tmp, "outside", "c")
+        write(os.path.join(moved, "old1.eswc"), old)
+        write(os.path.join(moved, "d", "old2.eswc"), old)
+        os.utime(moved, (old, old))
+        os.rename(moved, os.path.join(root, brains[3], "c"))
+        index.refresh(shell)
+        ok &= check(index, root, "mixed changes")
+        index.refresh(shell)
+        ok &= check(index, root, "no change")
+
+        manifest = scan_manifest(LocalTransport(), root)
+        recent = manifest[in_range(manifest["brain_id"], *RANGES["batch"]) & (manifest["mtime"] > time.time() - 86400)]
+        ok &= sorted(index.changed_within(brain_range=RANGES["batch"])) == sorted(recent["path"])
+        print(f"changed within 24h (batch): {len(index.changed_within(brain_range=RANGES['batch']))}, "
+              f"unchanged for 30 days: {len(index.unchanged_for())}")
+
+        for path in random.sample(paths[10:], n_changes):
+            if os.path.exists(path):
+                write(path)
+        index.refresh(shell)
+        ok &= check(index, root, f"{n_changes} modified files")
+        start = time.perf_counter()
+        index.refresh(shell, full=True)
+        print(f"full rescan of {len(index)} files: {(time.perf_counter() - start) * 1000:.1f} ms")
+        index.close()
+        print("index matches the tree" if ok else "index differs from the tree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+SWC_Multiview open time for 1x1, 2x2 and 3x4 layouts (offscreen, load + build + first render).
+
+    python benchmarks/bench_multiview.py [swc_path]
+
+Without a path a synthetic 187k-node neuron is used.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pyvista as pv
+
+import synthetic
+from SWC_Multiview import MyWindow
+
+
+def open_time(swc_path, shape):
+    plotter = pv.Plotter(shape=shape, off_screen=True, window_size=(1920, 1080))
+    start = time.perf_counter()
+    MyWindow.display_swc(None, swc_path, plotter)     # display_swc does not use the widget itself
+    plotter.render()
+    elapsed = time.perf_counter() - start
+    plotter.close()
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            swc_path = sys.argv[1]
+        else:
+            swc_path = os.path.join(tmp, "synthetic_187k.eswc")
+            synthetic.write_swc(swc_path, synthetic.make_neuron(187005, n_tips=410))
+        os.environ.setdefault("SWC_CACHE_DIR", tmp)
+        open_time(swc_path, (1, 1))      # first open writes the binary cache
+        for shape in [(1, 1), (2, 2), (3, 4)]:
+            print(f"{shape[0]}x{shape[1]}: {open_time(swc_path, shape):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+MV2 SWC tile memory on a directory of large synthetic neurons: the former cache of one live
+FigureCanvas per file (figsize given in pixels, i.e. read as inches) against rendered QPixmap
+tiles in a MemoryLRU with a byte budget.
+
+    python benchmarks/bench_mv2_cache.py [n_files] [--nodes N] [--tile 3200x2160] [--cache-mb MB]
+
+Each variant runs in a fresh process (offscreen) and shows every file once, as the slideshow
+does; memory is the growth of the resident set size.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic
+from bench_qc_table import rss
+
+
+def legacy_cache(paths, width, height):
+    # Body of the original MyWindow.generateSWCCache, one canvas kept per file; a shown canvas
+    # is resized to its widget, which is emulated before drawing it
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from SWC_LOD import loadLOD, plot3D_lod
+    cache = {}
+    for swc_path in paths:
+        fig = plt.figure(figsize=(width, height))
+        ax = fig.add_subplot(111, projection='3d')
+        lod = loadLOD(swc_path)
+        plot3D_lod(ax, lod, lod.pick(min(width, height)), linewidth=0.5)
+        ax.axis('off')
+        ax.grid(False)
+        canvas = FigureCanvas(fig)
+        plt.close(fig)
+        cache[swc_path] = canvas
+    for canvas in cache.values():
+        canvas.figure.set_size_inches(width / canvas.figure.dpi, height / canvas.figure.dpi)
+        canvas.draw()
+    return cache
+
+
+def tile_cache(paths, width, height, budget):
+    from SWC_Cache import MemoryLRU
+    from SWC_Tiles import pixmap_nbytes, render_swc_tile, rgba_pixmap
+    cache = MemoryLRU(budget, pixmap_nbytes)
+    for swc_path in paths:
+        cache.put(swc_path, rgba_pixmap(render_swc_tile(swc_path, width, height)))
+    return cache
+
+
+def child(variant, folder, width, height, budget):
+    from PyQt5.QtWidgets import QApplication
+    from SWC_LOD import loadLOD
+    app = QApplication([])
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".eswc"))
+    for path in paths:
+        loadLOD(path)                   # binary cache and LOD pyramid written outside the timing
+    import matplotlib.pyplot as plt     # libraries and fonts loaded by a first small drawing
+    fig = plt.figure(figsize=(1, 1))
+    fig.add_subplot(111, projection='3d').plot([0, 1], [0, 1], [0, 1])
+    fig.canvas.draw()
+    plt.close(fig)
+    before = rss()
+    start = time.perf_counter()
+    cache = legacy_cache(paths, width, height) if variant == "legacy" else tile_cache(paths, width, height, budget)
+    print(time.perf_counter() - start, rss() - before, len(cache))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_files", nargs="?", type=int, default=15)
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--tile", default="3200x2160")
+    parser.add_argument("--cache-mb", type=int, default=96)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    width, height = map(int, args.tile.split("x"))
+    if args.child:
+        return child(args.child[0], args.child[1], width, height, args.cache_mb << 20)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in range(args.n_files):
+            synthetic.write_swc(os.path.join(tmp, f"{k}-neuron.eswc"),
+                                synthetic.make_neuron(args.nodes, n_tips=args.nodes // 50, seed=k))
+        env = dict(os.environ, SWC_CACHE_DIR=os.path.join(tmp, "cache"))
+        print(f"{args.n_files} neurons of {args.nodes} nodes, {width}x{height} tiles, budget {args.cache_mb} MiB")
+        print(f"{'':<34}{'time s':>8}{'memory MiB':>12}{'kept':>6}")
+        for variant, label in (("legacy", "FigureCanvas per file (dict)"), ("tiles", "QPixmap tiles (MemoryLRU)")):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), str(args.n_files), "--nodes", str(args.nodes),
+                                  "--tile", args.tile, "--cache-mb", str(args.cache_mb), "--child", variant, tmp],
+                                 capture_output=True, text=True, env=env)
+            if out.returncode != 0:
+                print(f"{label:<34}failed: {out.stderr.strip().splitlines()[-1]}")
+                continue
+            seconds, memory, kept = out.stdout.split()[-3:]
+            print(f"{label:<34}{float(seconds):>8.1f}{int(memory) / 2**20:>12.1f}{kept:>6}")
+
+
+if __name__ == "__main__":
+    main()
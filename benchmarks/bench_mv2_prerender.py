@@ -0,0 +1,122 @@
+"""
+MV2 directory loading for synthetic neurons: the former serial loop on the GUI thread
+(thumbnail JPEG drawn at tile size with pyplot, then the tile drawn from a second load)
+against RenderPool jobs drawing icon and tile from one load in worker processes.
+
+    python benchmarks/bench_mv2_prerender.py [n_files] [--nodes N] [--tile 3200x2160] [--processes 1,2,4]
+
+A 10 ms QTimer in the GUI thread stands for the event loop; its longest gap is how long the
+window is frozen. Icons are counted as they arrive (the progress bar of selectDir).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import synthetic
+from bench_collector import Heartbeat
+from SWC_LOD import loadLOD, plot3D_lod
+from SWC_Tiles import RenderPool, render_swc_images, render_swc_tile, rgba_pixmap
+
+
+def legacy_thumbnail(swc_path, width, height, icon_size):
+    # Body of the former MyWindow.generateSWCThumbnail
+    import matplotlib.pyplot as plt
+    output_image_path = swc_path + ".thumbnail.jpg"
+    fig = plt.figure(figsize=(width / 80, height / 80))
+    ax = fig.add_subplot(111, projection='3d')
+    lod = loadLOD(swc_path)
+    plot3D_lod(ax, lod, lod.pick(icon_size), linewidth=1)
+    ax.axis('off')
+    ax.grid(False)
+    plt.tight_layout()
+    plt.savefig(output_image_path, dpi=80, bbox_inches='tight', pad_inches=0)
+    plt.close(fig)
+    return output_image_path
+
+
+def serial(app, paths, width, height, icon_size, n_tiles):
+    heartbeat = Heartbeat()
+    app.processEvents()
+    start = time.perf_counter()
+    for i, path in enumerate(paths):
+        QPixmap(legacy_thumbnail(path, width, height, icon_size))
+        if i < n_tiles:
+            rgba_pixmap(render_swc_tile(path, width, height))
+        app.processEvents()
+    return time.perf_counter() - start, heartbeat.max_gap()
+
+
+def pooled(app, paths, width, height, icon_size, n_tiles, processes):
+    pool = RenderPool(processes)
+    pool.submit(None, int, 0)               # start the workers outside the timing
+    loop = QEventLoop()
+    pool.finished.connect(lambda *args: loop.quit())
+    loop.exec_()
+    pool.finished.disconnect()
+
+    heartbeat = Heartbeat()
+    arrivals = []
+    start = time.perf_counter()
+
+    def done(tag, result, error):
+        icon, tile = result
+        rgba_pixmap(icon)
+        if tile is not None:
+            rgba_pixmap(tile)
+        arrivals.append(time.perf_counter() - start)
+        if len(arrivals) == len(paths):
+            loop.quit()
+    pool.finished.connect(done)
+    for i, path in enumerate(paths):
+        pool.submit(i, render_swc_images, path, (width, height), icon_size, i < n_tiles)
+    loop.exec_()
+    pool.shutdown()
+    return arrivals[-1], heartbeat.max_gap(), arrivals[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_files", nargs="?", type=int, default=15)
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--tile", default="3200x2160")
+    parser.add_argument("--processes", default=None, help="comma-separated pool sizes (default: 1 .. cores)")
+    args = parser.parse_args()
+    width, height = map(int, args.tile.split("x"))
+    icon_size = int(3 * width / args.n_files)
+    n_tiles = (96 << 20) // (4 * width * height)        # MV2's default budget
+    cores = os.cpu_count() or 1
+    sizes = [int(n) for n in args.processes.split(",")] if args.processes else \
+        sorted({1, max(1, cores // 2), cores})
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SWC_CACHE_DIR"] = os.path.join(tmp, "cache")    # inherited by the workers
+        paths = []
+        for k in range(args.n_files):
+            path = os.path.join(tmp, f"{k}-neuron.eswc")
+            synthetic.write_swc(path, synthetic.make_neuron(args.nodes, n_tips=args.nodes // 50, seed=k))
+            loadLOD(path)                   # binary and LOD caches written outside the timing
+            paths.append(path)
+
+        print(f"{args.n_files} neurons of {args.nodes} nodes, {width}x{height} tiles "
+              f"({n_tiles} prerendered), {icon_size} px icons, {cores} core(s)")
+        print(f"{'':<28}{'total s':>9}{'first icon s':>14}{'GUI frozen ms':>15}")
+        seconds, stall = serial(app, paths, width, height, icon_size, n_tiles)
+        print(f"{'serial on the GUI thread':<28}{seconds:>9.2f}{'':>14}{stall * 1000:>15.0f}")
+        for processes in sizes:
+            seconds, stall, first = pooled(app, paths, width, height, icon_size, n_tiles, processes)
+            print(f"{f'RenderPool, {processes} process(es)':<28}{seconds:>9.2f}{first:>14.2f}{stall * 1000:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Monitor 3D preview: original per-branch add_lines loop vs one merged PolyData actor.
+Times load + build + first render in an offscreen plotter, for the largest neuron in
+swc_dir and for a synthetic 187k-node neuron.
+
+    python benchmarks/bench_preview.py [swc_dir] [--skip-legacy-large]
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pyvista as pv
+
+import legacy
+import synthetic
+from SWC_Render import SWC_COLORS, neuron_polydata, add_neuron
+from SWC_Tree import NeuronTree
+
+
+def legacy_preview(swc_path, plotter):
+    # Body of the original MainWindow.loadSWC
+    swc = legacy.readSWC(swc_path, mode='simple')
+    swc_brs = legacy.swc2branches(swc)
+    plotter.clear()
+    for br in swc_brs:
+        br_color = SWC_COLORS[int(swc.loc[br[0], 'type'])]
+        br_coords = swc.loc[br, ['x', 'y', 'z']].copy()
+        Xe = br_coords['x'].to_list()
+        Ye = br_coords['y'].to_list()
+        Ze = br_coords['z'].to_list()
+        lines = []
+        for k in range(len(Xe) - 1):
+            lines.append([Xe[k], Ye[k], Ze[k]])
+            lines.append([Xe[k+1], Ye[k+1], Ze[k+1]])
+        plotter.add_lines(np.array(lines), color=br_color)
+        plotter.reset_camera()
+    plotter.render()
+    return len(swc_brs)
+
+
+def merged_preview(swc_path, plotter, cache_dir):
+    tree = NeuronTree.load(swc_path, cache_dir)
+    plotter.clear()
+    add_neuron(plotter, neuron_polydata(tree))
+    plotter.reset_camera()
+    plotter.render()
+    return len(tree.branches[0]) - 1
+
+
+def timed(func, *args):
+    plotter = pv.Plotter(off_screen=True, window_size=(800, 600))
+    start = time.perf_counter()
+    result = func(*args[:1], plotter, *args[1:])
+    elapsed = time.perf_counter() - start
+    n_actors = len(plotter.renderer.actors)
+    plotter.close()
+    return elapsed, n_actors, result
+
+
+def report(name, swc_path, run_legacy=True):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        t_cold, actors, n_br = timed(merged_preview, swc_path, cache_dir)
+        t_warm, _, _ = timed(merged_preview, swc_path, cache_dir)
+    print(f"{name}: {n_br} branches")
+    if run_legacy:
+        t_old, old_actors, _ = timed(legacy_preview, swc_path)
+        print(f"  before (per-branch add_lines):  {t_old:8.2f} s, {old_actors} actors")
+    print(f"  after, text parse:              {t_cold:8.2f} s, {actors} actor")
+    print(f"  after, binary cache hit:        {t_warm:8.2f} s, {actors} actor")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    swc_dir = args[0] if args else "test"
+    files = glob.glob(os.path.join(swc_dir, "*.swc")) + glob.glob(os.path.join(swc_dir, "*.eswc"))
+    if files:
+        largest = max(files, key=lambda path: sum(1 for _ in open(path, "rb")))
+        report(os.path.basename(largest), largest)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic_187k.eswc")
+        synthetic.write_swc(path, synthetic.make_neuron(187005, n_tips=410))
+        report("synthetic_187k", path, run_legacy="--skip-legacy-large" not in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
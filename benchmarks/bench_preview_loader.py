@@ -0,0 +1,113 @@
+"""
+Monitor 3D preview on large synthetic neurons: the former synchronous loadSWC body against
+PreviewLoader (worker thread, cancellation, mesh LRU cache).
+
+    python benchmarks/bench_preview_loader.py [n_nodes] [--cache-mb MB]
+
+A 10 ms QTimer in the GUI thread stands for the event loop; its longest gap is how long the
+window is frozen. Each neuron is loaded from text (cold binary cache) the first time.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["SWC_CACHE_DIR"] = tempfile.mkdtemp(prefix="swc_cache_")
+
+import pyvista as pv
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+import synthetic
+from bench_collector import Heartbeat
+from Monitor_Preview import PreviewLoader
+from SWC_Render import add_neuron, neuron_polydata
+from SWC_Tree import NeuronTree
+
+
+def render(plotter, mesh):
+    plotter.clear()
+    add_neuron(plotter, mesh)
+    plotter.reset_camera()
+    plotter.render()
+
+
+def run_loop(app, until, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while not until() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_nodes", nargs="?", type=int, default=187000)
+    parser.add_argument("--cache-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    plotter = pv.Plotter(off_screen=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for k in range(6):
+            path = os.path.join(tmp, f"neuron_{k}.eswc")
+            synthetic.write_swc(path, synthetic.make_neuron(args.n_nodes, n_tips=args.n_nodes // 50, seed=k))
+            paths.append(path)
+
+        # Synchronous: parse, build and render inside the double-click slot
+        heartbeat = Heartbeat()
+        app.processEvents()
+        start = time.perf_counter()
+        render(plotter, neuron_polydata(NeuronTree.load(paths[0])))
+        sync_seconds = time.perf_counter() - start
+        app.processEvents()
+        sync_stall = max(heartbeat.max_gap(), sync_seconds)
+
+        # PreviewLoader: first view of a neuron
+        loader = PreviewLoader(args.cache_mb << 20)
+        delivered = []
+        loader.mesh_ready.connect(lambda request_id, path, mesh: delivered.append((request_id, path, mesh)))
+        heartbeat = Heartbeat()
+        start = time.perf_counter()
+        loader.request(paths[1])
+        run_loop(app, lambda: delivered)
+        ready_seconds = time.perf_counter() - start
+        load_stall = heartbeat.max_gap()
+        start = time.perf_counter()
+        render(plotter, delivered[-1][2])
+        render_seconds = time.perf_counter() - start
+
+        # Revisit: served from the mesh cache
+        start = time.perf_counter()
+        mesh = loader.request(paths[1])
+        render(plotter, mesh)
+        revisit_seconds = time.perf_counter() - start
+
+        # Four quick clicks on uncached neurons: only the last one is delivered
+        delivered.clear()
+        built = loader.n_built
+        for path in paths[2:]:
+            loader.request(path)
+            app.processEvents()
+            time.sleep(0.02)
+        run_loop(app, lambda: delivered)
+        time.sleep(0.5)
+        app.processEvents()
+        superseded = [os.path.basename(path) for _, path, _ in delivered]
+        n_built = loader.n_built - built
+        loader.stop()
+
+    print(f"{args.n_nodes}-node neurons, mesh cache {args.cache_mb} MiB "
+          f"({loader.cache.nbytes / 2**20:.1f} MiB used by {len(loader.cache)} mesh(es))")
+    print(f"{'synchronous loadSWC':<40}{sync_seconds:>8.3f} s   GUI frozen {sync_stall * 1000:.0f} ms")
+    print(f"{'PreviewLoader, first view (ready)':<40}{ready_seconds:>8.3f} s   GUI frozen {load_stall * 1000:.0f} ms")
+    print(f"{'  + render on the GUI thread':<40}{render_seconds:>8.3f} s")
+    print(f"{'PreviewLoader, revisit (cache + render)':<40}{revisit_seconds:>8.3f} s")
+    print(f"4 quick clicks: delivered {superseded}, meshes built {n_built}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Batch QC engine: agreement with report_data_forBBP_1891.csv and wall-clock time per 1000 neurons.
+
+    python benchmarks/bench_qc.py [swc_dir] [--neurons 1000] [--processes N]
+
+Every neuron of swc_dir that appears in the report is compared column by column (count
+columns: number of neurons that agree exactly; lengths: relative difference). The comparison
+is repeated with every neurite radius set to 1 (soma kept): the report was made from files
+whose radii were flattened, and the radius checks (narrow_start, fat_ends) only agree on
+such inputs. For timing, swc_dir is replicated with hard links up to the requested number
+of neurons.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+from SWC_IO import SWC_COLUMNS, readSWCArrays
+from SWC_QC import QC_COLUMNS, compute_qc_in_folder, neuron_qc
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LENGTH_COLUMNS = ["total_section_length", "max_section_length"]
+
+
+def compare(df, report):
+    common = [name for name in df["swc_name"] if name in report.index]
+    ours = df.set_index("swc_name").loc[common]
+    ref = report.loc[common]
+    print(f"{len(common)} neuron(s) also in the report")
+    for col in QC_COLUMNS:
+        if col in LENGTH_COLUMNS:
+            rel = ((ours[col] - ref[col]) / ref[col]).abs()
+            print(f"  {col:<50} max rel diff {rel.max():.2%}")
+        else:
+            print(f"  {col:<50} {(ours[col] == ref[col]).sum()}/{len(common)} equal")
+
+
+def flat_radii_qc(swc_dir):
+    rows = []
+    for fname in sorted(f for f in os.listdir(swc_dir) if f.endswith((".swc", ".eswc"))):
+        swc = readSWCArrays(os.path.join(swc_dir, fname), SWC_COLUMNS)
+        swc["r"] = swc["r"].copy()
+        swc["r"][swc["type"] != 1] = 1.0
+        rows.append({"swc_name": os.path.splitext(fname)[0], **neuron_qc(swc)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("swc_dir", nargs="?", default=os.path.join(REPO, "test"))
+    parser.add_argument("--neurons", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    report = pd.read_csv(os.path.join(REPO, "report_data_forBBP_1891.csv")).set_index("swc_name")
+    compare(compute_qc_in_folder(args.swc_dir, processes=args.processes), report)
+    print("with constant neurite radii:")
+    compare(flat_radii_qc(args.swc_dir), report)
+
+    files = sorted(f for f in os.listdir(args.swc_dir) if f.endswith((".swc", ".eswc")))
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in range(args.neurons):
+            fname = files[k % len(files)]
+            os.link(os.path.join(args.swc_dir, fname), os.path.join(tmp, f"{k}_{fname}"))
+        start = time.perf_counter()
+        df = compute_qc_in_folder(tmp, os.path.join(tmp, "report.csv"), args.processes)
+        elapsed = time.perf_counter() - start
+    print(f"{len(df)} neurons in {elapsed:.2f} s: {1000 * elapsed / len(df):.1f} s per 1000 neurons "
+          f"({args.processes or os.cpu_count()} process(es))")
+
+
+if __name__ == "__main__":
+    main()
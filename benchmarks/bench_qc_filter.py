@@ -0,0 +1,105 @@
+"""
+Filter and sort latency of the QC panel on a synthetic QC report: ColumnFilterProxy (column
+masks, cached argsort) against a QSortFilterProxyModel with a per-row Python predicate.
+
+    python benchmarks/bench_qc_filter.py [n_rows]
+
+Each timing covers the proxy update and the repaint of an attached QTableView (offscreen).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QSortFilterProxyModel, Qt
+from PyQt5.QtWidgets import QApplication, QTableView
+from Monitor_Tables import ColumnFilterProxy, ColumnTableModel, QC_THRESHOLDS
+from bench_qc_table import QC_COLUMNS, synthetic_report
+
+FILTERS = [
+    ("z_jumps > 0", dict(ranges={"z_jumps": (1, None)})),
+    ("root_node_jump >= 4", dict(ranges={"root_node_jump": (4, None)})),
+    ("name contains '_123'", dict(name="_123")),
+    ("any failing check", dict(failing_only=True)),
+    ("failing, order 20..40", dict(ranges={"max_branch_order": (20, 40)}, failing_only=True)),
+    ("no filter", dict()),
+]
+
+
+class RowPredicateProxy(QSortFilterProxyModel):
+    '''
+    The usual approach: the same filters evaluated by filterAcceptsRow, one call per row.
+    '''
+    def __init__(self, source):
+        super().__init__()
+        self.setSourceModel(source)
+        self.checks = [source.names.index(name) for name in QC_THRESHOLDS if name in source.names]
+        self.set_filter()
+
+    def set_filter(self, ranges=None, name="", failing_only=False):
+        self.ranges = [(self.sourceModel().names.index(c), lo, hi) for c, (lo, hi) in (ranges or {}).items()]
+        self.name = name.lower()
+        self.failing_only = failing_only
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row, parent):
+        source = self.sourceModel()
+        for col, lo, hi in self.ranges:
+            value = float(source.index(row, col).data())
+            if (lo is not None and value < lo) or (hi is not None and value > hi):
+                return False
+        if self.name and self.name not in source.index(row, 0).data().lower():
+            return False
+        if self.failing_only:
+            return any(float(source.index(row, col).data()) > 0 for col in self.checks)
+        return True
+
+
+def timed(app, view, func):
+    start = time.perf_counter()
+    func()
+    view.viewport().repaint()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_rows", nargs="?", type=int, default=100000)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    model = ColumnTableModel(synthetic_report(args.n_rows), QC_COLUMNS)
+    results = {}
+    for label, proxy in (("per-row predicate", RowPredicateProxy(model)), ("ColumnFilterProxy", ColumnFilterProxy(model))):
+        view = QTableView()
+        view.setModel(proxy)
+        view.verticalHeader().setVisible(False)        # as in Data_Production_Monitor
+        view.resize(900, 400)
+        view.show()
+        app.processEvents()
+        rows = []
+        for name, kwargs in FILTERS:
+            seconds = timed(app, view, lambda: proxy.set_filter(**kwargs))
+            rows.append((name, seconds, proxy.rowCount()))
+        rows.append(("sort max_branch_order", timed(app, view, lambda: proxy.sort(6, Qt.DescendingOrder)), proxy.rowCount()))
+        rows.append(("re-sort (cached argsort)", timed(app, view, lambda: proxy.sort(6, Qt.AscendingOrder)), proxy.rowCount()))
+        rows.append(("sort swc_name", timed(app, view, lambda: proxy.sort(0, Qt.AscendingOrder)), proxy.rowCount()))
+        results[label] = rows
+        view.close()
+
+    print(f"QC table, {args.n_rows} rows")
+    print(f"{'operation':<28}{'rows':>8}{'per-row ms':>12}{'columnar ms':>13}")
+    for slow, fast in zip(results["per-row predicate"], results["ColumnFilterProxy"]):
+        same = "" if slow[2] == fast[2] else "  DIFFERENT ROW COUNT"
+        print(f"{fast[0]:<28}{fast[2]:>8}{slow[1] * 1000:>12.1f}{fast[1] * 1000:>13.1f}{same}")
+    worst = max(seconds for _, seconds, _ in results["ColumnFilterProxy"])
+    print(f"slowest ColumnFilterProxy update: {worst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup time and memory of the QC panel for a synthetic QC report: the former QTableWidget
+(one QTableWidgetItem per cell through df.iloc) against a QTableView over ColumnTableModel.
+
+    python benchmarks/bench_qc_table.py [n_rows]
+
+Each variant runs in a fresh process (offscreen), from the DataFrame in memory to the first
+painted frame of the table; memory is the growth of the resident set size over that step.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+
+QC_COLUMNS = ['swc_name', 'root_node_jump', 'z_jumps', 'fat_ends',
+              'number_of_dendritic_trees_steaming_from_the_soma',
+              'number_of_axons', 'max_branch_order',
+              'total_section_length', 'max_section_length']
+
+
+def synthetic_report(n_rows, seed=0):
+    '''
+    QC report with the columns of report_data_forBBP_1891.csv shown by the monitor.
+    '''
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'swc_name': [f"{17000 + i % 3000}_{i:05d}" for i in range(n_rows)],
+        'root_node_jump': rng.poisson(2, n_rows),
+        'z_jumps': rng.poisson(0.5, n_rows),
+        'fat_ends': rng.poisson(1, n_rows),
+        'number_of_dendritic_trees_steaming_from_the_soma': rng.integers(1, 12, n_rows),
+        'number_of_axons': rng.integers(0, 3, n_rows),
+        'max_branch_order': rng.integers(5, 60, n_rows),
+        'total_section_length': np.round(rng.gamma(2, 50000, n_rows), 3),
+        'max_section_length': np.round(rng.gamma(2, 3000, n_rows), 3),
+    })
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build(variant, df):
+    from PyQt5.QtWidgets import QHeaderView, QTableView, QTableWidget, QTableWidgetItem
+    if variant == "widget":
+        table = QTableWidget(df.shape[0], df.shape[1])
+        table.setHorizontalHeaderLabels(df.columns)
+        for row in range(df.shape[0]):
+            for col in range(df.shape[1]):
+                table.setItem(row, col, QTableWidgetItem(str(df.iloc[row, col])))
+    else:
+        from Monitor_Tables import ColumnTableModel
+        table = QTableView()
+        table.setModel(ColumnTableModel(df, QC_COLUMNS))
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    return table
+
+
+def child(variant, n_rows):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([])
+    df = synthetic_report(n_rows)[QC_COLUMNS]
+    before = rss()
+    start = time.perf_counter()
+    table = build(variant, df)
+    table.resize(900, 400)
+    table.show()
+    table.grab()                    # first painted frame
+    app.processEvents()
+    print(time.perf_counter() - start, rss() - before)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_rows", nargs="?", type=int, default=100000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.n_rows)
+
+    print(f"QC table, {args.n_rows} rows x {len(QC_COLUMNS)} columns")
+    print(f"{'':<28}{'startup s':>10}{'memory MiB':>12}")
+    results = {}
+    for variant, label in (("widget", "QTableWidget + iloc"), ("model", "QTableView + model")):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), str(args.n_rows), "--child", variant],
+                             capture_output=True, text=True, check=True).stdout.split()
+        seconds, memory = float(out[-2]), int(out[-1])
+        results[variant] = seconds
+        print(f"{label:<28}{seconds:>10.3f}{memory / 2**20:>12.1f}")
+    print(f"speed-up {results['widget'] / results['model']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Bulk SFTP reads and downloads: the sequential loop over one session vs SFTPPool, through an
+in-process SSH server behind a proxy that emulates the round-trip time of the link.
+
+    python benchmarks/bench_sftp_pool.py [n_neurons] [--rtt SECONDS] [--nodes N] [--size POOL_SIZE]
+
+The original loop (unpipelined reads, one file at a time) dominates the run time: about
+3 minutes for the default 100 neurons at 50 ms.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy
+import synthetic
+from Monitor_Remote import SFTPPool, readSWC
+from sftp_server import LocalSSHServer
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_neurons", nargs="?", type=int, default=100)
+    parser.add_argument("--rtt", type=float, default=0.05, help="emulated round-trip time (s)")
+    parser.add_argument("--nodes", type=int, default=5000, help="nodes per synthetic neuron")
+    parser.add_argument("--size", type=int, default=8, help="pool size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, LocalSSHServer(args.rtt) as server:
+        paths = []
+        for k in range(args.n_neurons):
+            paths.append(os.path.join(tmp, f"{k:05d}.eswc"))
+            synthetic.write_swc(paths[-1], synthetic.make_neuron(args.nodes, n_tips=args.nodes // 50, seed=k))
+        size_mb = sum(os.path.getsize(p) for p in paths) / 2 ** 20
+        print(f"{args.n_neurons} neurons, {size_mb:.1f} MiB, rtt {args.rtt * 1000:.0f} ms, pool of {args.size}")
+
+        client = server.connect()
+        sftp = client.open_sftp()
+        t_legacy, old = timed(lambda: [legacy.readSWC_sftp(sftp, p) for p in paths])
+        t_seq, seq = timed(lambda: [readSWC(sftp, p) for p in paths])
+        with SFTPPool(client.open_sftp, size=args.size) as pool:
+            t_pool, rows = timed(lambda: list(pool.read(paths)))
+        assert all(error is None and df.equals(ref) for (_, df, error), ref in zip(rows, seq))
+        print(f"read    sequential (original loop) {t_legacy:7.2f} s")
+        print(f"read    sequential (streaming)     {t_seq:7.2f} s")
+        print(f"read    SFTPPool                   {t_pool:7.2f} s   {t_legacy / t_pool:.1f}x vs original")
+
+        local_dir = os.path.join(tmp, "download")
+        os.mkdir(local_dir)
+        t_get, _ = timed(lambda: [sftp.get(p, os.path.join(local_dir, os.path.basename(p))) for p in paths])
+        with SFTPPool(client.open_sftp, size=args.size) as pool:
+            t_pool_get, rows = timed(lambda: list(pool.download(paths, local_dir)))
+        assert all(error is None for _, _, error in rows)
+        print(f"get     sequential                 {t_get:7.2f} s")
+        print(f"get     SFTPPool                   {t_pool_get:7.2f} s   {t_get / t_pool_get:.1f}x")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
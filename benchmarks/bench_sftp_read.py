@@ -0,0 +1,154 @@
+"""
+Remote SWC read benchmark: the original Monitor_Information_Extraction.readSWC (decode,
+splitlines, join, StringIO) vs the streaming reader, per-file time and peak memory.
+
+    python benchmarks/bench_sftp_read.py [swc_dir] [--host user@host --remote-dir DIR] [--repeat N]
+
+Without --host the files of swc_dir are served through a local stand-in for the SFTP client,
+which measures parsing and memory but not network latency.
+With --host (key-based login) the same file names are read from --remote-dir over SFTP.
+Memory is measured for each reader and file in a fresh process: the tracemalloc peak (Python
+and NumPy allocations), the peak of pyarrow's memory pool, which tracemalloc does not see,
+and the growth of the peak resident set size over the process before the read (after a
+small read that loads the libraries).
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy
+from Monitor_Remote import readSWC
+
+
+class LocalFile:
+    def __init__(self, path):
+        self._f = open(path, "rb")
+
+    def read(self, size=-1):
+        return self._f.read(size)
+
+    def prefetch(self, file_size=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+class LocalSFTP:
+    '''
+    The subset of paramiko.SFTPClient used by both readers, over the local file system.
+    '''
+    def open(self, path, mode="r"):
+        return LocalFile(path)
+
+    file = open
+
+    def close(self):
+        pass
+
+
+READERS = {"legacy": legacy.readSWC_sftp, "stream": readSWC}
+
+
+def connect(host):
+    if not host:
+        return LocalSFTP()
+    import paramiko
+    user, host = host.split("@")
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(host, username=user)
+    return client.open_sftp()
+
+
+def timing(func, sftp, path, repeat):
+    func(sftp, path)      # warm up the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df = func(sftp, path)
+    return (time.perf_counter() - start) / repeat * 1000, df
+
+
+def peak_resident():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def child(reader, path, host):
+    # One read in a fresh process: tracemalloc peak, pyarrow pool peak and peak RSS growth, in bytes
+    from bench_qc_table import rss
+    import pyarrow
+    sftp = connect(host)
+    with tempfile.NamedTemporaryFile("w", suffix=".eswc") as f:     # libraries loaded by a small read
+        f.write("#n type x y z r parent\n" + "".join(f"{k} 3 {k} 0 0 1 {k - 1 or -1} 0 0 0 0 0\n" for k in range(1, 100)))
+        f.flush()
+        READERS[reader](LocalSFTP(), f.name)
+    with open("/proc/self/clear_refs", "w") as f:  # reset the peak (VmHWM) to the current size
+        f.write("5")
+    before = rss()
+    READERS[reader](sftp, path)
+    peak_rss = peak_resident()
+    tracemalloc.start()             # a second read: tracing inflates the resident set itself
+    READERS[reader](sftp, path)
+    traced = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(traced, pyarrow.default_memory_pool().max_memory(), max(peak_rss - before, 0))
+
+
+def memory(reader, path, host):
+    command = [sys.executable, os.path.abspath(__file__), "--child", reader, path]
+    if host:
+        command += ["--host", host]
+    out = subprocess.run(command, capture_output=True, text=True, check=True)
+    return [int(value) / 2 ** 20 for value in out.stdout.split()[-3:]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("swc_dir", nargs="?", default="test")
+    parser.add_argument("--host", help="user@host for a real SFTP run")
+    parser.add_argument("--remote-dir", help="remote folder holding the same files")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child, args.host)
+
+    files = sorted(glob.glob(os.path.join(args.swc_dir, "*.swc")) + glob.glob(os.path.join(args.swc_dir, "*.eswc")))
+    if args.host:
+        files = [f"{args.remote_dir}/{os.path.basename(path)}" for path in files]
+    sftp = connect(args.host)
+
+    print(f"{'':<36}{'time ms':>18}{'traced MiB':>18}{'arrow pool MiB':>18}{'peak RSS MiB':>18}")
+    print(f"{'file':<36}" + f"{'legacy':>9}{'stream':>9}" * 4)
+    total = [0.0] * 8
+    for path in files:
+        t_old, old = timing(legacy.readSWC_sftp, sftp, path, args.repeat)
+        t_new, new = timing(readSWC, sftp, path, args.repeat)
+        if len(old) != len(new):    # the original skips the header twice and drops data rows
+            print(f"  {os.path.basename(path)}: legacy read {len(old)} rows, streaming {len(new)}")
+        m_old = memory("legacy", path, args.host)
+        m_new = memory("stream", path, args.host)
+        row = [t_old, t_new] + [value for pair in zip(m_old, m_new) for value in pair]
+        total = [a + b for a, b in zip(total, row)]
+        print(f"{os.path.basename(path):<36}" + "".join(f"{value:>9.1f}" for value in row))
+    if files:
+        print(f"{'mean':<36}" + "".join(f"{value / len(files):>9.1f}" for value in total))
+
+
+if __name__ == "__main__":
+    main()
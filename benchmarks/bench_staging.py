@@ -0,0 +1,79 @@
+"""
+Staging of the 30-day-unchanged neurons: one exec_command("cp ...") per file (the original
+loop) vs a single batched command, through an in-process SSH server with emulated latency.
+
+    python benchmarks/bench_staging.py [n_files] [--rtt SECONDS]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Monitor_Remote import clear_folder, stage_files
+from Monitor_Transport import SSHTransport
+from sftp_server import LocalSSHServer
+
+
+def legacy_staging(client, sftp, paths, temp_folder):
+    try:
+        sftp.stat(temp_folder)
+        for file in sftp.listdir(temp_folder):
+            sftp.remove(os.path.join(temp_folder, file))
+    except IOError:
+        sftp.mkdir(temp_folder)
+    for file in paths:
+        copy_cmd = f"cp {file} {os.path.join(temp_folder, os.path.basename(file))}"
+        stdin, stdout, stderr = client.exec_command(copy_cmd)
+        error = stderr.read().decode().strip()
+        if error:
+            print(f"Error copying file: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_files", nargs="?", type=int, default=200)
+    parser.add_argument("--rtt", type=float, default=0.05, help="emulated round-trip time (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, LocalSSHServer(args.rtt) as server:
+        source = os.path.join(tmp, "data")
+        os.mkdir(source)
+        paths = []
+        for k in range(args.n_files):
+            paths.append(os.path.join(source, f"{k:05d}.eswc"))
+            with open(paths[-1], "w") as f:
+                f.write("1 1 0 0 0 1 -1\n" * 100)
+        temp_folder = os.path.join(tmp, "eswc_temp_folder")
+        client = server.connect()
+        sftp = client.open_sftp()
+
+        legacy_staging(client, sftp, paths, temp_folder)       # second run clears the folder too
+        start = time.perf_counter()
+        legacy_staging(client, sftp, paths, temp_folder)
+        t_legacy = time.perf_counter() - start
+
+        transport = SSHTransport("127.0.0.1", server.port, "bench", "bench", look_for_keys=False, allow_agent=False)
+        transport.run("true")
+        results = {}
+        for link in (False, True):
+            start = time.perf_counter()
+            clear_folder(transport, temp_folder)
+            staged, failed = stage_files(transport, paths + [os.path.join(source, "missing file.eswc")], temp_folder, link)
+            results[link] = time.perf_counter() - start
+            assert len(staged) == len(paths) and sorted(os.listdir(temp_folder)) == sorted(map(os.path.basename, paths))
+            assert list(failed) == [os.path.join(source, "missing file.eswc")], failed
+        print(f"{args.n_files} files, rtt {args.rtt * 1000:.0f} ms")
+        print(f"per-file exec_command   {t_legacy:7.2f} s")
+        print(f"batched copy            {results[False]:7.2f} s   {t_legacy / results[False]:.0f}x")
+        print(f"batched hard links      {results[True]:7.2f} s   {t_legacy / results[True]:.0f}x")
+        print(f"reported failure: {failed}")
+        transport.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
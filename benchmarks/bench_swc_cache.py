@@ -0,0 +1,45 @@
+"""
+Load benchmark: text parse + swc2branches vs a memory-mapped binary cache hit.
+
+    python benchmarks/bench_swc_cache.py [swc_dir] [repeat]
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import SWC_Cache
+from SWC_IO import readSWCArrays
+from SWC_Topology import swc2branches
+
+
+def text_load(path):
+    swc = readSWCArrays(path)
+    return swc, swc2branches(swc)
+
+
+def main():
+    swc_dir = sys.argv[1] if len(sys.argv) > 1 else "test"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    files = sorted(glob.glob(os.path.join(swc_dir, "*.swc")) + glob.glob(os.path.join(swc_dir, "*.eswc")))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        SWC_Cache.convert_dir(swc_dir, cache_dir)
+        print(f"{'file':<36}{'text ms':>10}{'cached ms':>11}{'speedup':>9}")
+        for path in files:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                text_load(path)
+            t_text = (time.perf_counter() - start) / repeat * 1000
+            start = time.perf_counter()
+            for _ in range(repeat):
+                SWC_Cache.loadNeuron(path, cache_dir)
+            t_cache = (time.perf_counter() - start) / repeat * 1000
+            print(f"{os.path.basename(path):<36}{t_text:>10.2f}{t_cache:>11.3f}{t_text / t_cache:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
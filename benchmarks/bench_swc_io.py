@@ -0,0 +1,50 @@
+"""
+Parse benchmark: original per-viewer readSWC vs the shared SWC_IO parser, on all columns of
+the file and on the 7 SWC columns the original reads.
+
+    python benchmarks/bench_swc_io.py [swc_dir] [repeat]
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy
+import SWC_IO
+
+
+def timeit(func, path, repeat):
+    func(path)    # warm up the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(path)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    swc_dir = sys.argv[1] if len(sys.argv) > 1 else "test"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    files = sorted(glob.glob(os.path.join(swc_dir, "*.swc")) + glob.glob(os.path.join(swc_dir, "*.eswc")))
+
+    print(f"parser: {'pyarrow.csv' if SWC_IO.pa is not None else 'pandas C engine'}")
+    print(f"{'file':<36}{'nodes':>8}{'legacy ms':>12}{'all cols ms':>13}{'speedup':>9}{'7 cols ms':>11}{'speedup':>9}")
+    total_old = total_all = total_swc = 0.0
+    for path in files:
+        n_nodes = len(SWC_IO.readSWCArrays(path, columns=("n",))["n"])
+        t_old = timeit(legacy.readSWC, path, repeat)
+        t_all = timeit(SWC_IO.readSWCArrays, path, repeat)
+        t_swc = timeit(lambda p: SWC_IO.readSWCArrays(p, SWC_IO.SWC_COLUMNS), path, repeat)
+        total_old += t_old
+        total_all += t_all
+        total_swc += t_swc
+        print(f"{os.path.basename(path):<36}{n_nodes:>8}{t_old:>12.2f}{t_all:>13.2f}{t_old / t_all:>8.2f}x"
+              f"{t_swc:>11.2f}{t_old / t_swc:>8.2f}x")
+    if files:
+        print(f"{'total':<44}{total_old:>12.2f}{total_all:>13.2f}{total_old / total_all:>8.2f}x"
+              f"{total_swc:>11.2f}{total_old / total_swc:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
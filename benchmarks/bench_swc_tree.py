@@ -0,0 +1,64 @@
+"""
+Memory per neuron: the original float64 DataFrame (after get_degree) vs NeuronTree.
+
+    python benchmarks/bench_swc_tree.py [swc_dir]
+"""
+import glob
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import legacy
+from SWC_IO import SWC_COLUMNS, readSWCArrays
+from SWC_Tree import NeuronTree, TREE_COLUMNS
+
+
+def is_mapped(arr):
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def heap_bytes(tree):
+    '''
+    Bytes not backed by a memory-mapped cache file.
+    '''
+    arrays = [getattr(tree, name) for name in TREE_COLUMNS] + [tree._prow, tree._degree, tree._keypoints] + list(tree.branches)
+    return sum(arr.nbytes for arr in arrays if arr is not None and not is_mapped(arr))
+
+
+def main():
+    swc_dir = sys.argv[1] if len(sys.argv) > 1 else "test"
+    files = sorted(glob.glob(os.path.join(swc_dir, "*.swc")) + glob.glob(os.path.join(swc_dir, "*.eswc")))
+
+    print(f"{'file':<36}{'nodes':>8}{'DataFrame':>11}{'tree 7col':>11}{'tree ESWC':>11}{'mmap heap':>11}   (KiB)")
+    totals = np.zeros(4)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for path in files:
+            df = legacy.get_degree(legacy.readSWC(path))
+            simple = NeuronTree(readSWCArrays(path, SWC_COLUMNS), path)
+            simple.branches
+            full = NeuronTree.fromFile(path)
+            full.branches
+            NeuronTree.load(path, cache_dir)                  # writes the sidecar
+            mapped = NeuronTree.load(path, cache_dir)
+            mapped.keypoints                                  # derived arrays live on the heap
+            sizes = np.array([df.memory_usage(deep=True).sum(), simple.nbytes, full.nbytes, heap_bytes(mapped)])
+            totals += sizes
+            print(f"{os.path.basename(path):<36}{len(full):>8}" + "".join(f"{s / 1024:>11.0f}" for s in sizes))
+    if files:
+        print(f"{'total':<44}" + "".join(f"{s / 1024:>11.0f}" for s in totals))
+        print(f"DataFrame / tree: {totals[0] / totals[1]:.2f}x (same 7 columns), "
+              f"{totals[0] / totals[2]:.2f}x (tree with ESWC extras), "
+              f"{totals[0] / totals[3]:.1f}x (heap of a memory-mapped tree)")
+
+
+if __name__ == "__main__":
+    main()
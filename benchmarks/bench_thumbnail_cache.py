@@ -0,0 +1,108 @@
+"""
+MV2 waiting-list icons across sessions with the persistent ThumbnailCache, on a read-only
+directory of synthetic neurons: the first session draws every icon (RenderPool), the next
+ones load them from the cache; touching one file redraws only that icon. Also checks that
+nothing is written next to the sources and that the size cap holds.
+
+    python benchmarks/bench_thumbnail_cache.py [n_files] [--nodes N]
+"""
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import synthetic
+from SWC_Cache import ThumbnailCache
+from SWC_Tiles import RenderPool, render_swc_images, rgba_pixmap
+
+TILE = (3200, 2160)
+
+
+def session(pool, thumbnails, paths, icon_size):
+    '''
+    The icon part of MV2.selectDir: returns (seconds until every icon is shown, icons drawn).
+    '''
+    start = time.perf_counter()
+    icons = {}
+    loop = QEventLoop()
+
+    def done(tag, result, error):
+        path, key = tag
+        pixmap = rgba_pixmap(result[0])
+        temp_path = thumbnails.temp_path()
+        if pixmap.save(temp_path, "PNG"):
+            thumbnails.put_file(key, temp_path)
+        icons[path] = pixmap
+        if len(icons) == len(paths):
+            loop.quit()
+    pool.finished.connect(done)
+    drawn = 0
+    for path in paths:
+        key = ThumbnailCache.key(path, kind="swc", icon=icon_size, tile=list(TILE))
+        cached = thumbnails.get(key)
+        if cached is None:
+            pool.submit((path, key), render_swc_images, path, TILE, icon_size, False)
+            drawn += 1
+        else:
+            icons[path] = QPixmap(cached)
+    if len(icons) < len(paths):
+        loop.exec_()
+    pool.finished.disconnect(done)
+    assert all(not pixmap.isNull() for pixmap in icons.values())
+    return time.perf_counter() - start, drawn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_files", nargs="?", type=int, default=15)
+    parser.add_argument("--nodes", type=int, default=100000)
+    args = parser.parse_args()
+    icon_size = int(3 * TILE[0] / args.n_files)
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SWC_CACHE_DIR"] = os.path.join(tmp, "cache")
+        folder = os.path.join(tmp, "neurons")
+        os.mkdir(folder)
+        paths = []
+        for k in range(args.n_files):
+            path = os.path.join(folder, f"{k}-neuron.eswc")
+            synthetic.write_swc(path, synthetic.make_neuron(args.nodes, n_tips=args.nodes // 50, seed=k))
+            paths.append(path)
+        os.chmod(folder, stat.S_IRUSR | stat.S_IXUSR)     # read-only source directory
+
+        pool = RenderPool()
+        thumbnails = ThumbnailCache(os.environ["SWC_CACHE_DIR"])
+        print(f"{args.n_files} neurons of {args.nodes} nodes, {icon_size} px icons")
+        for label in ("first session", "second session"):
+            seconds, drawn = session(pool, ThumbnailCache(os.environ["SWC_CACHE_DIR"]), paths, icon_size)
+            print(f"{label:<32}{seconds:>8.3f} s   {drawn} icon(s) drawn")
+        os.chmod(folder, stat.S_IRWXU)
+        os.utime(paths[0])                                  # a modified neuron
+        os.chmod(folder, stat.S_IRUSR | stat.S_IXUSR)
+        seconds, drawn = session(pool, ThumbnailCache(os.environ["SWC_CACHE_DIR"]), paths, icon_size)
+        print(f"{'after touching one file':<32}{seconds:>8.3f} s   {drawn} icon(s) drawn")
+        print(f"files in the source directory: {len(os.listdir(folder))} (sources only: {len(os.listdir(folder)) == len(paths)})")
+
+        thumbnails = ThumbnailCache(os.environ["SWC_CACHE_DIR"])
+        icon_bytes = thumbnails.nbytes / len(os.listdir(thumbnails.dir))
+        capped = ThumbnailCache(os.environ["SWC_CACHE_DIR"], max_bytes=int(5 * icon_bytes))
+        session(pool, capped, paths, icon_size + 1)          # other render parameters: new entries
+        print(f"cap of 5 icons ({capped.max_bytes / 1024:.0f} KiB): {len(os.listdir(capped.dir))} files, "
+              f"{capped.nbytes / 1024:.0f} KiB kept")
+        pool.shutdown()
+        os.chmod(folder, stat.S_IRWXU)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Verify SWC_Topology.swc2branches branch-for-branch against the original implementation and time both.
+
+    python benchmarks/bench_topology.py [swc_dir] [--large]
+
+--large also runs the original on a synthetic 187k-node neuron (takes minutes).
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import legacy
+import synthetic
+import SWC_IO
+import SWC_Topology
+
+
+def compare(name, swc, run_legacy=True):
+    df = pd.DataFrame({key: swc[key] for key in ("type", "x", "y", "z", "r", "parent")},
+                      index=pd.Index(swc["n"], name="##n"))
+    start = time.perf_counter()
+    offsets, index = SWC_Topology.swc2branches(swc)
+    t_new = (time.perf_counter() - start) * 1000
+    if not run_legacy:
+        print(f"{name:<36}{len(swc['n']):>8}{len(offsets) - 1:>9}{'-':>12}{t_new:>10.1f}{'-':>10}  skipped")
+        return True
+
+    start = time.perf_counter()
+    old = legacy.swc2branches(df)
+    t_old = (time.perf_counter() - start) * 1000
+    same = [[int(node) for node in br] for br in old] == SWC_Topology.branches_to_lists(swc, offsets, index)
+    print(f"{name:<36}{len(swc['n']):>8}{len(offsets) - 1:>9}{t_old:>12.1f}{t_new:>10.1f}"
+          f"{t_old / t_new:>9.0f}x  {'identical' if same else 'MISMATCH'}")
+    return same
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    swc_dir = args[0] if args else "test"
+    files = sorted(glob.glob(os.path.join(swc_dir, "*.swc")) + glob.glob(os.path.join(swc_dir, "*.eswc")))
+
+    print(f"{'file':<36}{'nodes':>8}{'branches':>9}{'legacy ms':>12}{'new ms':>10}{'speedup':>10}")
+    ok = True
+    for path in files:
+        ok &= compare(os.path.basename(path), SWC_IO.readSWCArrays(path))
+    ok &= compare("synthetic_187k", synthetic.make_neuron(187005, n_tips=410), run_legacy="--large" in sys.argv)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+The monitor operations on the same synthetic data tree through both transports: the local
+backend, and the SSH backend against a local SSH server in a child process (with emulated latency).
+
+    python benchmarks/bench_transport.py [n_neurons] [--rtt SECONDS] [--nodes N]
+
+Checks that both backends give the same manifest, annotator ids, staged files and parsed
+neurons, and that the SSH backend reconnects after its connection is dropped.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+from Monitor_Manifest import ManifestIndex, RANGES, summarize
+from Monitor_Remote import SFTPPool, clear_folder, project_annotators, stage_files
+from Monitor_Transport import LocalTransport, SSHTransport
+from sftp_server import LocalSSHServer
+
+
+def make_tree(root, n_neurons, n_nodes):
+    paths = []
+    for k in range(n_neurons):
+        swc = synthetic.make_neuron(n_nodes, n_tips=n_nodes // 50, seed=k)
+        swc["r"][k % 7::97] = 1001 + k % 5                  # reconstructor ids
+        swc["mode"][k % 5::89] = 2001 + k % 3               # checker ids
+        path = os.path.join(root, str(17298 + k % 40), f"{k:05d}.eswc")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        synthetic.write_swc(path, swc)
+        paths.append(path)
+    old = time.time() - 40 * 86400          # everything unchanged for 40 days ...
+    for folder, _, files in os.walk(root):
+        for name in files + [""]:
+            os.utime(os.path.join(folder, name), (old, old))
+    return paths
+
+
+def run(transport, root, paths, tmp, name):
+    timings, results = {}, {}
+
+    def step(label, func):
+        start = time.perf_counter()
+        result = func()
+        timings[label] = time.perf_counter() - start
+        return result
+
+    index = ManifestIndex(os.path.join(tmp, f"{name}.sqlite"), root)
+    step("index: full scan", lambda: index.refresh(transport))
+    for path in paths[::10]:                # ... except one neuron in ten
+        os.utime(path)
+    step("index: incremental", lambda: index.refresh(transport))
+    results["manifest"] = summarize(index.manifest())
+    changed = index.changed_within(brain_range=RANGES["batch"])
+    results["attribution"] = step("annotator ids (server side)", lambda: project_annotators(transport, changed))
+    with SFTPPool(transport.open_session, size=8) as pool:
+        frames = step("read changed (pool)", lambda: list(pool.read(changed)))
+        results["nodes"] = [len(df) for _, df, _ in frames]
+        folder = os.path.join(tmp, f"stage_{name}")
+        unchanged = index.unchanged_for(30, brain_range=RANGES["batch"])
+        step("clear + stage unchanged", lambda: (clear_folder(transport, folder), stage_files(transport, unchanged, folder)))
+        local = os.path.join(tmp, f"download_{name}")
+        os.mkdir(local)
+        remote = [os.path.join(folder, os.path.basename(p)) for p in unchanged]
+        step("download staged (pool)", lambda: list(pool.download(remote, local)))
+        results["staged"] = sorted(os.listdir(local))
+    index.close()
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_neurons", nargs="?", type=int, default=200)
+    parser.add_argument("--rtt", type=float, default=0.02, help="emulated round-trip time of the SSH link (s)")
+    parser.add_argument("--nodes", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, LocalSSHServer(args.rtt, separate_process=True) as server:
+        root = os.path.join(tmp, "data")
+        paths = make_tree(root, args.n_neurons, args.nodes)
+        local_timings, local_results = run(LocalTransport(root), root, paths, tmp, "local")
+        ssh = SSHTransport("127.0.0.1", server.port, "bench", "bench", root=root, look_for_keys=False, allow_agent=False)
+        ssh_timings, ssh_results = run(ssh, root, paths, tmp, "ssh")
+
+        print(f"{args.n_neurons} neurons, SSH rtt {args.rtt * 1000:.0f} ms")
+        print(f"{'operation':<30}{'local s':>9}{'ssh s':>9}")
+        for label in local_timings:
+            print(f"{label:<30}{local_timings[label]:>9.3f}{ssh_timings[label]:>9.3f}")
+        for key in local_results:
+            print(f"{key:<30}{'same' if local_results[key] == ssh_results[key] else 'DIFFERENT'}")
+
+        ssh.client.get_transport().close()          # connection lost
+        status, out, _ = ssh.run("echo reconnected")
+        print(f"after a dropped connection: {out.decode().strip()} ({ssh.n_connects} connections opened)")
+        ssh.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+MV2 video icons: the former extractVideoThumbnail (ffmpeg run synchronously on the GUI thread,
+first frame decoded and written at full resolution) against VideoThumbnailer (bounded pool of
+QProcesses, keyframe input seek, frame scaled to the icon size by ffmpeg).
+
+    python benchmarks/bench_video_thumbnails.py [n_videos] [--size 1920x1080] [--seconds 20] [--processes N]
+
+Test videos are generated with ffmpeg (testsrc2, a keyframe every 2 s). A 10 ms QTimer in the
+GUI thread stands for the event loop; its longest gap is how long the window is frozen.
+Without ffmpeg only the fallback is measured: every video gets its placeholder at once.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from bench_collector import Heartbeat
+from Video_Thumbnails import VideoThumbnailer
+
+ICON = 640
+
+
+def legacy(app, paths, folder):
+    # Body of the former MyWindow.extractVideoThumbnail, one call per video in selectDir
+    heartbeat = Heartbeat()
+    app.processEvents()
+    start = time.perf_counter()
+    nbytes = 0
+    for k, path in enumerate(paths):
+        output_image_path = os.path.join(folder, f"{k}.thumbnail.jpg")
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", path, "-vframes", "1", output_image_path])
+        QPixmap(output_image_path).scaled(ICON, ICON)
+        nbytes += os.path.getsize(output_image_path)
+        app.processEvents()
+    return time.perf_counter() - start, heartbeat.max_gap(), nbytes, 0
+
+
+def pooled(paths, folder, processes, timeout=10.0):
+    thumbnailer = VideoThumbnailer(processes, timeout)
+    heartbeat = Heartbeat()
+    loop = QEventLoop()
+    results = []
+    start = time.perf_counter()
+
+    def done(tag, image_path, error):
+        if image_path:
+            QPixmap(image_path)
+        results.append((os.path.getsize(image_path) if image_path else 0, error))
+        if len(results) == len(paths):
+            loop.quit()
+    thumbnailer.finished.connect(done)
+    for k, path in enumerate(paths):
+        output_path = os.path.join(folder, f"{k}.jpg")
+        open(output_path, "w").close()              # as ThumbnailCache.temp_path() does
+        thumbnailer.submit(k, path, output_path, ICON)
+    if len(results) < len(paths):
+        loop.exec_()
+    failed = [error for _, error in results if error]
+    return time.perf_counter() - start, heartbeat.max_gap(), sum(size for size, _ in results), failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_videos", nargs="?", type=int, default=12)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        if shutil.which("ffmpeg") is None:
+            paths = [os.path.join(tmp, f"{k}-video.mp4") for k in range(args.n_videos)]
+            seconds, stall, _, failed = pooled(paths, tmp, args.processes)
+            print(f"ffmpeg not found: {len(failed)} of {args.n_videos} videos reported "
+                  f"({set(failed)}) in {seconds * 1000:.1f} ms, GUI frozen {stall * 1000:.0f} ms")
+            return
+
+        paths = []
+        for k in range(args.n_videos):
+            path = os.path.join(tmp, f"{k}-video.mp4")
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                            "-i", f"testsrc2=size={args.size}:rate=25", "-t", str(args.seconds),
+                            "-g", "50", "-pix_fmt", "yuv420p", path], check=True)
+            paths.append(path)
+        out = os.path.join(tmp, "out")
+        os.mkdir(out)
+
+        print(f"{args.n_videos} videos of {args.size}, {args.seconds} s, {ICON} px icons")
+        print(f"{'':<36}{'total s':>9}{'GUI frozen ms':>15}{'JPEG KiB':>10}")
+        seconds, stall, nbytes, _ = legacy(app, paths, out)
+        print(f"{'ffmpeg on the GUI thread':<36}{seconds:>9.2f}{stall * 1000:>15.0f}{nbytes / 1024:>10.0f}")
+        seconds, stall, nbytes, failed = pooled(paths, out, args.processes)
+        label = f"VideoThumbnailer, {args.processes or 'default'} process(es)"
+        print(f"{label:<36}{seconds:>9.2f}{stall * 1000:>15.0f}{nbytes / 1024:>10.0f}  {len(failed)} failed")
+        seconds, stall, _, failed = pooled(paths, out, args.processes, timeout=0.001)
+        print(f"{'timeout of 1 ms (placeholders)':<36}{seconds:>9.2f}{stall * 1000:>15.0f}{'':>10}  {len(failed)} failed")
+
+
+if __name__ == "__main__":
+    main()
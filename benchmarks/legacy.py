@@ -0,0 +1,92 @@
+"""
+Reference copies of the original per-viewer SWC helpers (readSWC / swc2branches),
+kept only so the benchmarks can compare the shared modules against them.
+"""
+import io
+import pandas as pd
+
+
+def readSWC(swc_path, mode='simple'):  # pandas DataFrame
+    n_skip = 0
+    with open(swc_path, "r") as f:
+        for line in f.readlines():
+            line = line.strip()
+            if line.startswith("#"):
+                n_skip += 1
+            else:
+                break
+    # names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode", "timestamp", "teraflyindex"]
+    names = ["##n", "type", "x", "y", "z", "r", "parent"]
+    used_cols = [0, 1, 2, 3, 4, 5, 6]
+    if mode == 'simple':
+        pass
+    df = pd.read_csv(swc_path, index_col=0, skiprows=n_skip, sep=" ",
+                     usecols=used_cols,
+                     names=names
+                     )
+    return df
+
+def readSWC_sftp(sftp, swc_path, mode='simple'):  # Monitor_Information_Extraction.readSWC
+    n_skip = 0
+    with sftp.file(swc_path, "r") as f:
+        lines = (f.read().decode('utf-8')).splitlines()
+        for line in lines:
+            if line.startswith("#"):
+                n_skip += 1
+            else:
+                break
+    content = '\n'.join(lines[n_skip:])
+    buffer = io.StringIO(content)
+    names = ["##n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode"]
+    used_cols = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    df = pd.read_csv(buffer, index_col=0, skiprows=n_skip, sep=" ",
+                     usecols=used_cols,
+                     names=names
+                     )
+    return df
+
+def get_degree(tswc):   # Degree of node: the number of nodes connected to it
+    tswc['degree'] = tswc['parent'].isin(tswc.index).astype('int')
+    # print(tswc['degree'])
+    n_child = tswc.parent.value_counts()
+    n_child = n_child[n_child.index.isin(tswc.index)]
+    tswc.loc[n_child.index, 'degree'] = tswc.loc[n_child.index, 'degree'] + n_child
+    return tswc
+
+def get_rid(swc):
+    '''
+    Find root node.
+    '''
+    rnode=swc[((swc['parent']<0) & (swc['type']<=1))]
+    if rnode.shape[0]<1:
+        return -1
+    return rnode.index[0]
+
+def get_keypoint(swc, rid=None):  # keypoint: degree ≠ 2 (branches & tips)
+    if rid is None:
+        rid = get_rid(swc)
+    # print(swc.shape)
+    swc=get_degree(swc)
+    idlist = swc[((swc.degree!=2) | (swc.index==rid))].index.tolist()
+    return idlist
+
+def swc2branches(swc):
+    '''
+    reture branch list of a swc
+    '''
+    keyids=get_keypoint(swc)
+    branches=[]
+    for key in keyids:
+        if (swc.loc[key,'parent']<0) | (swc.loc[key,'type']<=1):
+            continue
+        branch=[]
+        branch.append(key)
+        pkey=swc.loc[key,'parent']
+        while True:
+            branch.append(pkey)
+            if pkey in keyids:
+                break
+            key=pkey
+            pkey=swc.loc[key,'parent']
+        branches.append(branch)
+    return branches
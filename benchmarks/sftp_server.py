@@ -0,0 +1,234 @@
+"""
+In-process SSH server for the benchmarks: SFTP and `exec` (run with the local bash) over a
+local directory, optionally behind a TCP proxy that delays every packet to emulate the
+round-trip time of a remote link. Any user name and password are accepted.
+
+    with LocalSSHServer(rtt=0.05) as server:
+        client = server.connect()          # paramiko.SSHClient
+
+With separate_process=True the server runs in a child Python process, so that its work does
+not compete with the client for the GIL.
+"""
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface, SFTP_OK
+
+_HOST_KEY = paramiko.RSAKey.generate(2048)
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class _LocalSFTP(SFTPServerInterface):
+    '''
+    SFTP requests mapped one to one onto the local file system (absolute paths).
+    '''
+    def _errors(func):
+        def wrapper(*args):
+            try:
+                return func(*args)
+            except OSError as e:
+                return SFTPServer.convert_errno(e.errno)
+        return wrapper
+
+    @_errors
+    def list_folder(self, path):
+        return [SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)), name) for name in os.listdir(path)]
+
+    @_errors
+    def stat(self, path):
+        return SFTPAttributes.from_stat(os.stat(path))
+
+    @_errors
+    def lstat(self, path):
+        return SFTPAttributes.from_stat(os.lstat(path))
+
+    @_errors
+    def open(self, path, flags, attr):
+        fd = os.open(path, flags, 0o644)
+        mode = "r+b" if flags & os.O_RDWR else "wb" if flags & os.O_WRONLY else "rb"
+        handle = _Handle(flags)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    @_errors
+    def remove(self, path):
+        os.remove(path)
+        return SFTP_OK
+
+    @_errors
+    def mkdir(self, path, attr):
+        os.mkdir(path)
+        return SFTP_OK
+
+    @_errors
+    def rmdir(self, path):
+        os.rmdir(path)
+        return SFTP_OK
+
+    @_errors
+    def rename(self, oldpath, newpath):
+        os.rename(oldpath, newpath)
+        return SFTP_OK
+
+    def canonicalize(self, path):
+        return os.path.abspath(path)
+
+
+class _Server(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self._exec, args=(channel, command), daemon=True).start()
+        return True
+
+    @staticmethod
+    def _exec(channel, command):
+        proc = subprocess.Popen(["bash", "-c", command.decode()], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def feed():
+            try:
+                while True:
+                    data = channel.recv(1 << 16)
+                    if not data:
+                        break
+                    proc.stdin.write(data)
+                proc.stdin.close()
+            except BrokenPipeError:     # the command exited without reading all of its input
+                pass
+        threading.Thread(target=feed, daemon=True).start()
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+        reader.start()
+        for data in iter(lambda: proc.stdout.read1(1 << 16), b""):
+            channel.sendall(data)
+        reader.join()
+        channel.sendall_stderr(stderr[0])
+        channel.send_exit_status(proc.wait())
+        channel.close()
+
+
+def _serve(sock):
+    transport = paramiko.Transport(sock)
+    transport.add_server_key(_HOST_KEY)
+    transport.set_subsystem_handler("sftp", SFTPServer, _LocalSFTP)
+    transport.start_server(server=_Server())
+
+
+def _delayed_pipe(src, dst, delay):
+    '''
+    Forward src to dst, every chunk delivered `delay` seconds after it was received.
+    '''
+    chunks = queue.Queue()
+
+    def send():
+        while True:
+            due, data = chunks.get()
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            if not data:
+                break
+            try:
+                dst.sendall(data)
+            except OSError:
+                break
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+    threading.Thread(target=send, daemon=True).start()
+    while True:
+        try:
+            data = src.recv(1 << 16)
+        except OSError:
+            data = b""
+        chunks.put((time.perf_counter() + delay, data))
+        if not data:
+            break
+
+
+class LocalSSHServer:
+    def __init__(self, rtt=0.0, separate_process=False):
+        '''
+        rtt: emulated round-trip time in seconds (0: connect directly).
+        '''
+        self.rtt = rtt
+        self._process = None
+        if separate_process:
+            self._process = subprocess.Popen([sys.executable, os.path.abspath(__file__), str(rtt)],
+                                             stdout=subprocess.PIPE, text=True)
+            self.port = int(self._process.stdout.readline())
+            return
+        self._server = self._listen(_serve)
+        self.port = self._server.getsockname()[1]
+        if rtt > 0:
+            self._proxy = self._listen(self._forward)
+            self.port = self._proxy.getsockname()[1]
+
+    def _listen(self, handler):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(64)
+
+        def accept():
+            while True:
+                try:
+                    conn, _ = sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=handler, args=(conn,), daemon=True).start()
+        threading.Thread(target=accept, daemon=True).start()
+        return sock
+
+    def _forward(self, conn):
+        upstream = socket.create_connection(("127.0.0.1", self._server.getsockname()[1]))
+        for sock in (conn, upstream):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=_delayed_pipe, args=(upstream, conn, self.rtt / 2), daemon=True).start()
+        _delayed_pipe(conn, upstream, self.rtt / 2)
+
+    def connect(self):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", self.port, "bench", "bench", look_for_keys=False, allow_agent=False)
+        return client
+
+    def close(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            return
+        for sock in (self._server, getattr(self, "_proxy", None)):
+            if sock is not None:
+                sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    server = LocalSSHServer(float(sys.argv[1]) if len(sys.argv) > 1 else 0.0)
+    print(server.port, flush=True)
+    threading.Event().wait()
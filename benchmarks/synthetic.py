@@ -0,0 +1,43 @@
+"""
+Synthetic neuron generator for the benchmarks (e.g. a stand-in for the 187k-node 17781_00003).
+"""
+import numpy as np
+
+
+def make_neuron(n_nodes, n_tips=400, seed=0):
+    '''
+    Random tree with a soma root and about `n_tips` long unbranched runs, as a dict of ESWC columns.
+    '''
+    rng = np.random.default_rng(seed)
+    parent = np.empty(n_nodes, dtype=np.int32)
+    parent[0] = -1
+    # Each run starts from a random earlier node and then follows a chain of single children
+    run_start = np.sort(rng.choice(np.arange(2, n_nodes), size=min(n_tips, n_nodes - 2), replace=False))
+    parent[1:] = np.arange(1, n_nodes)           # 1-based id of the previous node
+    parent[run_start] = (rng.random(run_start.size) * run_start).astype(np.int32) + 1
+
+    steps = rng.normal(0, 1.0, (n_nodes, 3)).astype(np.float32)
+    xyz = np.cumsum(steps, axis=0)
+    xyz[run_start] = xyz[parent[run_start] - 1]
+    types = np.where(np.arange(n_nodes) == 0, 1, rng.integers(2, 5, n_nodes)).astype(np.int32)
+    types[1:] = types[parent[1:] - 1].clip(2)
+    return {
+        "n": np.arange(1, n_nodes + 1, dtype=np.int32), "type": types,
+        "x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2],
+        "r": np.ones(n_nodes, dtype=np.float32), "parent": parent,
+        "seg_id": np.full(n_nodes, -1, dtype=np.int32), "level": np.zeros(n_nodes, dtype=np.int32),
+        "mode": np.zeros(n_nodes, dtype=np.int32), "timestamp": np.full(n_nodes, 35, dtype=np.int64),
+        "teraflyindex": np.zeros(n_nodes, dtype=np.int64),
+    }
+
+
+def write_swc(path, swc):
+    '''
+    Write columns in the same space-separated ESWC text layout as the files in test/.
+    '''
+    names = [name for name in ("n", "type", "x", "y", "z", "r", "parent", "seg_id", "level", "mode",
+                               "timestamp", "teraflyindex") if name in swc]
+    fmt = " ".join("%.3f" if name in ("x", "y", "z", "r") else "%d" for name in names)
+    with open(path, "w") as f:
+        f.write("#name synthetic\n#comment \n##n,type,x,y,z,radius,parent,seg_id,level,mode,timestamp,teraflyindex\n")
+        np.savetxt(f, np.column_stack([swc[name] for name in names]), fmt=fmt)